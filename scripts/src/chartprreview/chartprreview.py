@@ -1,5 +1,4 @@
 import argparse
-import hashlib
 import os
 import os.path
 import re
@@ -9,20 +8,14 @@ import sys
 import requests
 import semantic_version
 import semver
-import yaml
 from environs import Env
 
-try:
-    from yaml import CLoader as Loader
-except ImportError:
-    from yaml import Loader
-
 sys.path.append("../")
 from pullrequest import prartifact
 from reporegex import matchers
 from report import report_info, verifier_report
 from signedchart import signedchart
-from tools import gitutils
+from tools import gitutils, remotedigest, yamlio
 
 
 def write_error_log(directory, *msg):
@@ -56,6 +49,10 @@ def get_modified_charts(directory, api_url):
                               hashicorp, vault, 1.4.0)
     """
     print("[INFO] Get modified charts. %s" % directory)
+    chart = prartifact.get_submission_chart(api_url)
+    if chart:
+        return chart
+
     files = prartifact.get_modified_files(api_url)
     pattern = re.compile(
         matchers.submission_path_matcher(strict_categories=False) + r"/.*"
@@ -90,8 +87,7 @@ def verify_user(directory, username, category, organization, chart):
         write_error_log(directory, msg)
         sys.exit(1)
 
-    data = open(owners_path).read()
-    out = yaml.load(data, Loader=Loader)
+    out = yamlio.load_file(owners_path, yamlio.Loader)
     if username not in [x["githubUsername"] for x in out["users"]]:
         msg = f"[ERROR] {username} is not allowed to submit the chart on behalf of {organization}"
         write_error_log(directory, msg)
@@ -118,8 +114,9 @@ def check_owners_file_against_directory_structure(
         "[INFO] Check owners file against directory structure. %s, %s, %s"
         % (category, organization, chart)
     )
-    data = open(os.path.join("charts", category, organization, chart, "OWNERS")).read()
-    out = yaml.load(data, Loader=Loader)
+    out = yamlio.load_file(
+        os.path.join("charts", category, organization, chart, "OWNERS"), yamlio.Loader
+    )
     vendor_label = out["vendor"]["label"]
     chart_name = out["chart"]["name"]
     error_exit = False
@@ -153,10 +150,10 @@ def verify_signature(category, organization, chart, version):
         "charts", category, organization, chart, version, "report.yaml.asc"
     )
     if os.path.exists(sign):
-        data = open(
-            os.path.join("charts", category, organization, chart, "OWNERS")
-        ).read()
-        out = yaml.load(data, Loader=Loader)
+        out = yamlio.load_file(
+            os.path.join("charts", category, organization, chart, "OWNERS"),
+            yamlio.Loader,
+        )
         publickey = out.get("publicPgpKey")
         if not publickey:
             return
@@ -222,7 +219,7 @@ def check_url(directory, report_path):
     chart_url = report_info.get_report_chart_url(report_path=report_path)
 
     try:
-        r = requests.head(chart_url)
+        remote_digest = remotedigest.get_remote_digest(chart_url)
     except requests.exceptions.InvalidSchema as err:
         msgs = []
         msgs.append(f"Invalid schema: {chart_url}")
@@ -241,9 +238,15 @@ def check_url(directory, report_path):
         msgs.append(str(err))
         write_error_log(directory, *msgs)
         sys.exit(1)
+    except requests.exceptions.RequestException as err:
+        msgs = []
+        msgs.append(f"Failed to download chart: {chart_url}")
+        msgs.append(str(err))
+        write_error_log(directory, *msgs)
+        sys.exit(1)
 
     try:
-        r.raise_for_status()
+        remote_digest.raise_for_status()
     except requests.exceptions.HTTPError as err:
         msgs = []
         msgs.append("[WARNING] URL is not accessible: {chart_url} ")
@@ -455,10 +458,10 @@ def check_report_success(directory, api_url, report_path, report_info_path, vers
 def verify_package_digest(url, report):
     print("[INFO] check package digest.")
 
-    response = requests.get(url, allow_redirects=True)
-    if response.status_code == 200:
-        target_digest = hashlib.sha256(response.content).hexdigest()
+    # Shares the download made by check_url
+    target_digest = remotedigest.get_remote_digest(url).sha256
 
+    pkg_digest = None
     found, report_data = verifier_report.get_report_data(report)
     if found:
         pkg_digest = verifier_report.get_package_digest(report_data)
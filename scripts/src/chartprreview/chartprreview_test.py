@@ -1,12 +1,16 @@
 import os
 
 import pytest
+import requests
+import responses
 
+from chartprreview import chartprreview
 from chartprreview.chartprreview import (
     check_owners_file_against_directory_structure,
     verify_user,
     write_error_log,
 )
+from tools import remotedigest
 
 
 def test_verify_user():
@@ -90,3 +94,22 @@ def test_write_error_log(tmpdir):
     write_error_log(tmpdir, "First message", "Second message")
     msg = open(os.path.join(tmpdir, "errors")).read()
     assert msg == "First message\nSecond message\n"
+
+
+@responses.activate
+def test_check_url_request_error(tmpdir, monkeypatch):
+    chart_url = "https://example.com/awesome-1.42.0.tgz"
+    monkeypatch.setenv("REMOTE_DIGEST_CACHE_DIR", "")
+    monkeypatch.setattr(remotedigest, "_remote_digests", {})
+    monkeypatch.setattr(
+        chartprreview.report_info,
+        "get_report_chart_url",
+        lambda report_path: chart_url,
+    )
+    responses.get(chart_url, body=requests.exceptions.ConnectionError("refused"))
+
+    with pytest.raises(SystemExit):
+        chartprreview.check_url(str(tmpdir), "report.yaml")
+
+    with open(os.path.join(tmpdir, "errors")) as fd:
+        assert fd.read() == f"Failed to download chart: {chart_url}\nrefused\n"
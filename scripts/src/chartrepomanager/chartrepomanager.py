@@ -31,21 +31,14 @@ import tempfile
 import time
 import urllib.parse
 
-import yaml
 from environs import Env
 
-try:
-    from yaml import CDumper as Dumper
-    from yaml import CSafeLoader as SafeLoader
-except ImportError:
-    from yaml import Dumper, SafeLoader
-
 sys.path.append("../")
 from pullrequest import prartifact
 from reporegex import matchers
 from report import report_info
 from signedchart import signedchart
-from tools import gitutils
+from tools import gitutils, yamlio
 
 from chartrepomanager import indexannotations
 
@@ -79,6 +72,10 @@ def get_modified_charts(api_url):
         (str, str, str, str): category, organization, chart, and version (e.g. partner,
                               hashicorp, vault, 1.4.0)
     """
+    chart = prartifact.get_submission_chart(api_url)
+    if chart:
+        return chart
+
     files = prartifact.get_modified_files(api_url)
     pattern = re.compile(
         matchers.submission_path_matcher(strict_categories=False) + r"/.*"
@@ -273,7 +270,7 @@ def create_index_from_chart(chart_file_name):
     p = out.stdout.decode("utf-8")
     print(p)
     print(out.stderr.decode("utf-8"))
-    crt = yaml.load(p, Loader=SafeLoader)
+    crt = yamlio.load(p)
     return crt
 
 
@@ -309,7 +306,22 @@ def create_index_from_report(category, ocp_version_range, report_path):
     )
 
     annotations = indexannotations.getIndexAnnotations(ocp_version_range, report_path)
+    _set_provider_type(annotations, category)
+
+    chart_entry = report_info.get_report_chart(report_path)
+    if "annotations" in chart_entry:
+        annotations = chart_entry["annotations"] | annotations
+
+    chart_entry["annotations"] = annotations
+
+    digests = report_info.get_report_digests(report_path)
+    if "package" in digests:
+        chart_entry["digest"] = digests["package"]
+
+    return chart_entry
 
+
+def _set_provider_type(annotations, category):
     print("category:", category)
     redhat_to_community = bool(os.environ.get("REDHAT_TO_COMMUNITY"))
     if category == "partners":
@@ -319,17 +331,36 @@ def create_index_from_report(category, ocp_version_range, report_path):
     else:
         annotations["charts.openshift.io/providerType"] = category
 
-    chart_entry = report_info.get_report_chart(report_path)
-    if "annotations" in chart_entry:
-        annotations = chart_entry["annotations"] | annotations
 
-    chart_entry["annotations"] = annotations
+def get_chart_annotations(
+    category, organization, chart, ocp_version_range, report_path, charts_dir="charts"
+):
+    """Get the annotations to merge into the Chart.yaml of a chart.
 
-    digests = report_info.get_report_digests(report_path)
-    if "package" in digests:
-        chart_entry["digest"] = digests["package"]
+    See update_chart_annotation.
 
-    return chart_entry
+    Args:
+        category (str): Type of profile (community, partners, or redhat)
+        organization (str): Name of the organization (ex: hashicorp)
+        chart (str): Name of the chart (ex: vault)
+        ocp_version_range (str): Range of supported OCP versions
+        report_path (str): Path to the report.yaml file
+        charts_dir (str): Path to the charts directory holding the OWNERS file
+
+    Returns:
+        dict: mapping of annotations names to their values
+    """
+    annotations = indexannotations.getIndexAnnotations(ocp_version_range, report_path)
+    _set_provider_type(annotations, category)
+
+    if "charts.openshift.io/provider" not in annotations:
+        out = yamlio.load_file(
+            os.path.join(charts_dir, category, organization, chart, "OWNERS")
+        )
+        vendor_name = out["vendor"]["name"]
+        annotations["charts.openshift.io/provider"] = vendor_name
+
+    return annotations
 
 
 def update_chart_annotation(
@@ -361,24 +392,9 @@ def update_chart_annotation(
     )
     dr = tempfile.mkdtemp(prefix="annotations-")
 
-    annotations = indexannotations.getIndexAnnotations(ocp_version_range, report_path)
-
-    print("category:", category)
-    redhat_to_community = bool(os.environ.get("REDHAT_TO_COMMUNITY"))
-    if category == "partners":
-        annotations["charts.openshift.io/providerType"] = "partner"
-    elif category == "redhat" and redhat_to_community:
-        annotations["charts.openshift.io/providerType"] = "community"
-    else:
-        annotations["charts.openshift.io/providerType"] = category
-
-    if "charts.openshift.io/provider" not in annotations:
-        data = open(
-            os.path.join("charts", category, organization, chart, "OWNERS")
-        ).read()
-        out = yaml.load(data, Loader=SafeLoader)
-        vendor_name = out["vendor"]["name"]
-        annotations["charts.openshift.io/provider"] = vendor_name
+    annotations = get_chart_annotations(
+        category, organization, chart, ocp_version_range, report_path
+    )
 
     out = subprocess.run(
         [
@@ -394,7 +410,7 @@ def update_chart_annotation(
     print(out.stderr.decode("utf-8"))
 
     fd = open(os.path.join(dr, chart, "Chart.yaml"))
-    data = yaml.load(fd, Loader=SafeLoader)
+    data = yamlio.load(fd)
 
     if "annotations" not in data:
         data["annotations"] = annotations
@@ -405,7 +421,7 @@ def update_chart_annotation(
         # must override, such as the providerType which changes in redhat-to-community cases.
         # |= syntax requires py3.9
         data["annotations"] |= annotations
-    out = yaml.dump(data, Dumper=Dumper)
+    out = yamlio.dump(data)
     with open(os.path.join(dr, chart, "Chart.yaml"), "w") as fd:
         fd.write(out)
 
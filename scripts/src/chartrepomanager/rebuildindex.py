@@ -0,0 +1,399 @@
+"""Rebuild the Helm repository index from the charts/ tree.
+
+Used to regenerate a corrupted index, or to migrate it to a new schema. The entry of
+each chart version is crafted as it was on release by chartrepomanager:
+
+* From the chart's Chart.yaml, if its tarball or sources are available, with the
+  annotations taken from its report.
+* From its report only, otherwise.
+
+Everything needed is read from a local checkout, so no network access is needed. The
+reports and tarballs that were not committed to the charts/ tree (e.g. reports
+generated by the CI) can be provided in a directory of release artifacts, organized
+as the GitHub releases: <artifacts dir>/<release tag>/{report.yaml,<chart>-<version>.tgz}.
+
+Chart versions are processed in a pool of processes. Entries and versions are sorted,
+so that the same inputs always produce the same index. The charts delivered to the Web
+Catalog only are written to a separate index (unpublished-certified-charts.yaml).
+
+Note that the submission timestamp of charts isn't recorded in the charts/ tree, and is
+not set in the rebuilt index.
+
+Example:
+    rebuild-index --repository openshift-helm-charts/charts --json rebuild.json charts/
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import tarfile
+import time
+from datetime import datetime, timezone
+
+sys.path.append("../")
+from chartrepomanager import chartrepomanager
+from indexfile import helmindex, sidecar
+from owners import owners_file
+from report import report_info
+from tools import yamlio
+
+INDEX_FILE = "index.yaml"
+WEB_CATALOG_ONLY_INDEX_FILE = "unpublished-certified-charts.yaml"
+CHART_FILE = re.compile(r"^[^/]+/Chart\.yaml$")
+
+
+class RebuildError(Exception):
+    pass
+
+
+def find_chart_versions(charts_dir):
+    """Find all chart versions under the given directory.
+
+    Args:
+        charts_dir (str): The charts/ directory.
+
+    Returns:
+        list[str]: Sorted paths to the chart version directories, i.e.
+                   <charts_dir>/<category>/<organization>/<chart>/<version>.
+    """
+    version_dirs = []
+    for category in sorted(os.listdir(charts_dir)):
+        category_dir = os.path.join(charts_dir, category)
+        if not os.path.isdir(category_dir):
+            continue
+        for organization in sorted(os.listdir(category_dir)):
+            organization_dir = os.path.join(category_dir, organization)
+            if not os.path.isdir(organization_dir):
+                continue
+            for chart in sorted(os.listdir(organization_dir)):
+                chart_dir = os.path.join(organization_dir, chart)
+                if not os.path.isfile(os.path.join(chart_dir, "OWNERS")):
+                    continue
+                for version in sorted(os.listdir(chart_dir)):
+                    if os.path.isdir(os.path.join(chart_dir, version)):
+                        version_dirs.append(os.path.join(chart_dir, version))
+    return version_dirs
+
+
+def _find_file(paths):
+    for path in paths:
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+
+def _read_chart_yaml_from_tarball(tarball_path):
+    with tarfile.open(tarball_path) as tar:
+        for member in tar:
+            if CHART_FILE.match(member.name):
+                return yamlio.load(tar.extractfile(member))
+    raise RebuildError(f"No Chart.yaml in {tarball_path}")
+
+
+def _get_file_digest(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as fd:
+        for chunk in iter(lambda: fd.read(64 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def build_chart_entry(version_dir, repository, ocp_version_range, artifacts_dir=None):
+    """Build the index entry of a chart version.
+
+    Args:
+        version_dir (str): Path to the chart version directory in the charts/ tree.
+        repository (str): Name of the GitHub repository hosting the releases.
+        ocp_version_range (str): Range of supported OCP versions.
+        artifacts_dir (str): Directory holding the release artifacts, optional.
+
+    Returns:
+        (str, dict, bool): The name of the index entry, the chart entry, and whether
+                           the chart is delivered to the Web Catalog only.
+
+    Raises:
+        RebuildError: if the entry can't be built from the available files.
+    """
+    chart_dir, version = os.path.split(os.path.normpath(version_dir))
+    organization_dir, chart = os.path.split(chart_dir)
+    category_dir, organization = os.path.split(organization_dir)
+    charts_dir, category = os.path.split(category_dir)
+    release_tag = f"{organization}-{chart}-{version}"
+    release_dir = os.path.join(artifacts_dir, release_tag) if artifacts_dir else None
+    chart_file_name = f"{chart}-{version}.tgz"
+
+    try:
+        owner_data = owners_file.get_owner_data_from_file(
+            os.path.join(chart_dir, "OWNERS")
+        )
+    except owners_file.OwnersFileError as err:
+        raise RebuildError(f"Invalid OWNERS file for {chart}") from err
+    web_catalog_only = bool(owners_file.get_web_catalog_only(owner_data))
+
+    report_path = _find_file(
+        [
+            os.path.join(version_dir, "report.yaml"),
+            release_dir and os.path.join(release_dir, "report.yaml"),
+        ]
+    )
+    if report_path is None:
+        raise RebuildError(f"No report found for {release_tag}")
+
+    tarball_path = _find_file(
+        [
+            os.path.join(version_dir, chart_file_name),
+            release_dir and os.path.join(release_dir, chart_file_name),
+        ]
+    )
+    src_chart_path = os.path.join(version_dir, "src", "Chart.yaml")
+
+    if tarball_path or os.path.isfile(src_chart_path):
+        if tarball_path:
+            chart_entry = _read_chart_yaml_from_tarball(tarball_path)
+        else:
+            with open(src_chart_path) as fd:
+                chart_entry = yamlio.load(fd)
+        annotations = chartrepomanager.get_chart_annotations(
+            category, organization, chart, ocp_version_range, report_path, charts_dir
+        )
+        chart_entry["annotations"] = (
+            chart_entry.get("annotations") or {}
+        ) | annotations
+        chart_url = f"https://github.com/{repository}/releases/download/{release_tag}/{chart_file_name}"
+        if tarball_path and not web_catalog_only:
+            chart_entry["digest"] = _get_file_digest(tarball_path)
+        elif not web_catalog_only:
+            # The tarball packaged from the sources on release is not reproducible.
+            print(f"[WARNING] No tarball for {release_tag}, the digest is not set")
+    else:
+        chart_entry = chartrepomanager.create_index_from_report(
+            category, ocp_version_range, report_path
+        )
+        chart_url = report_info.get_report_chart_url(report_path)
+
+    if chart_entry.get("version") != version:
+        raise RebuildError(
+            f"Version {chart_entry.get('version')} doesn't match directory {version_dir}"
+        )
+    chart_entry["urls"] = [chart_url]
+    return chart, chart_entry, web_catalog_only
+
+
+def rebuild_chart_entry(version_dir, repository, ocp_version_range, artifacts_dir):
+    """Same as build_chart_entry, capturing its output and any failure.
+
+    Returns:
+        dict: The outcome, with the time it took in seconds and the output printed.
+    """
+    output = io.StringIO()
+    start = time.perf_counter()
+    result = {"path": version_dir, "entry": None, "chart": None, "error": None}
+    with contextlib.redirect_stdout(output):
+        try:
+            entry, chart_entry, web_catalog_only = build_chart_entry(
+                version_dir, repository, ocp_version_range, artifacts_dir
+            )
+            result.update(
+                entry=entry, chart=chart_entry, webCatalogOnly=web_catalog_only
+            )
+        except (Exception, SystemExit) as err:
+            # Also catches the SystemExit raised by report_info on failure.
+            result["error"] = f"{err!r}"
+    result["duration"] = round(time.perf_counter() - start, 6)
+    result["output"] = output.getvalue()
+    return result
+
+
+def _rebuild_chunk(version_dirs, repository, ocp_version_range, artifacts_dir):
+    return [
+        rebuild_chart_entry(version_dir, repository, ocp_version_range, artifacts_dir)
+        for version_dir in version_dirs
+    ]
+
+
+def rebuild_chart_entries(
+    version_dirs,
+    repository,
+    ocp_version_range,
+    artifacts_dir=None,
+    workers=None,
+    chunk_size=16,
+):
+    """Build the entries of chart versions in a pool of processes.
+
+    Args:
+        version_dirs (list[str]): Paths to the chart version directories.
+        repository (str): Name of the GitHub repository hosting the releases.
+        ocp_version_range (str): Range of supported OCP versions.
+        artifacts_dir (str): Directory holding the release artifacts, optional.
+        workers (int): Number of processes. Defaults to the number of CPUs.
+        chunk_size (int): Number of chart versions sent to a process at once.
+
+    Returns:
+        list[dict]: The outcome for each chart version (see rebuild_chart_entry), in
+                    the order of version_dirs.
+    """
+    chunks = [
+        version_dirs[i : i + chunk_size]
+        for i in range(0, len(version_dirs), chunk_size)
+    ]
+    args = (repository, ocp_version_range, artifacts_dir)
+    if workers == 1 or len(chunks) <= 1:
+        return _rebuild_chunk(version_dirs, *args)
+
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_rebuild_chunk, chunk, *args) for chunk in chunks]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def build_indexes(results, generated):
+    """Assemble the indexes from the chart entries, sorted by entry, then from the
+    highest to the lowest version, as Helm does.
+
+    Returns:
+        (dict, dict): The index and the Web Catalog only index.
+    """
+    entries = ({}, {})
+    for result in results:
+        if result["error"] is None:
+            charts = entries[result["webCatalogOnly"]].setdefault(result["entry"], [])
+            charts.append(result["chart"])
+
+    indexes = []
+    for index_entries in entries:
+        index = {"apiVersion": "v1", "entries": {}, "generated": generated}
+        for entry in sorted(index_entries):
+            charts = {chart["version"]: chart for chart in index_entries[entry]}
+            index["entries"][entry] = [
+                charts[version]
+                for version in helmindex.sort_versions(charts, reverse=True)
+            ]
+        indexes.append(index)
+    return tuple(indexes)
+
+
+def write_index(index_data, index_file):
+    """Write an index and its sidecar."""
+    index_text = yamlio.dump(index_data)
+    with open(index_file, "w") as fd:
+        fd.write(index_text)
+    sidecar.write_sidecar(
+        sidecar.build_sidecar(index_text, index_data),
+        sidecar.get_sidecar_path(index_file),
+    )
+
+
+def get_summary(results, duration):
+    """Summarize the rebuild, with the time spent on each entry."""
+    entries = {}
+    for result in results:
+        name = result["entry"] or os.path.basename(os.path.dirname(result["path"]))
+        entry = entries.setdefault(name, {"duration": 0, "versions": []})
+        entry["duration"] = round(entry["duration"] + result["duration"], 6)
+        entry["versions"].append(
+            {
+                "path": result["path"],
+                "duration": result["duration"],
+                "error": result["error"],
+            }
+        )
+    return {
+        "total": len(results),
+        "failed": sum(1 for result in results if result["error"]),
+        "duration": round(duration, 6),
+        "entries": entries,
+    }
+
+
+def _get_generated():
+    # Honor SOURCE_DATE_EPOCH, for reproducible builds
+    source_date_epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if source_date_epoch:
+        now = datetime.fromtimestamp(int(source_date_epoch), timezone.utc)
+    else:
+        now = datetime.now(timezone.utc)
+    return now.astimezone().isoformat()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "charts_dir",
+        nargs="?",
+        default="charts",
+        help="the charts/ directory of a local checkout (default: charts)",
+    )
+    parser.add_argument(
+        "-r",
+        "--repository",
+        required=True,
+        help="name of the GitHub repository hosting the releases",
+    )
+    parser.add_argument(
+        "--ocp-version-range",
+        default=os.environ.get("OCP_VERSION_RANGE", "N/A"),
+        help="range of supported OCP versions (default: $OCP_VERSION_RANGE)",
+    )
+    parser.add_argument(
+        "-a", "--artifacts-dir", help="directory holding the release artifacts"
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        default=".",
+        help="directory to write the index files to (default: .)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of processes (default: number of CPUs)",
+    )
+    parser.add_argument("--json", dest="json_path", help="write a JSON summary")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    version_dirs = find_chart_versions(args.charts_dir)
+    print(f"[INFO] Rebuilding {len(version_dirs)} chart versions in {args.charts_dir}")
+    results = rebuild_chart_entries(
+        version_dirs,
+        args.repository,
+        args.ocp_version_range,
+        args.artifacts_dir,
+        args.workers,
+    )
+    index, web_catalog_only_index = build_indexes(results, _get_generated())
+    write_index(index, os.path.join(args.output_dir, INDEX_FILE))
+    write_index(
+        web_catalog_only_index,
+        os.path.join(args.output_dir, WEB_CATALOG_ONLY_INDEX_FILE),
+    )
+    summary = get_summary(results, time.perf_counter() - start)
+
+    for result in results:
+        if result["error"]:
+            print(f"[ERROR] {result['path']}: {result['error']}")
+    print(
+        f"[INFO] {summary['total'] - summary['failed']}/{summary['total']} chart versions rebuilt ({summary['duration']:.2f}s)"
+    )
+
+    if args.json_path:
+        with open(args.json_path, "w") as fd:
+            json.dump(summary, fd, indent=2)
+
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
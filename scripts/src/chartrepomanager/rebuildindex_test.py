@@ -0,0 +1,82 @@
+import hashlib
+import os
+import shutil
+
+import pytest
+import yaml
+
+from chartrepomanager import rebuildindex
+
+TEST_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tests", "data"
+)
+
+
+@pytest.fixture(autouse=True)
+def native_report_info(monkeypatch, tmp_path):
+    monkeypatch.setenv("REPORT_INFO_BACKEND", "native")
+    monkeypatch.setenv("REPORT_INFO_CACHE_DIR", str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def charts_dir(tmp_path):
+    chart_dir = tmp_path / "charts" / "partners" / "hashicorp" / "vault"
+    (chart_dir / "0.17.0").mkdir(parents=True)
+    (chart_dir / "0.18.0").mkdir()
+    (chart_dir / "OWNERS").write_text(
+        yaml.dump({"chart": {"name": "vault"}, "vendor": {"name": "HashiCorp"}})
+    )
+    shutil.copy(
+        os.path.join(TEST_DATA_DIR, "common", "partner", "report.yaml"),
+        chart_dir / "0.17.0",
+    )
+    shutil.copy(os.path.join(TEST_DATA_DIR, "vault-0.17.0.tgz"), chart_dir / "0.17.0")
+    return str(tmp_path / "charts")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_rebuild_chart_entries(charts_dir, workers):
+    version_dirs = rebuildindex.find_chart_versions(charts_dir)
+    assert [os.path.relpath(path, charts_dir) for path in version_dirs] == [
+        "partners/hashicorp/vault/0.17.0",
+        "partners/hashicorp/vault/0.18.0",
+    ]
+
+    results = rebuildindex.rebuild_chart_entries(
+        version_dirs, "org/repo", ">=4.2", workers=workers, chunk_size=1
+    )
+
+    assert [result["path"] for result in results] == version_dirs
+    assert "No report found for hashicorp-vault-0.18.0" in results[1]["error"]
+    assert results[0]["error"] is None
+    chart = results[0]["chart"]
+    assert chart["version"] == "0.17.0"
+    assert chart["urls"] == [
+        "https://github.com/org/repo/releases/download/hashicorp-vault-0.17.0/vault-0.17.0.tgz"
+    ]
+    with open(os.path.join(version_dirs[0], "vault-0.17.0.tgz"), "rb") as fd:
+        assert chart["digest"] == hashlib.sha256(fd.read()).hexdigest()
+    assert chart["annotations"]["charts.openshift.io/providerType"] == "partner"
+    assert chart["annotations"]["charts.openshift.io/provider"] == "HashiCorp"
+
+
+def test_build_indexes_is_sorted():
+    def result(entry, version):
+        return {
+            "entry": entry,
+            "chart": {"version": version},
+            "webCatalogOnly": False,
+            "error": None,
+        }
+
+    index, web_catalog_only_index = rebuildindex.build_indexes(
+        [result("b", "1.0.0"), result("a", "1.10.0"), result("a", "1.9.0")],
+        "2024-01-01T00:00:00Z",
+    )
+
+    assert list(index["entries"]) == ["a", "b"]
+    assert [chart["version"] for chart in index["entries"]["a"]] == [
+        "1.10.0",
+        "1.9.0",
+    ]
+    assert web_catalog_only_index["entries"] == {}
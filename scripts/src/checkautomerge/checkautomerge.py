@@ -1,34 +1,68 @@
 import argparse
-import os
 import sys
-import time
 
 import requests
 
+sys.path.append("../")
+from tools import githubclient, waiter
 
-def ensure_pull_request_not_merged(api_url):
-    # api_url https://api.github.com/repos/<organization-name>/<repository-name>/pulls/1
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "Authorization": f'Bearer {os.environ.get("BOT_TOKEN")}',
-    }
-    merged = False
-    for i in range(20):
-        r = requests.get(api_url, headers=headers)
-        response_content = r.json()
-        if "message" in response_content:
-            print(f'[ERROR] merge status: {response_content["message"]}')
+DEFAULT_TIMEOUT = 200
+
+
+class MergeStateError(Exception):
+    pass
+
+
+def get_merge_state_poller(api_url):
+    """Get a function returning whether the PR at api_url is merged.
+
+    The PR is polled through the response cache of the client: once it has been
+    fetched, GitHub answers 304 Not Modified for as long as it doesn't change, without
+    sending the PR again or counting the request against the rate limit. The client
+    doesn't retry, the wait does.
+
+    Raises:
+        MergeStateError: if the PR cannot be retrieved for now (5XX or 429 response).
+        SystemExit: if the PR cannot be retrieved at all (other 4XX responses).
+    """
+
+    def is_merged():
+        response = githubclient.get_client().get(api_url, max_retries=0)
+        if response.status_code >= 500 or response.status_code == 429:
+            raise MergeStateError(
+                f"unexpected response: {response.status_code} {response.reason}"
+            )
+        if response.status_code != 200:
+            print(
+                f"[ERROR] merge status: {response.status_code} {response.reason}: {get_message(response)}"
+            )
             sys.exit(1)
+        return response.json().get("merged", False)
+
+    return is_merged
 
-        if response_content["merged"]:
-            merged = True
-            break
 
-        time.sleep(10)
+def get_message(response):
+    """Get the error message of an API response."""
+    try:
+        return response.json()["message"]
+    except (ValueError, KeyError, TypeError):
+        return response.text
 
-    if not merged:
-        print("[ERROR] Pull request not merged")
+
+def ensure_pull_request_not_merged(api_url, timeout=DEFAULT_TIMEOUT):
+    # api_url https://api.github.com/repos/<organization-name>/<repository-name>/pulls/1
+    result = waiter.wait_for(
+        get_merge_state_poller(api_url),
+        timeout,
+        retry_on=(MergeStateError, requests.RequestException, ValueError),
+    )
+    if not result.done:
+        if result.errors:
+            print(f"[ERROR] merge status: {result.errors[-1]}")
+        print(f"[ERROR] Pull request not merged ({result.get_summary()})")
         sys.exit(1)
+    print(f"[INFO] Pull request merged ({result.get_summary()})")
 
 
 def main():
@@ -41,5 +75,13 @@ def main():
         required=True,
         help="API URL for the pull request",
     )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        dest="timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="Time in seconds to wait for the pull request to be merged",
+    )
     args = parser.parse_args()
-    ensure_pull_request_not_merged(args.api_url)
+    ensure_pull_request_not_merged(args.api_url, args.timeout)
@@ -0,0 +1,49 @@
+import pytest
+import responses
+
+from checkautomerge import checkautomerge
+from tools import githubcache, githubclient
+
+api_url = "https://api.github.com/repos/org/repo/pulls/42"
+
+
+@pytest.fixture(autouse=True)
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(checkautomerge.waiter.time, "sleep", lambda delay: None)
+    monkeypatch.setattr(githubclient.time, "sleep", lambda delay: None)
+    cache = githubcache.ResponseCache(str(tmp_path), 1024 * 1024)
+    monkeypatch.setattr(githubclient, "_client", githubclient.GitHubClient(cache=cache))
+
+
+@responses.activate
+def test_merge_state_is_polled_conditionally(capsys):
+    responses.get(api_url, json={"merged": False}, headers={"ETag": '"v1"'})
+    responses.get(api_url, status=502)
+    responses.get(api_url, status=304)
+    responses.get(api_url, json={"merged": True}, headers={"ETag": '"v2"'})
+
+    checkautomerge.ensure_pull_request_not_merged(api_url)
+
+    # The client doesn't retry the 502 on its own, the wait does.
+    assert len(responses.calls) == 4
+    assert responses.calls[2].request.headers["If-None-Match"] == '"v1"'
+    assert "[INFO] Pull request merged (4 checks" in capsys.readouterr().out
+
+
+@responses.activate
+def test_not_merged_before_timeout():
+    responses.get(api_url, json={"merged": False})
+
+    with pytest.raises(SystemExit):
+        checkautomerge.ensure_pull_request_not_merged(api_url, timeout=0)
+
+
+@responses.activate
+def test_client_errors_are_not_retried(capsys):
+    responses.get(api_url, status=404, json={"message": "Not Found"})
+
+    with pytest.raises(SystemExit):
+        checkautomerge.ensure_pull_request_not_merged(api_url)
+
+    assert len(responses.calls) == 1
+    assert "[ERROR] merge status: 404 Not Found: Not Found" in capsys.readouterr().out
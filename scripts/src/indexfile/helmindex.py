@@ -0,0 +1,169 @@
+"""Indexed view of a Helm repository index (index.yaml).
+
+The index content is kept as loaded, so that it can be written back as is, and is
+indexed at load time to provide constant time lookups by chart entry and version, and
+by tarball name ("<entry>-<version>"). Adding, replacing or removing a version only
+updates the list of versions of the corresponding entry.
+
+Storage is kept compact for large indexes: the only structure built at load time maps
+each entry to its versions, sharing the charts with the index content. Versions are
+parsed when the latest version of an entry is first needed, and only the result is
+kept. Tarball names are looked up by splitting them rather than through a map of
+their own.
+"""
+
+import semantic_version
+
+
+class MalformedIndexError(Exception):
+    pass
+
+
+def parse_version(version):
+    """Parse a chart version into a key suitable for ordering versions.
+
+    Args:
+        version (str): The chart version, with or without a leading "v".
+
+    Returns:
+        semantic_version.Version: The parsed version, or None if the version is not
+                                  valid. Invalid versions are ordered first.
+    """
+    try:
+        return semantic_version.Version.coerce(str(version).removeprefix("v"))
+    except ValueError:
+        return None
+
+
+_NO_VERSION = semantic_version.Version("0.0.0")
+
+
+def _version_order(version_key):
+    # Ordering key for the result of parse_version, with invalid versions first.
+    return (version_key is not None, version_key or _NO_VERSION)
+
+
+def sort_versions(versions, reverse=False):
+    """Sort chart versions by semantic version, invalid versions first."""
+    return sorted(
+        versions,
+        key=lambda version: _version_order(parse_version(version)),
+        reverse=reverse,
+    )
+
+
+class HelmIndex:
+    """A Helm repository index, indexed by entry and version.
+
+    Args:
+        data (dict): The content of index.yaml. It is updated in place when versions
+            are added or removed, and is available as the data attribute.
+
+    Raises:
+        MalformedIndexError: if data is not a valid index.
+    """
+
+    def __init__(self, data):
+        if not isinstance(data, dict) or "entries" not in data:
+            raise MalformedIndexError(f"Malformed index {data}")
+        if data["entries"] is None:
+            data["entries"] = {}
+        self.data = data
+
+        # {entry: {version: chart}}, the charts being shared with data
+        self._entries = {}
+        # {entry: version}, computed on demand
+        self._latest = {}
+
+        for entry, charts in data["entries"].items():
+            versions = self._entries[entry] = {}
+            for chart in charts or []:
+                # Only the first occurence of a version is taken into account.
+                versions.setdefault(chart["version"], chart)
+
+    def _update_entry(self, entry):
+        self._latest.pop(entry, None)
+        if self._entries[entry]:
+            self.data["entries"][entry] = list(self._entries[entry].values())
+        else:
+            del self._entries[entry]
+            del self.data["entries"][entry]
+
+    def entries(self):
+        """Get the names of the entries of the index."""
+        return list(self._entries)
+
+    def versions(self, entry):
+        """Get the versions of an entry, in index order."""
+        return list(self._entries.get(entry, {}))
+
+    def charts(self):
+        """Iterate over all (entry, chart) pairs, in index order."""
+        for entry, versions in self._entries.items():
+            for chart in versions.values():
+                yield entry, chart
+
+    def has_version(self, entry, version):
+        return version in self._entries.get(entry, {})
+
+    def get(self, entry, version):
+        """Get the chart for the given version of an entry, or None if not present."""
+        return self._entries.get(entry, {}).get(version)
+
+    def find_tarball(self, tar_name):
+        """Find a chart by tarball name, i.e. "<entry>-<version>".
+
+        If several charts have the same tarball name, the one of the entry that comes
+        first in the index is returned.
+
+        Returns:
+            (str, dict): The entry and the chart, or (None, None) if not found.
+        """
+        found = []
+        separator = tar_name.find("-")
+        while separator != -1:
+            entry, version = tar_name[:separator], tar_name[separator + 1 :]
+            if self.has_version(entry, version):
+                found.append(entry)
+            separator = tar_name.find("-", separator + 1)
+        if not found:
+            return None, None
+        if len(found) > 1:
+            order = {entry: position for position, entry in enumerate(self._entries)}
+            found.sort(key=order.__getitem__)
+        entry = found[0]
+        return entry, self.get(entry, tar_name[len(entry) + 1 :])
+
+    def latest(self, entry):
+        """Get the chart with the highest version for an entry, or None."""
+        if entry not in self._entries:
+            return None
+        if entry not in self._latest:
+            self._latest[entry] = max(
+                self._entries[entry],
+                key=lambda version: _version_order(parse_version(version)),
+            )
+        return self._entries[entry][self._latest[entry]]
+
+    def add(self, entry, chart):
+        """Add a chart version to an entry, replacing the existing one if any.
+
+        The chart is appended after the other versions of the entry.
+        """
+        versions = self._entries.setdefault(entry, {})
+        # Replaced versions are moved last
+        versions.pop(chart["version"], None)
+        versions[chart["version"]] = chart
+        self._update_entry(entry)
+
+    def remove(self, entry, version):
+        """Remove a chart version from an entry. Empty entries are removed.
+
+        Returns:
+            dict: The removed chart, or None if the version was not present.
+        """
+        if not self.has_version(entry, version):
+            return None
+        chart = self._entries[entry].pop(version)
+        self._update_entry(entry)
+        return chart
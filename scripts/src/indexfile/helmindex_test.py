@@ -0,0 +1,84 @@
+import pytest
+
+from indexfile import helmindex
+
+
+def create_index():
+    return {
+        "apiVersion": "v1",
+        "entries": {
+            "acme-awesome": [
+                {"name": "awesome", "version": "1.10.0"},
+                {"name": "awesome", "version": "v1.9.0"},
+                {"name": "awesome", "version": "not-semver"},
+            ],
+            "acme-awesome-1.10": [{"name": "awesome-1.10", "version": "0.1.0"}],
+        },
+    }
+
+
+def test_lookups():
+    index = helmindex.HelmIndex(create_index())
+
+    assert index.entries() == ["acme-awesome", "acme-awesome-1.10"]
+    assert index.versions("acme-awesome") == ["1.10.0", "v1.9.0", "not-semver"]
+    assert index.has_version("acme-awesome", "v1.9.0")
+    assert not index.has_version("acme-awesome", "1.9.0")
+    assert index.get("unknown", "1.10.0") is None
+    assert index.latest("acme-awesome")["version"] == "1.10.0"
+    assert index.latest("unknown") is None
+
+    entry, chart = index.find_tarball("acme-awesome-1.10-0.1.0")
+    assert entry == "acme-awesome-1.10"
+    assert chart["name"] == "awesome-1.10"
+    assert index.find_tarball("acme-awesome-2.0.0") == (None, None)
+
+
+def test_find_tarball_ambiguous_name():
+    data = create_index()
+    data["entries"]["acme"] = [{"name": "acme", "version": "awesome-1.10.0"}]
+    index = helmindex.HelmIndex(data)
+
+    # The entry first in the index wins
+    entry, chart = index.find_tarball("acme-awesome-1.10.0")
+    assert (entry, chart["version"]) == ("acme-awesome", "1.10.0")
+
+
+def test_add_and_remove_update_data():
+    data = create_index()
+    index = helmindex.HelmIndex(data)
+
+    index.add("acme-awesome", {"name": "awesome", "version": "2.0.0"})
+    assert index.latest("acme-awesome")["version"] == "2.0.0"
+    assert index.find_tarball("acme-awesome-2.0.0")[0] == "acme-awesome"
+
+    # Replaced versions are moved last
+    index.add("acme-awesome", {"name": "awesome", "version": "1.10.0", "new": True})
+    assert [c["version"] for c in data["entries"]["acme-awesome"]] == [
+        "v1.9.0",
+        "not-semver",
+        "2.0.0",
+        "1.10.0",
+    ]
+    assert index.get("acme-awesome", "1.10.0")["new"]
+
+    assert index.remove("acme-awesome", "2.0.0")["version"] == "2.0.0"
+    assert index.remove("acme-awesome", "2.0.0") is None
+    assert index.latest("acme-awesome")["version"] == "1.10.0"
+
+    index.remove("acme-awesome-1.10", "0.1.0")
+    assert "acme-awesome-1.10" not in data["entries"]
+
+    index.add("acme-new", {"name": "new", "version": "0.0.1"})
+    assert data["entries"]["acme-new"] == [{"name": "new", "version": "0.0.1"}]
+
+
+@pytest.mark.parametrize("data", [{}, None, {"apiVersion": "v1"}])
+def test_malformed_index(data):
+    with pytest.raises(helmindex.MalformedIndexError):
+        helmindex.HelmIndex(data)
+
+
+def test_empty_entries():
+    index = helmindex.HelmIndex({"apiVersion": "v1", "entries": None})
+    assert index.entries() == []
@@ -0,0 +1,150 @@
+"""Benchmark the code paths reading and writing the Helm repository index.
+
+For each synthetic index (see synthetic), parameterized by number of entries,
+versions per entry and annotation size, times:
+
+* parse: loading the index as updateindex.download_index does, from the YAML text
+  and from its sidecar.
+* lookup: Chart.check_index, from the index content and from a HelmIndex.
+* latest: indexfile.get_charts_info and get_latest_charts.
+* update: updateindex.update_index adding a version to an entry.
+* serialize: updateindex.write_index_file, which also writes the sidecar.
+
+Downloads are not measured: the index is loaded from memory.
+
+Example:
+    python -m indexfile.index_benchmark --indexes 100x10x200,1000x10x200 --json out.json
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append("../")
+from indexfile import helmindex, index, sidecar, synthetic
+from submission import submission
+from tools import yamlio
+from updateindex import updateindex
+
+DEFAULT_INDEXES = "100x10x200,1000x10x200,1000x10x2000,5000x10x200"
+
+
+def parse_index_spec(spec):
+    """Parse an index specification, i.e. "<entries>x<versions per entry>x<annotation
+    size>".
+
+    Returns:
+        dict: The arguments of synthetic.generate_index.
+    """
+    entries, versions_per_entry, annotation_size = (int(n) for n in spec.split("x"))
+    return {
+        "entries": entries,
+        "versions_per_entry": versions_per_entry,
+        "annotation_size": annotation_size,
+    }
+
+
+def _time(func, repeat, setup=None):
+    durations = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(*args)
+            durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def benchmark_index(entries, versions_per_entry, annotation_size, repeat=3):
+    """Time the index code paths on a synthetic index.
+
+    Returns:
+        dict: The parameters and size of the index, and the median time in seconds of
+              each operation.
+    """
+    index_data = synthetic.generate_index(entries, versions_per_entry, annotation_size)
+    index_text = yamlio.dump(index_data)
+    sidecar_text = sidecar.dump_sidecar(sidecar.build_sidecar(index_text, index_data))
+    entry_name = list(index_data["entries"])[entries // 2]
+    chart_name = entry_name.split("-", 1)[1]
+    new_chart = synthetic.generate_chart(entry_name, chart_name, "2.0.0")
+
+    chart = submission.Chart()
+    chart.register_chart_info("partners", "provider", entry_name, "2.0.0")
+
+    def set_index():
+        # get_charts_info and get_latest_charts read the index cached by indexfile.index
+        index._index = helmindex.HelmIndex(index_data)
+        return ()
+
+    def update(data):
+        updateindex.update_index(
+            data, "2.0.0", "https://example.com", copy.deepcopy(new_chart), True
+        )
+
+    os.environ["CHART_ENTRY_NAME"] = entry_name
+    result = {
+        "yaml_backend": yamlio.get_backend(),
+        "entries": entries,
+        "versions_per_entry": versions_per_entry,
+        "annotation_size": annotation_size,
+        "size_mb": round(len(index_text) / 1e6, 2),
+        "parse_yaml_s": _time(lambda: updateindex._load_index(index_text), repeat),
+        "parse_sidecar_s": _time(
+            lambda: updateindex._load_index(index_text, sidecar_text), repeat
+        ),
+        "lookup_s": _time(lambda: chart.check_index(index_data), repeat),
+        "lookup_helmindex_s": _time(
+            lambda helm_index: chart.check_index(helm_index),
+            repeat,
+            lambda: (helmindex.HelmIndex(index_data),),
+        ),
+        "charts_info_s": _time(index.get_charts_info, repeat, set_index),
+        "latest_charts_s": _time(index.get_latest_charts, repeat, set_index),
+        "update_s": _time(update, repeat, lambda: (copy.deepcopy(index_data),)),
+    }
+    index._index = None
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result["serialize_s"] = _time(
+            lambda: updateindex.write_index_file(
+                index_data, os.path.join(tmp_dir, "index.yaml")
+            ),
+            repeat,
+        )
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--indexes",
+        default=DEFAULT_INDEXES,
+        help="comma separated synthetic indexes, as <entries>x<versions per entry>x"
+        f"<annotation size> (default: {DEFAULT_INDEXES})",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measure")
+    parser.add_argument("--json", dest="json_path", help="write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for spec in args.indexes.split(","):
+        result = benchmark_index(**parse_index_spec(spec), repeat=args.repeat)
+        print(json.dumps(result))
+        results.append(result)
+
+    if args.json_path:
+        with open(args.json_path, "w") as fd:
+            json.dump(results, fd, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import pytest
+import responses
+
+from indexfile import index, sidecar
+
+index_yaml = """
+apiVersion: v1
+entries:
+  acme-awesome:
+  - name: awesome
+    version: 1.42.0
+    annotations:
+      charts.openshift.io/provider: ACME
+      charts.openshift.io/providerType: partner
+  - name: awesome
+    version: 1.43.0
+    annotations:
+      charts.openshift.io/provider: ACME
+      charts.openshift.io/providerType: partner
+  redhat-awesome:
+  - name: awesome
+    version: 0.1.0
+    annotations:
+      charts.openshift.io/provider: Red Hat
+      charts.openshift.io/providerType: redhat
+"""
+
+
+@pytest.fixture
+def index_requests(monkeypatch, tmp_path):
+    monkeypatch.setenv("INDEX_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("GITHUB_RAW_URL", raising=False)
+    monkeypatch.setattr(index, "_index", None)
+    with responses.RequestsMock() as mock:
+        mock.get(index.INDEX_FILE, body=index_yaml)
+        mock.get(sidecar.get_sidecar_path(index.INDEX_FILE), status=404)
+        yield mock
+
+
+def test_get_chart_info_downloads_index_once(index_requests):
+    assert index.get_chart_info("acme-awesome-1.43.0") == (
+        "partner",
+        "ACME",
+        "awesome",
+        "1.43.0",
+    )
+    assert index.get_chart_info("redhat-awesome-0.1.0")[1] == "Red Hat"
+    assert index.get_chart_info("acme-awesome-2.0.0") == ("", "", "", "")
+    assert len(index.get_charts_info()) == 3
+
+    assert [call.request.url for call in index_requests.calls] == [
+        index.INDEX_FILE,
+        sidecar.get_sidecar_path(index.INDEX_FILE),
+    ]
+
+
+def test_get_latest_charts(index_requests):
+    latest_charts = index.get_latest_charts()
+
+    assert [(c["provider"], c["version"]) for c in latest_charts] == [
+        ("acme", "1.43.0"),
+        ("redhat", "0.1.0"),
+    ]
+
+
+def test_get_index_url(monkeypatch):
+    monkeypatch.delenv("GITHUB_RAW_URL", raising=False)
+    assert index.get_index_url() == index.INDEX_FILE
+
+    monkeypatch.setenv("GITHUB_RAW_URL", "http://localhost:8080/raw")
+    assert (
+        index.get_index_url()
+        == "http://localhost:8080/raw/openshift-helm-charts/charts/gh-pages/index.yaml"
+    )
@@ -0,0 +1,223 @@
+"""Download Helm repository index files through a local cache.
+
+The content of downloaded index files (index.yaml and its sidecar, see sidecar) is
+persisted on disk along with the validators of the response (ETag and Last-Modified).
+Later downloads of the same URL are conditional: if the server answers 304 Not
+Modified, the cached content is used without transferring it again.
+
+Optionally, a cached file more recent than a maximum age is used without any request.
+This is only suitable for read-only consumers that can tolerate a slightly outdated
+index: updateindex always revalidates, as it writes back the index it downloads.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+
+import requests
+
+sys.path.append("../")
+from indexfile import sidecar
+
+TIMEOUT = 60
+
+
+@dataclass
+class IndexFile:
+    """Outcome of the download of an index file.
+
+    Attributes:
+        url (str): The requested URL.
+        status_code (int): HTTP status code of the response, 200 if the content was
+            found in the cache.
+        reason (str): HTTP reason phrase of the response.
+        text (str): The content of the file. Set to None if the request failed.
+        cached (bool): Whether the content comes from the cache.
+    """
+
+    url: str
+    status_code: int
+    reason: str
+    text: str = None
+    cached: bool = False
+
+    @property
+    def ok(self):
+        return self.status_code == 200
+
+
+class IndexCache:
+    """On-disk cache of index files, keyed by URL.
+
+    Each entry is made of two files: the content of the index file, and a JSON file
+    holding the validators of the response, the size of the content and the time it
+    was last downloaded or revalidated.
+
+    Args:
+        cache_dir (str): Directory in which the entries are stored.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _entry_path(self, url, suffix):
+        return os.path.join(
+            self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + suffix
+        )
+
+    def _write(self, path, content):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+            tmp_file.write(content)
+        os.replace(tmp_path, path)
+
+    def get(self, url):
+        """Get the cache entry for url, or None if there is none.
+
+        Returns:
+            (dict, str): The metadata of the entry and the cached content.
+        """
+        try:
+            with open(self._entry_path(url, ".json")) as fd:
+                entry = json.load(fd)
+            with open(self._entry_path(url, ".content"), encoding="utf-8") as fd:
+                text = fd.read()
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url or entry.get("size") != len(text):
+            return None
+        return entry, text
+
+    def put(self, url, entry, text):
+        """Store the cache entry for url."""
+        try:
+            self._write(self._entry_path(url, ".content"), text)
+            self.touch(url, dict(entry, size=len(text)))
+        except OSError as err:
+            print(f"[WARNING] Failed to cache {url} in {self.cache_dir}: {err}")
+
+    def touch(self, url, entry):
+        """Record that the cache entry for url was revalidated."""
+        try:
+            self._write(
+                self._entry_path(url, ".json"),
+                json.dumps(dict(entry, url=url, fetched_at=time.time())),
+            )
+        except OSError as err:
+            print(f"[WARNING] Failed to cache {url} in {self.cache_dir}: {err}")
+
+
+def get_index_cache():
+    """Get the cache configured by the environment.
+
+    INDEX_CACHE_DIR sets the location of the cache, set it to an empty string to
+    disable the cache.
+
+    Returns:
+        IndexCache: The cache, or None if disabled.
+    """
+    cache_dir = os.environ.get(
+        "INDEX_CACHE_DIR", os.path.join(tempfile.gettempdir(), "chart-index-cache")
+    )
+    if not cache_dir:
+        return None
+    return IndexCache(cache_dir)
+
+
+def get_max_age():
+    """Get the maximum age in seconds of cached index files that are used without
+    revalidation, set by INDEX_CACHE_MAX_AGE. Defaults to 0, i.e. always revalidate."""
+    return float(os.environ.get("INDEX_CACHE_MAX_AGE", 0))
+
+
+def _get_conditional_headers(entry):
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def fetch_index_file(url, cache=None, max_age=0, session=None, timeout=TIMEOUT):
+    """Download an index file, revalidating the cached copy if any.
+
+    Args:
+        url (str): URL of the file.
+        cache (IndexCache): Cache used to send a conditional request and to store the
+            downloaded content. Defaults to no cache.
+        max_age (float): Age in seconds under which a cached copy is used without
+            revalidation.
+        session (requests.Session): Session used to send the request. Defaults to the
+            requests module itself.
+        timeout (int): Timeout in seconds for connecting and for reading.
+
+    Returns:
+        IndexFile: The status and content of the file.
+
+    Raises:
+        requests.exceptions.RequestException: if the request cannot be sent.
+    """
+    http = session or requests
+    cached = cache.get(url) if cache else None
+    headers = {}
+    if cached:
+        entry, text = cached
+        if max_age and time.time() - entry.get("fetched_at", 0) < max_age:
+            print(f"[INFO] Using cached {url}")
+            return IndexFile(url, 200, "OK", text, cached=True)
+        headers = _get_conditional_headers(entry)
+
+    print(f"[INFO] Downloading {url}")
+    response = http.get(url, headers=headers, timeout=timeout)
+    if cached and response.status_code == 304:
+        print(f"[INFO] {url} is not modified, using cached copy")
+        cache.touch(url, entry)
+        return IndexFile(url, 200, "OK", text, cached=True)
+
+    index_file = IndexFile(url, response.status_code, response.reason)
+    if response.status_code == 200:
+        index_file.text = response.text
+        if cache:
+            entry = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            cache.put(url, entry, index_file.text)
+    return index_file
+
+
+def get_index_file(url, max_age=None, session=None):
+    """Same as fetch_index_file, with the cache and maximum age set by the environment.
+
+    Args:
+        url (str): URL of the file.
+        max_age (float): Overrides the maximum age set by the environment, see
+            get_max_age.
+        session (requests.Session): Session used to send the request.
+    """
+    if max_age is None:
+        max_age = get_max_age()
+    return fetch_index_file(url, get_index_cache(), max_age, session)
+
+
+def get_index_files(index_url, max_age=None, session=None):
+    """Download an index file and its sidecar, see get_index_file.
+
+    Returns:
+        (IndexFile, str): The index file and the content of its sidecar, None if the
+                          index or its sidecar could not be downloaded.
+    """
+    index_file = get_index_file(index_url, max_age, session)
+    sidecar_text = None
+    if index_file.ok:
+        sidecar_file = get_index_file(
+            sidecar.get_sidecar_path(index_url), max_age, session
+        )
+        sidecar_text = sidecar_file.text
+    return index_file, sidecar_text
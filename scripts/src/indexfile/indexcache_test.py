@@ -0,0 +1,90 @@
+import time
+
+import pytest
+import responses
+from responses import matchers
+
+from indexfile import indexcache
+
+index_url = "https://example.com/index.yaml"
+index_text = "apiVersion: v1\nentries: {}\n"
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setenv("INDEX_CACHE_DIR", str(tmp_path / "index"))
+    monkeypatch.delenv("INDEX_CACHE_MAX_AGE", raising=False)
+    return indexcache.get_index_cache()
+
+
+@responses.activate
+def test_not_modified_uses_cached_copy(cache):
+    responses.get(
+        index_url,
+        match=[matchers.header_matcher({"If-None-Match": '"v1"'}, strict_match=False)],
+        status=304,
+    )
+    responses.get(index_url, body=index_text, headers={"ETag": '"v1"'})
+
+    index_file = indexcache.get_index_file(index_url)
+    assert index_file.ok and not index_file.cached
+    assert index_file.text == index_text
+
+    index_file = indexcache.get_index_file(index_url)
+    assert index_file.ok and index_file.cached
+    assert index_file.text == index_text
+    assert [call.response.status_code for call in responses.calls] == [200, 304]
+
+
+@responses.activate
+def test_modified_replaces_cached_copy(cache):
+    cache.put(index_url, {"etag": '"v1"'}, "outdated")
+    responses.get(index_url, body=index_text, headers={"ETag": '"v2"'})
+
+    assert indexcache.get_index_file(index_url).text == index_text
+    entry, text = cache.get(index_url)
+    assert entry["etag"] == '"v2"'
+    assert text == index_text
+
+
+@responses.activate
+def test_max_age(cache, monkeypatch):
+    cache.put(index_url, {"etag": '"v1"'}, index_text)
+    monkeypatch.setenv("INDEX_CACHE_MAX_AGE", "60")
+
+    # Recent enough, no request is sent
+    assert indexcache.get_index_file(index_url).cached
+    assert len(responses.calls) == 0
+
+    # Revalidation can be forced
+    responses.get(index_url, status=304)
+    assert indexcache.get_index_file(index_url, max_age=0).cached
+    assert len(responses.calls) == 1
+
+    # Too old
+    monkeypatch.setattr(time, "time", lambda: 1e12)
+    assert indexcache.get_index_file(index_url).cached
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_not_found_and_sidecar(cache):
+    responses.get(index_url, status=404)
+
+    index_file, sidecar_text = indexcache.get_index_files(index_url)
+    assert not index_file.ok
+    assert index_file.text is None
+    assert sidecar_text is None
+    # The sidecar isn't requested if the index is missing
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_disabled_cache(monkeypatch):
+    monkeypatch.setenv("INDEX_CACHE_DIR", "")
+    responses.get(index_url, body=index_text, headers={"ETag": '"v1"'})
+
+    assert indexcache.get_index_cache() is None
+    indexcache.get_index_file(index_url)
+    indexcache.get_index_file(index_url)
+    assert "If-None-Match" not in responses.calls[1].request.headers
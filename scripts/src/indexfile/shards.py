@@ -0,0 +1,300 @@
+"""Per-entry shards of the Helm repository index, for targeted lookups.
+
+updateindex can maintain, next to index.yaml, one shard file per index entry and a
+manifest listing them:
+
+    index-shards/
+        manifest.json
+        entries/<entry name>.json
+
+Each shard is a minimal index holding a single entry, so it can be used wherever the
+whole index is expected (e.g. Chart.check_index):
+
+    {"apiVersion": "v1", "entries": {"<entry name>": [<chart version>, ...]}}
+
+The manifest maps each entry to its shard, along with the SHA-256 of the shard and
+the highest version of the entry. It also records the SHA-256 of the index.yaml it
+was generated from:
+
+    {
+        "formatVersion": 1,
+        "indexSha256": "<sha256 of index.yaml>",
+        "generated": "<generated timestamp of index.yaml>",
+        "entries": {
+            "<entry name>": {
+                "path": "entries/<entry name>.json",
+                "digest": "<sha256 of the shard>",
+                "latest": "<highest version>"
+            }
+        }
+    }
+
+Looking up the versions of one entry then only requires the manifest and one shard
+instead of parsing the whole index. index.yaml remains the file used by Helm clients,
+and the reference: shards are only used if the manifest was generated from its current
+content. For a remote index, this is checked with a HEAD request for index.yaml rather
+than by downloading it, see fetch_entry_index.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from urllib.parse import quote
+
+import requests
+
+sys.path.append("../")
+from indexfile import helmindex, indexcache
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+class ShardError(Exception):
+    pass
+
+
+def get_shards_dir(index_path):
+    """Get the path (or URL) of the shards of an index file, i.e. index-shards for
+    index.yaml."""
+    root, _ = os.path.splitext(index_path)
+    return f"{root}-shards"
+
+
+def get_shard_path(entry):
+    """Get the path of the shard of an entry, relative to the shards directory."""
+    return f"entries/{quote(entry, safe='')}.json"
+
+
+def _checksum(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _dump(data):
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+
+def build_shard(entry, charts):
+    """Build the content of the shard of an entry.
+
+    Returns:
+        (str, dict): The content of the shard and its manifest entry.
+    """
+    shard_text = _dump({"apiVersion": "v1", "entries": {entry: charts}})
+    versions = helmindex.sort_versions(chart["version"] for chart in charts)
+    manifest_entry = {
+        "path": get_shard_path(entry),
+        "digest": _checksum(shard_text),
+        "latest": versions[-1],
+    }
+    return shard_text, manifest_entry
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as fd:
+        fd.write(text)
+
+
+def _read_manifest(shards_dir):
+    try:
+        with open(os.path.join(shards_dir, MANIFEST_FILE)) as fd:
+            return load_manifest(fd.read())
+    except (OSError, ShardError):
+        return None
+
+
+def _write_entry(shards_dir, manifest, entry, charts):
+    if charts:
+        shard_text, manifest["entries"][entry] = build_shard(entry, charts)
+        _write(os.path.join(shards_dir, get_shard_path(entry)), shard_text)
+    else:
+        manifest["entries"].pop(entry, None)
+        try:
+            os.remove(os.path.join(shards_dir, get_shard_path(entry)))
+        except FileNotFoundError:
+            pass
+
+
+def write_shards(
+    index_data, index_text, shards_dir, previous_index_text=None, entry=None
+):
+    """Write the shards of an index and their manifest.
+
+    If entry is set and the manifest found in shards_dir was generated from
+    previous_index_text, only the shard of entry is rewritten. Otherwise all shards
+    are rewritten, and the ones of entries no longer in the index are removed.
+
+    Args:
+        index_data (dict): Content of the index.
+        index_text (str): index_data, as written to index.yaml.
+        shards_dir (str): Directory of the shards, see get_shards_dir.
+        previous_index_text (str): Content of index.yaml before the update.
+        entry (str): The only entry updated since previous_index_text.
+    """
+    entries = index_data.get("entries") or {}
+    manifest = _read_manifest(shards_dir)
+    if (
+        manifest is None
+        or entry is None
+        or previous_index_text is None
+        or manifest["indexSha256"] != _checksum(previous_index_text)
+    ):
+        print(f"[INFO] Writing all index shards to {shards_dir}")
+        previous_entries = manifest["entries"] if manifest else {}
+        manifest = {"formatVersion": FORMAT_VERSION, "entries": {}}
+        for name in previous_entries.keys() - entries.keys():
+            _write_entry(shards_dir, manifest, name, None)
+        for name, charts in entries.items():
+            _write_entry(shards_dir, manifest, name, charts)
+    else:
+        print(f"[INFO] Writing index shard of {entry} to {shards_dir}")
+        _write_entry(shards_dir, manifest, entry, entries.get(entry))
+
+    manifest["indexSha256"] = _checksum(index_text)
+    manifest["generated"] = index_data.get("generated")
+    manifest["entries"] = dict(sorted(manifest["entries"].items()))
+    _write(os.path.join(shards_dir, MANIFEST_FILE), _dump(manifest))
+
+
+def load_manifest(manifest_text):
+    """Load the manifest of the shards.
+
+    Raises:
+        ShardError: if the manifest is invalid.
+    """
+    try:
+        manifest = json.loads(manifest_text)
+    except ValueError as err:
+        raise ShardError(f"Invalid shards manifest: {err}") from err
+    if (
+        not isinstance(manifest, dict)
+        or manifest.get("formatVersion") != FORMAT_VERSION
+        or not isinstance(manifest.get("entries"), dict)
+    ):
+        raise ShardError("Unsupported shards manifest format")
+    return manifest
+
+
+def load_shard(manifest, entry, shard_text):
+    """Load the shard of an entry, checking it against the manifest.
+
+    Returns:
+        dict: The shard, i.e. an index holding only entry.
+
+    Raises:
+        ShardError: if the shard doesn't match the manifest.
+    """
+    if _checksum(shard_text) != manifest["entries"][entry]["digest"]:
+        raise ShardError(f"Digest of the shard of {entry} doesn't match the manifest")
+    return json.loads(shard_text)
+
+
+def _empty_index():
+    return {"apiVersion": "v1", "entries": {}}
+
+
+def _normalize_etag(etag):
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    return etag.strip('"')
+
+
+def _check_index_etag(index_url, index_sha256):
+    """Check that a remote index.yaml is the one the shards were generated from,
+    without downloading it.
+
+    A HEAD request gets the ETag of index.yaml. The index matches if its ETag is
+    index_sha256, for servers using the SHA-256 of the content as ETag, or if it is the
+    ETag of the copy of the index in the index cache and the checksum of that copy is
+    index_sha256.
+
+    Raises:
+        ShardError: if the index can't be checked or doesn't match.
+    """
+    try:
+        response = requests.head(
+            index_url, allow_redirects=True, timeout=indexcache.TIMEOUT
+        )
+    except requests.exceptions.RequestException as err:
+        raise ShardError(f"Failed to check {index_url}: {err}") from err
+    if not response.ok:
+        raise ShardError(f"Failed to check {index_url}: {response.reason}")
+
+    etag = _normalize_etag(response.headers.get("ETag", ""))
+    if etag and etag == index_sha256:
+        return
+    cache = indexcache.get_index_cache()
+    cached = cache.get(index_url) if cache else None
+    if cached:
+        entry, text = cached
+        if (
+            etag
+            and _normalize_etag(entry.get("etag") or "") == etag
+            and _checksum(text) == index_sha256
+        ):
+            return
+    raise ShardError(f"Shards at {get_shards_dir(index_url)} don't match {index_url}")
+
+
+def fetch_entry_index(index_url, entry, max_age=None):
+    """Download the shard of one entry of a remote index, see indexcache.
+
+    The shards are only used if their manifest was generated from the current content
+    of index.yaml, which is checked from its ETag (see _check_index_etag): index.yaml
+    itself is never downloaded.
+
+    Args:
+        index_url (str): URL of index.yaml.
+        entry (str): Name of the entry.
+        max_age (float): See indexcache.get_index_file.
+
+    Returns:
+        dict: An index holding only entry, with no entries if entry is not in the
+              index.
+
+    Raises:
+        ShardError: if the index has no shards, or they can't be used (e.g. they are
+            outdated or can't be checked). Callers are expected to fall back to the
+            whole index.
+    """
+    shards_url = get_shards_dir(index_url)
+    manifest_file = indexcache.get_index_file(f"{shards_url}/{MANIFEST_FILE}", max_age)
+    if not manifest_file.ok:
+        raise ShardError(f"No shards manifest for {index_url}")
+    manifest = load_manifest(manifest_file.text)
+    _check_index_etag(index_url, manifest.get("indexSha256"))
+    if entry not in manifest["entries"]:
+        return _empty_index()
+
+    shard_url = f"{shards_url}/{manifest['entries'][entry]['path']}"
+    shard_file = indexcache.get_index_file(shard_url, max_age)
+    if not shard_file.ok:
+        raise ShardError(f"Failed to download {shard_url}: {shard_file.reason}")
+    return load_shard(manifest, entry, shard_file.text)
+
+
+def load_entry_index(index_file, entry, index_text):
+    """Same as fetch_entry_index, for an index on disk.
+
+    Args:
+        index_file (str): Path of index.yaml.
+        entry (str): Name of the entry.
+        index_text (str): Content of index_file. The shards are only used if they were
+            generated from it.
+    """
+    shards_dir = get_shards_dir(index_file)
+    manifest = _read_manifest(shards_dir)
+    if manifest is None:
+        raise ShardError(f"No valid shards manifest in {shards_dir}")
+    if manifest["indexSha256"] != _checksum(index_text):
+        raise ShardError(f"Shards in {shards_dir} don't match {index_file}")
+    if entry not in manifest["entries"]:
+        return _empty_index()
+
+    try:
+        with open(os.path.join(shards_dir, manifest["entries"][entry]["path"])) as fd:
+            return load_shard(manifest, entry, fd.read())
+    except OSError as err:
+        raise ShardError(f"Failed to read the shard of {entry}: {err}") from err
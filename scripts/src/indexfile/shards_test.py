@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+
+import pytest
+import responses
+import yaml
+
+from indexfile import helmindex, indexcache, shards
+
+index_url = "https://example.com/index.yaml"
+
+
+@pytest.fixture
+def index_data():
+    entries = {}
+    for i in range(5):
+        entries[f"provider{i:03d}-chart{i:06d}"] = [
+            {"name": f"chart{i:06d}", "version": f"1.{v}.0", "digest": f"{i}-{v}"}
+            for v in range(3)
+        ]
+    return {"apiVersion": "v1", "entries": entries, "generated": "2024-01-01T00:00:00Z"}
+
+
+def read_tree(directory):
+    tree = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            with open(path) as fd:
+                tree[os.path.relpath(path, directory)] = fd.read()
+    return tree
+
+
+def test_incremental_update_matches_full_rewrite(index_data, tmp_path):
+    index_text = yaml.dump(index_data)
+    shards.write_shards(index_data, index_text, tmp_path / "incremental")
+
+    index = helmindex.HelmIndex(index_data)
+    index.add("provider001-chart000001", {"name": "chart000001", "version": "2.0.0"})
+    for version in index.versions("provider002-chart000002"):
+        index.remove("provider002-chart000002", version)
+    new_index_text = yaml.dump(index_data)
+
+    for entry in ["provider001-chart000001", "provider002-chart000002"]:
+        shards.write_shards(
+            index_data, new_index_text, tmp_path / "incremental", index_text, entry
+        )
+        index_text = new_index_text
+    shards.write_shards(index_data, new_index_text, tmp_path / "full")
+
+    tree = read_tree(tmp_path / "incremental")
+    assert tree == read_tree(tmp_path / "full")
+    assert "entries/provider002-chart000002.json" not in tree
+
+    manifest = json.loads(tree["manifest.json"])
+    assert manifest["entries"]["provider001-chart000001"]["latest"] == "2.0.0"
+    assert (
+        manifest["entries"]["provider000-chart000000"]["path"]
+        == "entries/provider000-chart000000.json"
+    )
+
+
+def test_load_entry_index(index_data, tmp_path):
+    index_file = tmp_path / "index.yaml"
+    index_text = yaml.dump(index_data)
+    index_file.write_text(index_text)
+    shards.write_shards(index_data, index_text, shards.get_shards_dir(index_file))
+
+    entry_index = shards.load_entry_index(
+        index_file, "provider003-chart000003", index_text
+    )
+    assert entry_index == {
+        "apiVersion": "v1",
+        "entries": {
+            "provider003-chart000003": index_data["entries"]["provider003-chart000003"]
+        },
+    }
+    assert shards.load_entry_index(index_file, "unknown", index_text)["entries"] == {}
+
+    with pytest.raises(shards.ShardError, match="don't match"):
+        shards.load_entry_index(index_file, "unknown", index_text + "\n")
+
+
+@responses.activate
+def test_fetch_entry_index(index_data, tmp_path, monkeypatch):
+    monkeypatch.setenv("INDEX_CACHE_DIR", "")
+    shards_dir = tmp_path / "index-shards"
+    index_text = yaml.dump(index_data)
+    index_sha256 = hashlib.sha256(index_text.encode("utf-8")).hexdigest()
+    shards.write_shards(index_data, index_text, shards_dir)
+    tree = read_tree(shards_dir)
+    for path, text in tree.items():
+        responses.get(f"https://example.com/index-shards/{path}", body=text)
+    responses.head(index_url, headers={"ETag": f'W/"{index_sha256}"'})
+
+    entry_index = shards.fetch_entry_index(index_url, "provider003-chart000003")
+    assert list(entry_index["entries"]) == ["provider003-chart000003"]
+    assert shards.fetch_entry_index(index_url, "unknown")["entries"] == {}
+    # Only the manifest and one shard were downloaded, index.yaml was only checked
+    assert [call.request.method for call in responses.calls] == [
+        "GET",
+        "HEAD",
+        "GET",
+        "GET",
+        "HEAD",
+    ]
+
+    # Outdated shards are not used
+    responses.replace(responses.HEAD, index_url, headers={"ETag": '"0123"'})
+    with pytest.raises(shards.ShardError, match="don't match"):
+        shards.fetch_entry_index(index_url, "provider003-chart000003")
+
+    # Nor shards that can't be checked
+    responses.replace(responses.HEAD, index_url)
+    with pytest.raises(shards.ShardError, match="don't match"):
+        shards.fetch_entry_index(index_url, "provider003-chart000003")
+
+
+@responses.activate
+def test_fetch_entry_index_cached_etag(index_data, tmp_path, monkeypatch):
+    """An opaque ETag is matched against the ETag of the cached index."""
+    monkeypatch.setenv("INDEX_CACHE_DIR", str(tmp_path / "cache"))
+    shards_dir = tmp_path / "index-shards"
+    index_text = yaml.dump(index_data)
+    shards.write_shards(index_data, index_text, shards_dir)
+    for path, text in read_tree(shards_dir).items():
+        responses.get(f"https://example.com/index-shards/{path}", body=text)
+    responses.head(index_url, headers={"ETag": '"abc"'})
+
+    with pytest.raises(shards.ShardError, match="don't match"):
+        shards.fetch_entry_index(index_url, "provider003-chart000003")
+
+    # Once index.yaml was downloaded by other means, its cached ETag is used
+    responses.get(index_url, body=index_text, headers={"ETag": '"abc"'})
+    indexcache.get_index_file(index_url)
+    entry_index = shards.fetch_entry_index(index_url, "provider003-chart000003")
+    assert list(entry_index["entries"]) == ["provider003-chart000003"]
+
+    # Unless index.yaml changed since then
+    responses.replace(responses.HEAD, index_url, headers={"ETag": '"def"'})
+    with pytest.raises(shards.ShardError, match="don't match"):
+        shards.fetch_entry_index(index_url, "provider003-chart000003")
+
+
+@responses.activate
+def test_fetch_entry_index_errors(monkeypatch):
+    monkeypatch.setenv("INDEX_CACHE_DIR", "")
+    manifest_url = "https://example.com/index-shards/manifest.json"
+    responses.get(manifest_url, status=404)
+    with pytest.raises(shards.ShardError, match="No shards manifest"):
+        shards.fetch_entry_index(index_url, "acme")
+
+    manifest = {
+        "formatVersion": 1,
+        "indexSha256": hashlib.sha256(b"entries: {}").hexdigest(),
+        "entries": {"acme": {"path": "entries/acme.json", "digest": "0"}},
+    }
+    responses.replace(responses.GET, manifest_url, json=manifest)
+    responses.head(index_url, headers={"ETag": manifest["indexSha256"]})
+    responses.get("https://example.com/index-shards/entries/acme.json", json={})
+    with pytest.raises(shards.ShardError, match="doesn't match the manifest"):
+        shards.fetch_entry_index(index_url, "acme")
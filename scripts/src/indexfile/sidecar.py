@@ -0,0 +1,167 @@
+"""JSON sidecar of the Helm repository index, for fast loading by our own tooling.
+
+updateindex publishes index.json next to index.yaml. It contains the same index
+content, the SHA-256 of the index.yaml it was generated from, and the list of versions
+of each entry, sorted from highest to lowest:
+
+    {
+        "formatVersion": 1,
+        "indexSha256": "<sha256 of index.yaml>",
+        "versions": {"<entry name>": ["<version>", ...], ...},
+        "index": {"apiVersion": "v1", "entries": {...}, "generated": "..."}
+    }
+
+Loading JSON is an order of magnitude faster than loading YAML, even with the C
+loader. Loaders only use the sidecar if its checksum matches the index.yaml they
+downloaded, and fall back to parsing index.yaml otherwise (e.g. the sidecar is missing,
+or index.yaml was updated by other means). Helm clients only use index.yaml.
+
+Unquoted timestamps, which YAML loads as dates and datetimes and JSON has no type for,
+are stored tagged with their ISO 8601 format, so that they are loaded back as dates and
+datetimes:
+
+    {"$timestamp": "2023-05-03T12:34:56+00:00"}
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import sys
+
+sys.path.append("../")
+from indexfile import helmindex
+from tools import yamlio
+
+FORMAT_VERSION = 1
+TIMESTAMP_TAG = "$timestamp"
+
+
+def get_sidecar_path(index_path):
+    """Get the path (or URL) of the sidecar of an index file, i.e. index.json for
+    index.yaml."""
+    root, _ = os.path.splitext(index_path)
+    return f"{root}.json"
+
+
+def get_checksum(index_text):
+    return hashlib.sha256(index_text.encode("utf-8")).hexdigest()
+
+
+def _sorted_versions(charts):
+    versions = dict.fromkeys(chart["version"] for chart in charts or [])
+    return helmindex.sort_versions(versions, reverse=True)
+
+
+def build_sidecar(index_text, index_data):
+    """Build the content of the sidecar.
+
+    Args:
+        index_text (str): Content of index.yaml.
+        index_data (dict): index_text, as loaded.
+
+    Returns:
+        dict: The content of the sidecar.
+    """
+    return {
+        "formatVersion": FORMAT_VERSION,
+        "indexSha256": get_checksum(index_text),
+        "versions": {
+            entry: _sorted_versions(charts)
+            for entry, charts in (index_data.get("entries") or {}).items()
+        },
+        "index": index_data,
+    }
+
+
+def update_sidecar(sidecar, index_text, entry):
+    """Update a sidecar after the versions of one entry were changed in index.yaml.
+
+    Args:
+        sidecar (dict): A sidecar whose "index" has been updated in place.
+        index_text (str): The new content of index.yaml.
+        entry (str): The entry that was updated.
+    """
+    sidecar["indexSha256"] = get_checksum(index_text)
+    charts = sidecar["index"]["entries"].get(entry)
+    if charts:
+        sidecar["versions"][entry] = _sorted_versions(charts)
+    else:
+        sidecar["versions"].pop(entry, None)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.date):
+        return {TIMESTAMP_TAG: value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_object(obj):
+    if len(obj) == 1 and TIMESTAMP_TAG in obj:
+        value = obj[TIMESTAMP_TAG]
+        if "T" in value:
+            return datetime.datetime.fromisoformat(value)
+        return datetime.date.fromisoformat(value)
+    return obj
+
+
+def dump_sidecar(sidecar):
+    return json.dumps(sidecar, separators=(",", ":"), default=_encode_value)
+
+
+def write_sidecar(sidecar, sidecar_file):
+    with open(sidecar_file, "w") as fd:
+        fd.write(dump_sidecar(sidecar))
+
+
+def load_sidecar(sidecar_text, index_text):
+    """Load a sidecar, if it matches index.yaml.
+
+    Args:
+        sidecar_text (str): Content of the sidecar, may be None.
+        index_text (str): Content of the index.yaml it should match.
+
+    Returns:
+        dict: The content of the sidecar, or None if it is missing, invalid or
+              doesn't match index_text.
+    """
+    if not sidecar_text:
+        return None
+    # Only decode the tagged timestamps if there are any, as it slows down loading.
+    object_hook = _decode_object if TIMESTAMP_TAG in sidecar_text else None
+    try:
+        sidecar = json.loads(sidecar_text, object_hook=object_hook)
+    except ValueError:
+        print("[WARNING] Ignoring invalid index sidecar")
+        return None
+    if (
+        not isinstance(sidecar, dict)
+        or sidecar.get("formatVersion") != FORMAT_VERSION
+        or not isinstance(sidecar.get("index"), dict)
+    ):
+        print("[WARNING] Ignoring index sidecar with unsupported format")
+        return None
+    if sidecar.get("indexSha256") != get_checksum(index_text):
+        print("[INFO] Index sidecar is out of date, ignoring it")
+        return None
+    return sidecar
+
+
+def load_index(index_text, sidecar_text=None, loader=yamlio.SafeLoader):
+    """Load the content of index.yaml, from its sidecar if it matches.
+
+    Args:
+        index_text (str): Content of index.yaml.
+        sidecar_text (str): Content of the sidecar, may be None.
+        loader: YAML loader used if the sidecar can't be used.
+
+    Returns:
+        dict: The content of the index.
+
+    Raises:
+        yaml.YAMLError: if the sidecar can't be used and index_text is not valid YAML.
+    """
+    sidecar = load_sidecar(sidecar_text, index_text)
+    if sidecar is not None:
+        return sidecar["index"]
+    return yamlio.load(index_text, loader)
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+import yaml
+
+from indexfile import helmindex, sidecar
+
+
+@pytest.fixture
+def index_text():
+    entries = {}
+    for i in range(3):
+        entries[f"provider{i:03d}-chart{i:06d}"] = [
+            {"name": f"chart{i:06d}", "version": version, "digest": f"{i}-{version}"}
+            for version in ("1.0.0", "1.1.0", "1.2.0")
+        ]
+    entries["provider000-chart000000"].append(
+        {"name": "chart000000", "version": "1.10.0", "digest": "0-1.10.0"}
+    )
+    return yaml.dump(
+        {"apiVersion": "v1", "entries": entries, "generated": "2024-01-01T00:00:00Z"}
+    )
+
+
+def test_get_sidecar_path():
+    assert sidecar.get_sidecar_path("index.yaml") == "index.json"
+    assert (
+        sidecar.get_sidecar_path("https://charts.openshift.io/index.yaml")
+        == "https://charts.openshift.io/index.json"
+    )
+
+
+def test_load_index_from_sidecar(index_text):
+    index_data = yaml.safe_load(index_text)
+    index_sidecar = sidecar.build_sidecar(index_text, index_data)
+    sidecar_text = sidecar.dump_sidecar(index_sidecar)
+
+    assert index_sidecar["versions"]["provider000-chart000000"] == [
+        "1.10.0",
+        "1.2.0",
+        "1.1.0",
+        "1.0.0",
+    ]
+    assert sidecar.load_index(index_text, sidecar_text) == index_data
+
+    # The sidecar is used as long as it matches index.yaml
+    index_sidecar["index"]["fromSidecar"] = True
+    sidecar_text = sidecar.dump_sidecar(index_sidecar)
+    assert sidecar.load_index(index_text, sidecar_text)["fromSidecar"]
+
+
+@pytest.mark.parametrize(
+    "sidecar_text",
+    [
+        None,
+        "",
+        "not json",
+        json.dumps({"formatVersion": 0, "indexSha256": "", "index": {}}),
+        json.dumps({"formatVersion": 1, "indexSha256": "stale", "index": {}}),
+    ],
+)
+def test_load_index_falls_back_to_yaml(index_text, sidecar_text):
+    assert sidecar.load_index(index_text, sidecar_text) == yaml.safe_load(index_text)
+
+
+def test_timestamps_round_trip():
+    # Unquoted timestamps are loaded by YAML as dates and datetimes
+    index_text = (
+        "apiVersion: v1\n"
+        "entries: {}\n"
+        "generated: 2023-05-03T12:34:56.123456Z\n"
+        "released: 2023-05-03\n"
+    )
+    index_data = yaml.safe_load(index_text)
+    sidecar_text = sidecar.dump_sidecar(sidecar.build_sidecar(index_text, index_data))
+
+    assert sidecar.load_index(index_text, sidecar_text) == index_data
+    assert yaml.dump(sidecar.load_index(index_text, sidecar_text)) == yaml.dump(
+        index_data
+    )
+
+
+def test_update_sidecar(index_text):
+    index_sidecar = sidecar.build_sidecar(index_text, yaml.safe_load(index_text))
+
+    index = helmindex.HelmIndex(index_sidecar["index"])
+    index.add("zzz-new", {"name": "new", "version": "0.1.0"})
+    index.remove("provider001-chart000001", "1.0.0")
+    new_index_text = yaml.dump(index.data)
+    sidecar.update_sidecar(index_sidecar, new_index_text, "zzz-new")
+    sidecar.update_sidecar(index_sidecar, new_index_text, "provider001-chart000001")
+
+    assert index_sidecar == sidecar.build_sidecar(
+        new_index_text, yaml.safe_load(new_index_text)
+    )
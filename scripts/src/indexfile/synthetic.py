@@ -0,0 +1,106 @@
+"""Generate synthetic Helm repository indexes, for benchmarks and tests.
+
+The generated charts have the same structure as the ones added to the index by
+updateindex, with random-looking but reproducible content.
+
+Example, to write a large index to disk:
+    python -m indexfile.synthetic --entries 5000 --versions-per-entry 10 index.yaml
+"""
+
+import argparse
+import hashlib
+import sys
+
+sys.path.append("../")
+from tools import yamlio
+
+
+def generate_chart(entry_name, chart_name, version, annotation_size=200):
+    """Generate an index entry for one chart version.
+
+    Args:
+        entry_name (str): Name of the index entry (e.g. "acme-awesome").
+        chart_name (str): Name of the chart (e.g. "awesome").
+        version (str): Version of the chart.
+        annotation_size (int): Approximate size in bytes of the free-form annotations.
+
+    Returns:
+        dict: The chart version, as found in index.yaml.
+    """
+    digest = hashlib.sha256(f"{entry_name}-{version}".encode("utf-8")).hexdigest()
+    provider = entry_name.removesuffix(f"-{chart_name}")
+    return {
+        "name": chart_name,
+        "version": version,
+        "apiVersion": "v2",
+        "appVersion": version,
+        "description": f"Synthetic chart {chart_name} " + "x" * annotation_size,
+        "digest": digest,
+        "kubeVersion": ">=1.20.0",
+        "created": "2024-01-01T00:00:00.000000000Z",
+        "urls": [
+            f"https://github.com/openshift-helm-charts/charts/releases/download/{entry_name}-{version}/{entry_name}-{version}.tgz"
+        ],
+        "annotations": {
+            "charts.openshift.io/name": chart_name,
+            "charts.openshift.io/provider": provider,
+            "charts.openshift.io/providerType": "partner",
+            "charts.openshift.io/digest": f"sha256:{digest}",
+            "charts.openshift.io/lastCertifiedTimestamp": "2024-01-01T00:00:00+00:00",
+            "charts.openshift.io/testedOpenShiftVersion": "4.14",
+            "charts.openshift.io/supportedOpenShiftVersions": ">=4.7",
+            "charts.openshift.io/submissionTimestamp": "2024-01-01T00:00:00+00:00",
+        },
+    }
+
+
+def generate_index(entries=100, versions_per_entry=10, annotation_size=200):
+    """Generate a Helm repository index.
+
+    Args:
+        entries (int): Number of index entries.
+        versions_per_entry (int): Number of chart versions per entry.
+        annotation_size (int): See generate_chart.
+
+    Returns:
+        dict: The content of the index.
+    """
+    index_entries = {}
+    for i in range(entries):
+        chart_name = f"chart{i:06d}"
+        entry_name = f"provider{i % 997:03d}-{chart_name}"
+        index_entries[entry_name] = [
+            generate_chart(entry_name, chart_name, f"1.{v}.0", annotation_size)
+            for v in range(versions_per_entry)
+        ]
+    return {
+        "apiVersion": "v1",
+        "entries": index_entries,
+        "generated": "2024-01-01T00:00:00+00:00",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("index_file", help="path of the index file to write")
+    parser.add_argument("--entries", type=int, default=100, help="number of entries")
+    parser.add_argument(
+        "--versions-per-entry", type=int, default=10, help="chart versions per entry"
+    )
+    parser.add_argument(
+        "--annotation-size",
+        type=int,
+        default=200,
+        help="approximate size in bytes of the free-form annotations",
+    )
+    args = parser.parse_args()
+
+    index_data = generate_index(
+        args.entries, args.versions_per_entry, args.annotation_size
+    )
+    with open(args.index_file, "w") as fd:
+        yamlio.dump(index_data, fd)
+
+
+if __name__ == "__main__":
+    main()
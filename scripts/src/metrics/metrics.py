@@ -1,11 +1,9 @@
 import argparse
-import itertools
 import os
 import re
 import sys
 
 import analytics
-import requests
 from github import Github
 
 sys.path.append("../")
@@ -14,6 +12,7 @@ from collections import OrderedDict
 from indexfile import index
 from pullrequest import prepare_pr_comment as pr_comment
 from reporegex import matchers
+from tools import githubclient, githubratelimit
 
 file_pattern = re.compile(
     matchers.submission_path_matcher(strict_categories=False) + r"/.*"
@@ -33,8 +32,6 @@ pr_submission = "PR Submission v1.0"
 pr_merged = "PR Merged v1.0"
 pr_outcome = "PR Outcome v1.0"
 charts = "charts"
-xRateLimit = "X-RateLimit-Limit"
-xRateRemain = "X-RateLimit-Remaining"
 
 
 def parse_response(response):
@@ -53,16 +50,9 @@ def parse_response(response):
 
 def get_release_metrics():
     result = []
-    for i in itertools.count(start=1):
-        request_headers = {
-            "Accept": "application/vnd.github.v3+json",
-            "Authorization": f'Bearer {os.environ.get("BOT_TOKEN")}',
-        }
-        response = requests.get(
-            f"https://api.github.com/repos/openshift-helm-charts/charts/releases?per_page=100&page={i}",
-            headers=request_headers,
-        )
-
+    for response in githubclient.get_client().get_pages(
+        "https://api.github.com/repos/openshift-helm-charts/charts/releases"
+    ):
         if not 200 <= response.status_code < 300:
             print(
                 f"[ERROR] unexpected response getting release data : {response.status_code} : {response.reason}"
@@ -70,17 +60,10 @@ def get_release_metrics():
             sys.exit(1)
 
         response_json = response.json()
-        if xRateLimit in response.headers:
-            print(f"[DEBUG] {xRateLimit} : {response.headers[xRateLimit]}")
-        if xRateRemain in response.headers:
-            print(f"[DEBUG] {xRateRemain}  : {response.headers[xRateRemain]}")
-
         if "message" in response_json:
             print(f'[ERROR] getting pr files: {response_json["message"]}')
             sys.exit(1)
 
-        if len(response_json) == 0:
-            break
         result.extend(response_json)
     return parse_response(result)
 
@@ -182,7 +165,7 @@ def send_pull_request_metrics(write_key, g):
             else:
                 charts_in_progress += 1
 
-        check_rate_limit(g, False)
+        check_rate_limit(g)
 
     print(f"[INFO] abandoned PRS: {abandoned}")
     send_summary_metric(
@@ -549,10 +532,13 @@ def send_metric(write_key, id, event, properties):
     analytics.track(id, event, properties)
 
 
-def check_rate_limit(g, force):
-    rate_limit = g.get_rate_limit()
-    if force or rate_limit.core.remaining < 10:
-        print(f"[INFO] rate limit info: {rate_limit.core}")
+def check_rate_limit(g):
+    """Record the rate limit of the last PyGithub response in the budget of the client,
+    without an extra call, and pause the crawl if the budget is low."""
+    remaining, limit = g.rate_limiting
+    budget = githubclient.get_client().budget
+    budget.observe("core", remaining, limit, g.rate_limiting_resettime, counted=False)
+    budget.wait("core", githubratelimit.BATCH)
 
 
 def getChartUpdate(type, partner, chart, cwd):
@@ -651,7 +637,7 @@ def main():
         print("Error: Segment write key not set")
         sys.exit(1)
 
-    g = Github(os.environ.get("BOT_TOKEN"))
+    g = Github(os.environ.get("BOT_TOKEN"), base_url=githubclient.get_api_url())
 
     if args.type == "pull_request":
         repo_current = g.get_repo(args.repository)
@@ -665,11 +651,9 @@ def main():
             args.pr_dir,
         )
     else:
-        check_rate_limit(g, True)
+        githubclient.get_client().priority = githubratelimit.BATCH
         send_release_metrics(args.write_key, get_release_metrics(), args.prefix)
-        check_rate_limit(g, True)
         send_pull_request_metrics(args.write_key, g)
-        check_rate_limit(g, True)
 
 
 if __name__ == "__main__":
@@ -15,15 +15,9 @@ import os
 import re
 import sys
 
-import yaml
-
-try:
-    from yaml import CLoader as Loader
-except ImportError:
-    from yaml import Loader
-
 sys.path.append("../")
 from pullrequest import prartifact
+from tools import yamlio
 
 OWNERS_FILE = "OWNERS"
 VERSION_FILE = "release/release_info.json"
@@ -35,8 +29,7 @@ def verify_user(username):
     if not os.path.exists(OWNERS_FILE):
         print(f"[ERROR] {OWNERS_FILE} file does not exist.")
     else:
-        data = open(OWNERS_FILE).read()
-        out = yaml.load(data, Loader=Loader)
+        out = yamlio.load_file(OWNERS_FILE, yamlio.Loader)
         if username in out["approvers"]:
             print(f"[INFO] {username} authorized")
             return True
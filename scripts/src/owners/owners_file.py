@@ -1,12 +1,11 @@
 import contextlib
 import os
+import sys
 
 import yaml
 
-try:
-    from yaml import CSafeoader as SafeLoader
-except ImportError:
-    from yaml import SafeLoader
+sys.path.append("../")
+from tools import yamlio
 
 
 class OwnersFileError(Exception):
@@ -32,8 +31,7 @@ def get_owner_data(category, organization, chart):
 
 def get_owner_data_from_file(owner_path):
     try:
-        with open(owner_path) as owner_data:
-            owner_content = yaml.load(owner_data, Loader=SafeLoader)
+        owner_content = yamlio.load_file(owner_path)
     except yaml.YAMLError as e:
         print(f"Exception loading OWNERS file: {e}")
         raise OwnersFileError from e
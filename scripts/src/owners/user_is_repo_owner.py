@@ -12,12 +12,8 @@ Any other non-zero is considered a failed execution (contextually, something bro
 import os
 import sys
 
-import yaml
-
-try:
-    from yaml import CLoader as Loader
-except ImportError:
-    from yaml import Loader
+sys.path.append("../")
+from tools import yamlio
 
 OWNERS_FILE = "OWNERS"
 
@@ -29,9 +25,7 @@ def is_approver(username: str) -> bool:
     does not match our expectations.
     """
 
-    with open(OWNERS_FILE, "r") as f:
-        data = f.read()
-        out = yaml.load(data, Loader=Loader)
+    out = yamlio.load_file(OWNERS_FILE, yamlio.Loader)
 
     if "approvers" not in out:
         raise Exception('OWNERS file did not have the required "approvers" key')
@@ -1,21 +1,74 @@
+"""Information about the PR being processed: modified files, charts and labels.
+
+The Submission artifact written by validate-submission, found at SUBMISSION_PATH,
+already holds the files of the PR and the chart they belong to. When it is available
+and describes the same PR, later jobs read it instead of querying the GitHub API
+again. Otherwise the information is fetched once per PR and cached, see prsnapshot.
+"""
+
 import argparse
+import json
 import os
 import sys
 
-import requests
-
 sys.path.append("../")
+from pullrequest import prsnapshot
 from reporegex import matchers
+from submission import serializer
 from tools import gitutils
 
-pr_files = []
-pr_labels = []
-xRateLimit = "X-RateLimit-Limit"
-xRateRemain = "X-RateLimit-Remaining"
+# Submissions already loaded, keyed by path. None if the file cannot be loaded.
+_submissions = {}
+
+
+def get_submission(api_url):
+    """Get the Submission saved at SUBMISSION_PATH, if it is about the PR at api_url.
+
+    Args:
+        api_url (str): URL of the GitHub PR
+
+    Returns:
+        Submission: The submission, or None if SUBMISSION_PATH is not set, cannot be
+                    read, or is about another PR.
+    """
+    submission_path = os.environ.get("SUBMISSION_PATH")
+    if not submission_path:
+        return None
+    if submission_path not in _submissions:
+        try:
+            with open(submission_path) as fd:
+                s = json.load(fd, cls=serializer.SubmissionDecoder)
+        except (OSError, ValueError, TypeError) as err:
+            print(f"[WARNING] Cannot load submission from {submission_path}: {err}")
+            s = None
+        _submissions[submission_path] = s
+
+    s = _submissions[submission_path]
+    if s is None or s.api_url.rstrip("/") != api_url.rstrip("/"):
+        return None
+    return s
+
+
+def get_submission_chart(api_url):
+    """Get the chart of the PR from its Submission, see get_submission.
+
+    Returns:
+        (str, str, str, str): category, organization, chart, and version (e.g.
+                              partners, hashicorp, vault, 1.4.0), or None if there is
+                              no submission or it has no chart version.
+    """
+    s = get_submission(api_url)
+    if s is None or not s.chart.version:
+        return None
+    return s.chart.category, s.chart.organization, s.chart.name, s.chart.version
 
 
 # TODO(baijum): Move this code under chartsubmission.chart module
 def get_modified_charts(api_url):
+    chart = get_submission_chart(api_url)
+    if chart:
+        return chart
+
     files = get_modified_files(api_url)
     pattern, _, _ = matchers.get_file_match_compiled_patterns()
     for file in files:
@@ -28,7 +81,7 @@ def get_modified_charts(api_url):
 
 
 def get_modified_files(api_url):
-    """Populates and returns the list of files modified by this the PR
+    """Returns the list of files modified by the PR, from its Submission if available
 
     Args:
         api_url (str): URL of the GitHub PR
@@ -36,61 +89,25 @@ def get_modified_files(api_url):
     Returns:
         list[str]: List of modified files
     """
-    if not pr_files:
-        page_number = 1
-        max_page_size, page_size = 100, 100
-        headers = {
-            "Accept": "application/vnd.github.v3+json",
-            "Authorization": f'Bearer {os.environ.get("BOT_TOKEN")}',
-        }
-        files_api_url = f"{api_url}/files"
-
-        while page_size == max_page_size:
-            files_api_query = f"{files_api_url}?per_page={page_size}&page={page_number}"
-            print(f"[INFO] Query files : {files_api_query}")
-            r = requests.get(files_api_query, headers=headers)
-            files = r.json()
-            page_size = len(files)
-            page_number += 1
-
-            if xRateLimit in r.headers:
-                print(f"[DEBUG] {xRateLimit} : {r.headers[xRateLimit]}")
-            if xRateRemain in r.headers:
-                print(f"[DEBUG] {xRateRemain}  : {r.headers[xRateRemain]}")
-
-            if "message" in files:
-                print(f'[ERROR] getting pr files: {files["message"]}')
-                sys.exit(1)
-            else:
-                for file in files:
-                    if "filename" in file:
-                        pr_files.append(file["filename"])
-
-    return pr_files
+    s = get_submission(api_url)
+    if s is not None:
+        return s.modified_files
+
+    try:
+        snapshot = prsnapshot.get_pr_snapshot(api_url)
+    except prsnapshot.PRSnapshotError as err:
+        print(f"[ERROR] getting pr files: {err}")
+        sys.exit(1)
+    return snapshot.files
 
 
 def get_labels(api_url):
-    if not pr_labels:
-        headers = {
-            "Accept": "application/vnd.github.v3+json",
-            "Authorization": f'Bearer {os.environ.get("BOT_TOKEN")}',
-        }
-        r = requests.get(api_url, headers=headers)
-        pr_data = r.json()
-
-        if xRateLimit in r.headers:
-            print(f"[DEBUG] {xRateLimit} : {r.headers[xRateLimit]}")
-        if xRateRemain in r.headers:
-            print(f"[DEBUG] {xRateRemain}  : {r.headers[xRateRemain]}")
-
-        if "message" in pr_data:
-            print(f'[ERROR] getting pr files: {pr_data["message"]}')
-            sys.exit(1)
-        if "labels" in pr_data:
-            for label in pr_data["labels"]:
-                pr_labels.append(label["name"])
-
-    return pr_labels
+    try:
+        snapshot = prsnapshot.get_pr_snapshot(api_url, with_files=False)
+    except prsnapshot.PRSnapshotError as err:
+        print(f"[ERROR] getting pr labels: {err}")
+        sys.exit(1)
+    return snapshot.labels
 
 
 def main():
@@ -0,0 +1,47 @@
+import pytest
+
+from pullrequest import prartifact
+from signedchart import signedchart
+from submission import submission, validate
+
+api_url = "https://api.github.com/repos/openshift-helm-charts/charts/pulls/1"
+chart_dir = "charts/partners/acme/awesome/1.42.0"
+
+
+@pytest.fixture(autouse=True)
+def submission_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(prartifact, "_submissions", {})
+    s = submission.Submission(
+        api_url,
+        modified_files=[
+            f"{chart_dir}/awesome-1.42.0.tgz",
+            f"{chart_dir}/awesome-1.42.0.tgz.prov",
+        ],
+    )
+    s.parse_modified_files()
+    path = tmp_path / "submission.json"
+    validate.write_submission_to_file(s, str(path))
+    monkeypatch.setenv("SUBMISSION_PATH", str(path))
+    return path
+
+
+def test_pr_information_is_read_from_submission():
+    assert prartifact.get_modified_charts(api_url) == (
+        "partners",
+        "acme",
+        "awesome",
+        "1.42.0",
+    )
+    assert prartifact.get_modified_files(api_url) == [
+        f"{chart_dir}/awesome-1.42.0.tgz",
+        f"{chart_dir}/awesome-1.42.0.tgz.prov",
+    ]
+    assert signedchart.is_chart_signed(api_url, None)
+
+
+def test_submission_of_another_pr_is_ignored(submission_path):
+    assert prartifact.get_submission(f"{api_url}0") is None
+
+    submission_path.write_text("not json")
+    prartifact._submissions.clear()
+    assert prartifact.get_submission(api_url) is None
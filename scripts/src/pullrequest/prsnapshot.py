@@ -0,0 +1,235 @@
+"""Snapshot of a pull request: files, labels, merge state and head information.
+
+The snapshot is fetched with a single GraphQL query, plus one query per additional
+page of 100 files or labels, instead of separate paginated REST calls for the files, the labels
+and the merge state. The REST API is used as a fallback if the GraphQL query fails, or
+if no token is available (the GraphQL API requires authentication).
+
+Snapshots are kept in memory, so that all the steps of a process share the same view
+of the pull request. Use refresh=True to poll a state that changes, such as merged.
+"""
+
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+
+import requests
+
+sys.path.append("../")
+from tools import githubclient
+
+_API_URL = re.compile(
+    r"^https?://[^/]+/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)/pulls/(?P<number>\d+)/?$"
+)
+
+PR_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $cursor: String,
+      $labelCursor: String, $withFiles: Boolean!, $withLabels: Boolean!,
+      $firstPage: Boolean!) {
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) {
+      merged @include(if: $firstPage)
+      isDraft @include(if: $firstPage)
+      author @include(if: $firstPage) { login }
+      baseRefName @include(if: $firstPage)
+      headRefName @include(if: $firstPage)
+      headRefOid @include(if: $firstPage)
+      headRepository @include(if: $firstPage) { nameWithOwner }
+      labels(first: 100, after: $labelCursor) @include(if: $withLabels) {
+        pageInfo { hasNextPage endCursor }
+        nodes { name }
+      }
+      files(first: 100, after: $cursor) @include(if: $withFiles) {
+        pageInfo { hasNextPage endCursor }
+        nodes { path }
+      }
+    }
+  }
+}
+"""
+
+# Snapshots already fetched, keyed by (API URL, whether files were fetched).
+_snapshots = {}
+
+
+class PRSnapshotError(Exception):
+    pass
+
+
+@dataclass
+class PRSnapshot:
+    """State of a pull request.
+
+    Attributes:
+        api_url (str): REST API URL of the PR.
+        files (list[str]): Paths of the files modified by the PR. Only set if the
+            snapshot was fetched with files.
+        labels (list[str]): Names of the labels of the PR.
+        merged (bool): Whether the PR is merged.
+        author (str): Login of the author of the PR.
+        draft (bool): Whether the PR is a draft.
+        base_ref (str): Name of the branch the PR is merged into.
+        head_ref (str): Name of the branch of the PR.
+        head_sha (str): SHA of the head commit of the PR.
+        head_repository (str): Full name of the repository of head_ref.
+    """
+
+    api_url: str
+    files: list[str] = field(default=None)
+    labels: list[str] = field(default_factory=list)
+    merged: bool = False
+    author: str = None
+    draft: bool = False
+    base_ref: str = None
+    head_ref: str = None
+    head_sha: str = None
+    head_repository: str = None
+
+
+def _parse_api_url(api_url):
+    match = _API_URL.match(api_url)
+    if not match:
+        raise PRSnapshotError(f"Not a pull request API URL: {api_url}")
+    return match["owner"], match["name"], int(match["number"])
+
+
+def _graphql(variables):
+    response = githubclient.get_client().post(
+        "graphql", json={"query": PR_QUERY, "variables": variables}
+    )
+    if response.status_code != 200:
+        raise PRSnapshotError(
+            f"GraphQL query failed: {response.status_code} {response.reason}"
+        )
+    data = response.json()
+    if data.get("errors"):
+        raise PRSnapshotError(f"GraphQL query failed: {data['errors'][0]['message']}")
+    pull_request = ((data.get("data") or {}).get("repository") or {}).get("pullRequest")
+    if pull_request is None:
+        raise PRSnapshotError("GraphQL query failed: pull request not found")
+    return pull_request
+
+
+def fetch_graphql_snapshot(api_url, with_files=True):
+    """Fetch the snapshot of a PR with the GraphQL API.
+
+    Raises:
+        PRSnapshotError: if the query fails.
+    """
+    owner, name, number = _parse_api_url(api_url)
+    variables = {
+        "owner": owner,
+        "name": name,
+        "number": number,
+        "cursor": None,
+        "labelCursor": None,
+        "withFiles": with_files,
+        "withLabels": True,
+        "firstPage": True,
+    }
+    pr = _graphql(variables)
+    snapshot = PRSnapshot(
+        api_url=api_url,
+        files=[] if with_files else None,
+        merged=pr["merged"],
+        author=(pr["author"] or {}).get("login"),
+        draft=pr["isDraft"],
+        base_ref=pr["baseRefName"],
+        head_ref=pr["headRefName"],
+        head_sha=pr["headRefOid"],
+        head_repository=(pr["headRepository"] or {}).get("nameWithOwner"),
+    )
+
+    # The next pages of the files and of the labels are fetched together.
+    while True:
+        labels = pr["labels"] if variables["withLabels"] else None
+        files = pr["files"] if variables["withFiles"] else None
+        if labels:
+            snapshot.labels.extend(node["name"] for node in labels["nodes"])
+        if files:
+            snapshot.files.extend(node["path"] for node in files["nodes"])
+        with_labels = bool(labels) and labels["pageInfo"]["hasNextPage"]
+        with_files = bool(files) and files["pageInfo"]["hasNextPage"]
+        if not (with_labels or with_files):
+            break
+        variables.update(
+            cursor=files["pageInfo"]["endCursor"] if with_files else None,
+            labelCursor=labels["pageInfo"]["endCursor"] if with_labels else None,
+            withFiles=with_files,
+            withLabels=with_labels,
+            firstPage=False,
+        )
+        pr = _graphql(variables)
+    return snapshot
+
+
+def _get_json(response):
+    data = response.json()
+    if "message" in data:
+        raise PRSnapshotError(f"Failed to get {response.url}: {data['message']}")
+    return data
+
+
+def fetch_rest_snapshot(api_url, with_files=True):
+    """Same as fetch_graphql_snapshot, with the REST API."""
+    pr = _get_json(githubclient.get_client().get(api_url))
+    snapshot = PRSnapshot(
+        api_url=api_url,
+        labels=[label["name"] for label in pr.get("labels", [])],
+        merged=pr.get("merged", False),
+        author=(pr.get("user") or {}).get("login"),
+        draft=pr.get("draft", False),
+        base_ref=(pr.get("base") or {}).get("ref"),
+        head_ref=(pr.get("head") or {}).get("ref"),
+        head_sha=(pr.get("head") or {}).get("sha"),
+        head_repository=((pr.get("head") or {}).get("repo") or {}).get("full_name"),
+    )
+
+    if with_files:
+        snapshot.files = []
+        print(f"[INFO] Query files : {api_url}/files")
+        for response in githubclient.get_client().get_pages(f"{api_url}/files"):
+            files = _get_json(response)
+            snapshot.files.extend(
+                file["filename"] for file in files if "filename" in file
+            )
+    return snapshot
+
+
+def get_pr_snapshot(api_url, with_files=True, refresh=False):
+    """Get the snapshot of a PR, with the GraphQL API, falling back to the REST API.
+
+    Args:
+        api_url (str): REST API URL of the PR, e.g.
+            https://api.github.com/repos/openshift-helm-charts/charts/pulls/1
+        with_files (bool): Whether to fetch the files modified by the PR.
+        refresh (bool): Fetch the snapshot even if it was already fetched.
+
+    Returns:
+        PRSnapshot: The state of the PR.
+
+    Raises:
+        PRSnapshotError: if the PR cannot be retrieved.
+    """
+    key = (api_url, with_files)
+    if not refresh:
+        if (api_url, True) in _snapshots:
+            return _snapshots[(api_url, True)]
+        if key in _snapshots:
+            return _snapshots[key]
+
+    snapshot = None
+    if os.environ.get("BOT_TOKEN") and _API_URL.match(api_url):
+        try:
+            snapshot = fetch_graphql_snapshot(api_url, with_files)
+        except (PRSnapshotError, requests.RequestException, KeyError) as err:
+            print(f"[WARNING] {err}, falling back to the REST API")
+    if snapshot is None:
+        try:
+            snapshot = fetch_rest_snapshot(api_url, with_files)
+        except (requests.RequestException, ValueError) as err:
+            raise PRSnapshotError(f"Failed to get {api_url}: {err}") from err
+
+    _snapshots[key] = snapshot
+    return snapshot
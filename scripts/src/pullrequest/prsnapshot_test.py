@@ -0,0 +1,130 @@
+import json
+
+import pytest
+import responses
+
+from pullrequest import prsnapshot
+
+api_url = "https://api.github.com/repos/org/repo/pulls/42"
+graphql_url = "https://api.github.com/graphql"
+
+
+@pytest.fixture(autouse=True)
+def clear_snapshots(monkeypatch):
+    monkeypatch.setattr(prsnapshot, "_snapshots", {})
+    monkeypatch.setenv("BOT_TOKEN", "secret")
+
+
+def make_pr(paths, has_next_page, cursor=None, labels=None, label_cursor=None):
+    if labels is None:
+        labels = ["authorized-request"]
+    return {
+        "data": {
+            "repository": {
+                "pullRequest": {
+                    "merged": False,
+                    "isDraft": True,
+                    "author": {"login": "octocat"},
+                    "baseRefName": "main",
+                    "headRefName": "feature",
+                    "headRefOid": "abc123",
+                    "headRepository": {"nameWithOwner": "octocat/repo"},
+                    "labels": {
+                        "pageInfo": {
+                            "hasNextPage": label_cursor is not None,
+                            "endCursor": label_cursor,
+                        },
+                        "nodes": [{"name": name} for name in labels],
+                    },
+                    "files": {
+                        "pageInfo": {"hasNextPage": has_next_page, "endCursor": cursor},
+                        "nodes": [{"path": path} for path in paths],
+                    },
+                }
+            }
+        }
+    }
+
+
+@responses.activate
+def test_graphql_snapshot():
+    responses.post(graphql_url, json=make_pr(["a", "b"], True, "cursor1"))
+    responses.post(graphql_url, json=make_pr(["c"], False))
+
+    snapshot = prsnapshot.get_pr_snapshot(api_url)
+
+    assert snapshot.files == ["a", "b", "c"]
+    assert snapshot.labels == ["authorized-request"]
+    assert (snapshot.merged, snapshot.draft, snapshot.author) == (
+        False,
+        True,
+        "octocat",
+    )
+    assert (snapshot.base_ref, snapshot.head_sha) == ("main", "abc123")
+    first, second = [json.loads(call.request.body) for call in responses.calls]
+    assert first["variables"]["number"] == 42
+    assert first["variables"]["firstPage"]
+    assert second["variables"]["cursor"] == "cursor1"
+    assert not second["variables"]["firstPage"]
+
+    # The snapshot with files also serves requests without files
+    assert prsnapshot.get_pr_snapshot(api_url, with_files=False) is snapshot
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_graphql_snapshot_with_many_labels():
+    responses.post(
+        graphql_url,
+        json=make_pr(["a"], True, "cursor1", ["label1"], label_cursor="labels1"),
+    )
+    responses.post(
+        graphql_url,
+        json=make_pr(["b"], False, labels=["label2"], label_cursor="labels2"),
+    )
+    responses.post(graphql_url, json=make_pr([], False, labels=["label3"]))
+
+    snapshot = prsnapshot.get_pr_snapshot(api_url)
+
+    assert snapshot.files == ["a", "b"]
+    assert snapshot.labels == ["label1", "label2", "label3"]
+    second, third = [json.loads(call.request.body) for call in responses.calls[1:]]
+    assert second["variables"]["cursor"] == "cursor1"
+    assert second["variables"]["labelCursor"] == "labels1"
+    assert (second["variables"]["withFiles"], second["variables"]["withLabels"]) == (
+        True,
+        True,
+    )
+    assert third["variables"]["labelCursor"] == "labels2"
+    assert not third["variables"]["withFiles"]
+
+
+@responses.activate
+def test_rest_fallback():
+    responses.post(graphql_url, json={"errors": [{"message": "Bad credentials"}]})
+    responses.get(
+        api_url,
+        json={
+            "merged": True,
+            "labels": [{"name": "force-publish"}],
+            "user": {"login": "octocat"},
+            "base": {"ref": "main"},
+            "head": {"ref": "feature", "sha": "abc123"},
+        },
+    )
+    responses.get(f"{api_url}/files", json=[{"filename": "a"}])
+
+    snapshot = prsnapshot.get_pr_snapshot(api_url)
+
+    assert snapshot.files == ["a"]
+    assert snapshot.labels == ["force-publish"]
+    assert snapshot.merged
+
+
+@responses.activate
+def test_not_found(monkeypatch):
+    monkeypatch.delenv("BOT_TOKEN")
+    responses.get(api_url, json={"message": "Not Found"})
+
+    with pytest.raises(prsnapshot.PRSnapshotError, match="Not Found"):
+        prsnapshot.get_pr_snapshot(api_url)
@@ -1,18 +1,35 @@
+import copy
+import hashlib
 import json
 import os
+import shutil
 import subprocess
 import sys
+import tempfile
 
-import docker
+sys.path.append("../")
+from report import report_summary, verifier_session
 
 REPORT_ANNOTATIONS = "annotations"
 REPORT_RESULTS = "results"
 REPORT_DIGESTS = "digests"
 REPORT_METADATA = "metadata"
+REPORT_ALL = "all"
+BACKEND_VERIFIER = "verifier"
+BACKEND_NATIVE = "native"
 SHA_ERROR = "Digest in report did not match report content"
 
+# In-process cache of the chart-verifier output, see _get_all_report_info.
+_report_info_cache = {}
+
+# Lines of the last error log written, for callers handling the SystemExit that follows
+# it (e.g. validate_reports).
+last_error_log = ()
+
 
 def write_error_log(*msg):
+    global last_error_log
+    last_error_log = msg
     directory = os.environ.get("WORKFLOW_WORKING_DIRECTORY")
     if directory:
         os.makedirs(directory, exist_ok=True)
@@ -25,88 +42,253 @@ def write_error_log(*msg):
         print(line)
 
 
-def _get_report_info(
-    report_path, report_info_path, info_type, profile_type, profile_version
-):
-    if report_info_path and len(report_info_path) > 0:
-        print(f"[INFO] Using existing report info: {report_info_path}")
-        report_out = json.load(open(report_info_path))
+def _get_report_info_cache_dir():
+    """Directory in which extracted report info is persisted between processes.
+
+    Set REPORT_INFO_CACHE_DIR to an empty string to disable the on-disk cache.
+    """
+    return os.environ.get(
+        "REPORT_INFO_CACHE_DIR",
+        os.path.join(tempfile.gettempdir(), "chart-report-info"),
+    )
+
+
+def get_report_info_backend():
+    """Determine how report info is extracted from report.yaml.
+
+    The backend can be forced with the REPORT_INFO_BACKEND environment variable, set to
+    either "verifier" (chart-verifier binary, or container if VERIFIER_IMAGE is set) or
+    "native" (in-process, see report_summary). By default, chart-verifier is used.
+
+    The native backend doesn't verify the report digest, so it is never used unless
+    requested: if chart-verifier is not available, the process exits with an error.
+
+    Returns:
+        str: BACKEND_VERIFIER or BACKEND_NATIVE
+    """
+    backend = os.environ.get("REPORT_INFO_BACKEND")
+    if backend in (BACKEND_VERIFIER, BACKEND_NATIVE):
+        return backend
+    if backend:
+        print(f"[WARNING] Unknown REPORT_INFO_BACKEND: {backend}")
+
+    if os.environ.get("VERIFIER_IMAGE") or shutil.which("chart-verifier"):
+        return BACKEND_VERIFIER
+    write_error_log(
+        "[ERROR] chart-verifier is not available to check the report: set "
+        "VERIFIER_IMAGE or install chart-verifier. REPORT_INFO_BACKEND=native "
+        "extracts report info without it, but doesn't verify the report digest."
+    )
+    sys.exit(1)
+
+
+def _get_verifier_id(backend):
+    """Identify the chart-verifier used by backend, whose output depends on its version.
+
+    Returns:
+        str: The image if VERIFIER_IMAGE is set, otherwise the path, size and
+             modification time of the chart-verifier binary. Empty for the native
+             backend.
+    """
+    if backend == BACKEND_NATIVE:
+        return ""
+    image = os.environ.get("VERIFIER_IMAGE")
+    if image:
+        return image
+    binary = shutil.which("chart-verifier")
+    if not binary:
+        return ""
+    stat = os.stat(binary)
+    return f"{binary}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _report_info_cache_key(report_path, backend, profile_type, profile_version):
+    """Compute the cache key for a report: its content hash plus the verifier and the
+    requested profile."""
+    with open(report_path, "rb") as fd:
+        report_digest = hashlib.sha256(fd.read()).hexdigest()
+    verifier_digest = hashlib.sha256(
+        _get_verifier_id(backend).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{report_digest}-{backend}-{verifier_digest}-{profile_type or 'default'}-{profile_version or 'default'}"
+
+
+def _load_cached_report_info(cache_key):
+    if cache_key in _report_info_cache:
+        return _report_info_cache[cache_key]
+
+    cache_dir = _get_report_info_cache_dir()
+    if not cache_dir:
+        return None
+
+    cache_path = os.path.join(cache_dir, f"{cache_key}.json")
+    try:
+        with open(cache_path) as fd:
+            report_out = json.load(fd)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    print(f"[INFO] Using cached report info: {cache_path}")
+    _report_info_cache[cache_key] = report_out
+    return report_out
+
+
+def _store_cached_report_info(cache_key, report_out):
+    _report_info_cache[cache_key] = report_out
+
+    cache_dir = _get_report_info_cache_dir()
+    if not cache_dir:
+        return
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary file first so that concurrent readers never see a
+        # partially written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as tmp_file:
+            json.dump(report_out, tmp_file)
+        os.replace(tmp_path, os.path.join(cache_dir, f"{cache_key}.json"))
+    except OSError as err:
+        print(f"[WARNING] Failed to persist report info in {cache_dir}: {err}")
+
+
+def _run_report_info(report_path, profile_type, profile_version):
+    """Run chart-verifier once to extract all types of info from the report.
+
+    Args:
+        report_path (str): Path to the report.yaml file.
+        profile_type (str): Profile vendor type to evaluate the results against.
+        profile_version (str): Profile version to evaluate the results against.
+
+    Returns:
+        dict: The annotations, results, digests and metadata of the report.
+    """
+    command = "report"
+    set_values = ""
+    if profile_type:
+        set_values = "profile.vendortype=%s" % profile_type
+    if profile_version:
+        if set_values:
+            set_values = "%s,profile.version=%s" % (set_values, profile_version)
+        else:
+            set_values = "profile.version=%s" % profile_version
+
+    if os.environ.get("VERIFIER_IMAGE"):
+        print(f"[INFO] Generate report info using docker  : {report_path}")
+        verifier_args = [
+            command,
+            REPORT_ALL,
+            f"{verifier_session.CHARTS_MOUNT_POINT}{os.path.basename(report_path)}",
+        ]
+        if set_values:
+            verifier_args.extend(["--set", set_values])
+
+        report_directory = os.path.dirname(os.path.abspath(report_path))
+        session = verifier_session.get_session(
+            os.environ.get("VERIFIER_IMAGE"), report_directory
+        )
+        try:
+            output = session.run(verifier_args)
+        except verifier_session.VerifierSessionError as err:
+            write_error_log(f"[ERROR] {err}")
+            sys.exit(1)
     else:
-        command = "report"
-        set_values = ""
-        if profile_type:
-            set_values = "profile.vendortype=%s" % profile_type
-        if profile_version:
-            if set_values:
-                set_values = "%s,profile.version=%s" % (set_values, profile_version)
-            else:
-                set_values = "profile.version=%s" % profile_version
-
-        if os.environ.get("VERIFIER_IMAGE"):
-            print(f"[INFO] Generate report info using docker  : {report_path}")
-            docker_command = (
-                f"{command} {info_type} /charts/{os.path.basename(report_path)}"
-            )
-            if set_values:
-                docker_command = "%s --set %s" % (docker_command, set_values)
+        print(
+            f"[INFO] Generate report info using chart-verifier on path : {os.path.abspath(report_path)}"
+        )
+        verifier_command = ["chart-verifier", command, REPORT_ALL]
+        if set_values:
+            verifier_command.extend(["--set", set_values])
+        verifier_command.append(os.path.abspath(report_path))
+        out = subprocess.run(verifier_command, capture_output=True)
+        output = out.stdout.decode("utf-8")
+
+    if SHA_ERROR in output:
+        msg = f"[ERROR] {SHA_ERROR}"
+        write_error_log(msg)
+        sys.exit(1)
 
-            client = docker.from_env()
-            report_directory = os.path.dirname(os.path.abspath(report_path))
-            print(
-                f'Call docker using image: {os.environ.get("VERIFIER_IMAGE")}, docker command: {docker_command}, report directory: {report_directory}'
-            )
-            output = client.containers.run(
-                os.environ.get("VERIFIER_IMAGE"),
-                docker_command,
-                stdin_open=True,
-                tty=True,
-                stdout=True,
-                volumes={report_directory: {"bind": "/charts/", "mode": "rw"}},
+    try:
+        report_out = json.loads(output)
+    except ValueError as err:
+        msgs = []
+        msgs.append(f"[ERROR] loading report output: /n{output}")
+        msgs.append(f"[ERROR] exception was: {err=}, {type(err)=}")
+        write_error_log(*msgs)
+        sys.exit(1)
+
+    return report_out
+
+
+def _run_native_report_info(report_path, profile_type, profile_version):
+    """Compute all report info in-process, without running chart-verifier.
+
+    See _run_report_info for the arguments and return value.
+    """
+    print(
+        f"[INFO] Generate report info natively on path : {os.path.abspath(report_path)}"
+    )
+    print("[WARNING] The native backend does not verify the report digest")
+    try:
+        return report_summary.get_report_summary(
+            report_path, profile_type, profile_version
+        )
+    except report_summary.ReportSummaryError as err:
+        write_error_log(f"[ERROR] loading report info: {err}")
+        sys.exit(1)
+
+
+def _get_all_report_info(report_path, report_info_path, profile_type, profile_version):
+    """Get all types of info for a report, extracting them at most once.
+
+    The output of chart-verifier is cached in-process and on disk, keyed by the hash of
+    the report content, the chart-verifier image or binary and the requested profile,
+    so that subsequent calls for the same report are dictionary lookups.
+
+    Args:
+        report_path (str): Path to the report.yaml file.
+        report_info_path (str): Path to an existing processed JSON report. Takes
+                                precedence over report_path if set.
+        profile_type (str): Profile vendor type to evaluate the results against.
+        profile_version (str): Profile version to evaluate the results against.
+
+    Returns:
+        dict: The annotations, results, digests and metadata of the report.
+    """
+    if report_info_path and len(report_info_path) > 0:
+        cache_key = f"file:{os.path.abspath(report_info_path)}"
+        if cache_key not in _report_info_cache:
+            print(f"[INFO] Using existing report info: {report_info_path}")
+            with open(report_info_path) as fd:
+                _report_info_cache[cache_key] = json.load(fd)
+        return _report_info_cache[cache_key]
+
+    backend = get_report_info_backend()
+    cache_key = _report_info_cache_key(
+        report_path, backend, profile_type, profile_version
+    )
+    report_out = _load_cached_report_info(cache_key)
+    if report_out is None:
+        if backend == BACKEND_NATIVE:
+            report_out = _run_native_report_info(
+                report_path, profile_type, profile_version
             )
         else:
-            print(
-                f"[INFO] Generate report info using chart-verifier on path : {os.path.abspath(report_path)}"
-            )
-            if set_values:
-                out = subprocess.run(
-                    [
-                        "chart-verifier",
-                        command,
-                        info_type,
-                        "--set",
-                        set_values,
-                        os.path.abspath(report_path),
-                    ],
-                    capture_output=True,
-                )
-            else:
-                out = subprocess.run(
-                    [
-                        "chart-verifier",
-                        command,
-                        info_type,
-                        os.path.abspath(report_path),
-                    ],
-                    capture_output=True,
-                )
-            output = out.stdout.decode("utf-8")
-
-        if SHA_ERROR in output:
-            msg = f"[ERROR] {SHA_ERROR}"
-            write_error_log(msg)
-            sys.exit(1)
+            report_out = _run_report_info(report_path, profile_type, profile_version)
+        _store_cached_report_info(cache_key, report_out)
 
-        try:
-            report_out = json.loads(output)
-        except BaseException as err:
-            msgs = []
-            msgs.append(f"[ERROR] loading report output: /n{output}")
-            msgs.append(f"[ERROR] exception was: {err=}, {type(err)=}")
-            write_error_log(*msgs)
-            sys.exit(1)
+    return report_out
+
+
+def _get_report_info(
+    report_path, report_info_path, info_type, profile_type, profile_version
+):
+    report_out = _get_all_report_info(
+        report_path, report_info_path, profile_type, profile_version
+    )
 
     if info_type not in report_out:
-        msg = f"Error extracting {info_type} from the report:", report_out.strip()
+        msg = f"Error extracting {info_type} from the report: {report_out}"
         write_error_log(msg)
         sys.exit(1)
 
@@ -117,7 +299,8 @@ def _get_report_info(
 
         return annotations
 
-    return report_out[info_type]
+    # Callers are free to modify the returned value, make sure it doesn't alter the cache.
+    return copy.deepcopy(report_out[info_type])
 
 
 def get_report_annotations(report_path=None, report_info_path=None):
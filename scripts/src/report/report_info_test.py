@@ -0,0 +1,143 @@
+import json
+import subprocess
+
+import pytest
+
+from report import report_info
+
+report_info_output = {
+    "annotations": [
+        {"name": "charts.openshift.io/digest", "value": "sha256:0123"},
+        {"name": "charts.openshift.io/testedOpenShiftVersion", "value": "4.13"},
+    ],
+    "digests": {"chart": "sha256:0123", "package": "4567"},
+    "metadata": {
+        "vendorType": "partner",
+        "profileVersion": "v1.2",
+        "chart-uri": "https://example.com/awesome-1.42.0.tgz",
+        "chart": {"name": "awesome", "version": "1.42.0"},
+    },
+    "results": {"passed": "13", "failed": "0", "message": []},
+}
+
+
+@pytest.fixture
+def fake_verifier(monkeypatch, tmp_path):
+    """Replace the chart-verifier binary by a stub recording its invocations."""
+    calls = []
+
+    def fake_run(command, capture_output):
+        calls.append(command)
+        return subprocess.CompletedProcess(
+            command, 0, stdout=json.dumps(report_info_output).encode("utf-8")
+        )
+
+    monkeypatch.setattr(report_info.subprocess, "run", fake_run)
+    monkeypatch.delenv("VERIFIER_IMAGE", raising=False)
+    monkeypatch.setenv("REPORT_INFO_BACKEND", "verifier")
+    monkeypatch.setenv("REPORT_INFO_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(report_info, "_report_info_cache", {})
+    return calls
+
+
+@pytest.fixture
+def report_path(tmp_path):
+    path = tmp_path / "report.yaml"
+    path.write_text("apiversion: v1\nkind: verify-report\n")
+    return str(path)
+
+
+def test_single_verifier_invocation(fake_verifier, report_path):
+    """All getters are served from a single chart-verifier run"""
+    assert report_info.get_report_annotations(report_path) == {
+        "charts.openshift.io/digest": "sha256:0123",
+        "charts.openshift.io/testedOpenShiftVersion": "4.13",
+    }
+    assert report_info.get_report_digests(report_path)["package"] == "4567"
+    assert report_info.get_report_metadata(report_path)["vendorType"] == "partner"
+    assert report_info.get_report_chart(report_path)["name"] == "awesome"
+    assert report_info.get_report_chart_url(report_path).endswith("1.42.0.tgz")
+
+    assert len(fake_verifier) == 1
+    assert fake_verifier[0][:3] == ["chart-verifier", "report", "all"]
+
+
+def test_results_keyed_by_profile(fake_verifier, report_path):
+    report_info.get_report_results(report_path, "partner", "")
+    report_info.get_report_results(report_path, "partner", "")
+    report_info.get_report_results(report_path, "community", "v1.1")
+
+    assert len(fake_verifier) == 2
+    assert "profile.vendortype=community,profile.version=v1.1" in fake_verifier[1]
+
+
+def test_cached_values_are_not_modified_by_callers(fake_verifier, report_path):
+    chart = report_info.get_report_chart(report_path)
+    chart["annotations"] = {"modified": "true"}
+
+    results = report_info.get_report_results(report_path)
+    assert results["passed"] == 13
+
+    assert "annotations" not in report_info.get_report_chart(report_path)
+    report_out = report_info._get_all_report_info(report_path, None, "", "")
+    assert report_out["results"]["passed"] == "13"
+
+
+def test_disk_cache_survives_process_cache(fake_verifier, report_path):
+    report_info.get_report_digests(report_path)
+    report_info._report_info_cache.clear()
+    report_info.get_report_digests(report_path)
+
+    assert len(fake_verifier) == 1
+
+
+def test_report_content_change_invalidates_cache(fake_verifier, report_path):
+    report_info.get_report_digests(report_path)
+    with open(report_path, "a") as fd:
+        fd.write("results: []\n")
+    report_info.get_report_digests(report_path)
+
+    assert len(fake_verifier) == 2
+
+
+def test_verifier_change_invalidates_cache(fake_verifier, report_path, monkeypatch):
+    report_info.get_report_digests(report_path)
+    report_info._report_info_cache.clear()
+    monkeypatch.setenv(
+        "VERIFIER_IMAGE", "quay.io/redhat-certification/chart-verifier:1"
+    )
+    assert (
+        report_info._load_cached_report_info(
+            report_info._report_info_cache_key(report_path, "verifier", "", "")
+        )
+        is None
+    )
+
+    monkeypatch.delenv("VERIFIER_IMAGE")
+    report_info.get_report_digests(report_path)
+    assert len(fake_verifier) == 1
+
+
+def test_invalid_verifier_output(fake_verifier, report_path, monkeypatch):
+    monkeypatch.setattr(
+        report_info.subprocess,
+        "run",
+        lambda command, capture_output: subprocess.CompletedProcess(
+            command, 0, stdout=b"not json"
+        ),
+    )
+
+    with pytest.raises(SystemExit):
+        report_info.get_report_digests(report_path)
+
+
+def test_no_silent_fallback_to_native_backend(monkeypatch):
+    monkeypatch.delenv("REPORT_INFO_BACKEND", raising=False)
+    monkeypatch.delenv("VERIFIER_IMAGE", raising=False)
+    monkeypatch.setattr(report_info.shutil, "which", lambda name: None)
+
+    with pytest.raises(SystemExit):
+        report_info.get_report_info_backend()
+
+    monkeypatch.setenv("REPORT_INFO_BACKEND", "native")
+    assert report_info.get_report_info_backend() == report_info.BACKEND_NATIVE
@@ -0,0 +1,297 @@
+"""Native implementation of "chart-verifier report all".
+
+Computes the annotations, digests, metadata and results of a chart-verifier report
+directly from the content of report.yaml, without running the chart-verifier binary or
+the verifier container. The output has the same structure as the JSON printed by
+chart-verifier, so that it can be used interchangeably by report_info.
+
+Note that, unlike chart-verifier, the report digest (reportDigest) is not verified: it
+relies on the hashing of the verifier's internal data structures.
+"""
+
+import sys
+
+import yaml
+
+sys.path.append("../")
+from tools import yamlio
+
+ANNOTATIONS_PREFIX = "charts.openshift.io"
+
+# Checks of the chart-verifier profiles, for each profile version. The vendor types share
+# the same checks, but not their type, see VENDOR_TYPE_CHECK_TYPES.
+PROFILE_CHECKS = {
+    "v1.0": [
+        "v1.0/has-readme",
+        "v1.0/is-helm-v3",
+        "v1.0/contains-test",
+        "v1.0/contains-values",
+        "v1.0/contains-values-schema",
+        "v1.0/has-kubeversion",
+        "v1.0/not-contains-crds",
+        "v1.0/helm-lint",
+        "v1.0/not-contain-csi-objects",
+        "v1.0/images-are-certified",
+        "v1.0/chart-testing",
+    ],
+    "v1.1": [
+        "v1.0/has-readme",
+        "v1.0/is-helm-v3",
+        "v1.0/contains-test",
+        "v1.0/contains-values",
+        "v1.0/contains-values-schema",
+        "v1.1/has-kubeversion",
+        "v1.0/not-contains-crds",
+        "v1.0/helm-lint",
+        "v1.0/not-contain-csi-objects",
+        "v1.0/images-are-certified",
+        "v1.0/chart-testing",
+        "v1.0/required-annotations-present",
+    ],
+    "v1.2": [
+        "v1.0/has-readme",
+        "v1.0/is-helm-v3",
+        "v1.0/contains-test",
+        "v1.0/contains-values",
+        "v1.0/contains-values-schema",
+        "v1.1/has-kubeversion",
+        "v1.0/not-contains-crds",
+        "v1.0/helm-lint",
+        "v1.0/not-contain-csi-objects",
+        "v1.1/images-are-certified",
+        "v1.0/chart-testing",
+        "v1.0/required-annotations-present",
+        "v1.0/signature-is-valid",
+    ],
+    "v1.3": [
+        "v1.0/has-readme",
+        "v1.0/is-helm-v3",
+        "v1.0/contains-test",
+        "v1.0/contains-values",
+        "v1.0/contains-values-schema",
+        "v1.1/has-kubeversion",
+        "v1.0/not-contains-crds",
+        "v1.0/helm-lint",
+        "v1.0/not-contain-csi-objects",
+        "v1.1/images-are-certified",
+        "v1.0/chart-testing",
+        "v1.0/required-annotations-present",
+        "v1.0/signature-is-valid",
+        "v1.0/has-notes",
+    ],
+}
+LATEST_PROFILE_VERSION = "v1.3"
+
+MANDATORY = "Mandatory"
+OPTIONAL = "Optional"
+# Type of the checks of each vendor type's profiles (profile-<vendor type>-<version> in
+# chart-verifier): the default type, and the checks of the other type. Only mandatory
+# checks are evaluated; one that is missing from the report or did not pass is a
+# failure.
+VENDOR_TYPE_CHECK_TYPES = {
+    "partner": (MANDATORY, {"v1.0/has-notes": OPTIONAL}),
+    "redhat": (MANDATORY, {"v1.0/has-notes": OPTIONAL}),
+    "community": (OPTIONAL, {"v1.0/helm-lint": MANDATORY}),
+}
+DEFAULT_VENDOR_TYPE = "partner"
+# Outcomes of a mandatory check that count as passed. SKIPPED is the outcome of
+# signature-is-valid for charts that are not signed. Any other outcome is a failure.
+PASSED_OUTCOMES = ("PASS", "SKIPPED")
+
+# Annotations derived from the report, in the order chart-verifier lists them.
+PROFILE_ANNOTATIONS = {
+    "v1.0": ["digest", "lastCertifiedTimestamp", "certifiedOpenShiftVersions"],
+    "default": [
+        "digest",
+        "lastCertifiedTimestamp",
+        "testedOpenShiftVersion",
+        "supportedOpenShiftVersions",
+    ],
+}
+
+# report.yaml stores the chart's metadata with lowercased keys, while chart-verifier
+# outputs them using the Helm JSON names.
+CHART_METADATA_KEYS = {
+    "apiversion": "apiVersion",
+    "appversion": "appVersion",
+    "kubeversion": "kubeVersion",
+}
+CHART_DEPENDENCY_KEYS = {
+    "importvalues": "import-values",
+}
+# Chart metadata that is always present in the output, even when empty.
+CHART_REQUIRED_KEYS = {"name", "version"}
+
+
+class ReportSummaryError(Exception):
+    pass
+
+
+def load_report(report_path):
+    """Load the content of report.yaml (or its JSON equivalent).
+
+    Raises:
+        ReportSummaryError: if the report cannot be read or parsed.
+    """
+    try:
+        return yamlio.load_file(report_path)
+    except (OSError, yaml.YAMLError) as err:
+        raise ReportSummaryError(f"Failed to load report {report_path}: {err}") from err
+
+
+def _get_tool_metadata(report_data):
+    try:
+        return report_data["metadata"]["tool"]
+    except (KeyError, TypeError) as err:
+        raise ReportSummaryError("No tool metadata section in report") from err
+
+
+def _get_report_profile(tool):
+    profile = tool.get("profile") or {}
+    vendor_type = profile.get("VendorType") or profile.get("vendorType") or ""
+    return vendor_type, profile.get("version", "")
+
+
+def _omit_empty(data, key_mapping, required_keys=frozenset()):
+    """Rename keys and drop empty values, as Go's "omitempty" does."""
+    out = {}
+    for key, value in data.items():
+        key = key_mapping.get(key, key)
+        if value in ("", [], {}, None, False) and key not in required_keys:
+            continue
+        out[key] = value
+    return out
+
+
+def get_chart_metadata(report_data):
+    chart = dict(report_data["metadata"].get("chart") or {})
+    if chart.get("dependencies"):
+        chart["dependencies"] = [
+            _omit_empty(dependency, CHART_DEPENDENCY_KEYS)
+            for dependency in chart["dependencies"]
+        ]
+    return _omit_empty(chart, CHART_METADATA_KEYS, CHART_REQUIRED_KEYS)
+
+
+def get_metadata(report_data):
+    tool = _get_tool_metadata(report_data)
+    vendor_type, profile_version = _get_report_profile(tool)
+    web_catalog_only = bool(
+        tool.get("webCatalogOnly", False)
+        or tool.get("providerControlledDelivery", False)
+    )
+    return {
+        "vendorType": vendor_type,
+        "profileVersion": profile_version,
+        "webCatalogOnly": web_catalog_only,
+        "chart-uri": tool.get("chart-uri", ""),
+        "chart": get_chart_metadata(report_data),
+        "chart-overrides": report_data["metadata"].get("chart-overrides", ""),
+    }
+
+
+def get_digests(report_data):
+    tool_digests = _get_tool_metadata(report_data).get("digests") or {}
+    digests = {"chart": tool_digests.get("chart", "")}
+    for optional_digest in ("package", "publicKey"):
+        if tool_digests.get(optional_digest):
+            digests[optional_digest] = tool_digests[optional_digest]
+    return digests
+
+
+def get_annotations(report_data):
+    tool = _get_tool_metadata(report_data)
+    _, profile_version = _get_report_profile(tool)
+    annotation_names = PROFILE_ANNOTATIONS.get(
+        profile_version, PROFILE_ANNOTATIONS["default"]
+    )
+
+    annotations = []
+    for name in annotation_names:
+        if name == "digest":
+            value = (tool.get("digests") or {}).get("chart", "")
+        else:
+            value = tool.get(name, "")
+        annotations.append({"name": f"{ANNOTATIONS_PREFIX}/{name}", "value": value})
+    return annotations
+
+
+def get_mandatory_checks(profile_type, profile_version):
+    """Get the mandatory checks of a profile. Unknown vendor types and versions fall
+    back to the default vendor type and the latest version, as in chart-verifier."""
+    if profile_type not in VENDOR_TYPE_CHECK_TYPES:
+        profile_type = DEFAULT_VENDOR_TYPE
+    if profile_version not in PROFILE_CHECKS:
+        profile_version = LATEST_PROFILE_VERSION
+    default_type, check_types = VENDOR_TYPE_CHECK_TYPES[profile_type]
+    return [
+        check
+        for check in PROFILE_CHECKS[profile_version]
+        if check_types.get(check, default_type) == MANDATORY
+    ]
+
+
+def get_results(report_data, profile_type="", profile_version=""):
+    """Evaluate the checks of the report against a profile.
+
+    Args:
+        report_data (dict): The content of report.yaml.
+        profile_type (str): Profile vendor type. Defaults to the one in the report.
+        profile_version (str): Profile version. Defaults to the one in the report.
+
+    Returns:
+        dict: The number of passed and failed checks (as str, like chart-verifier) and
+              the failure messages.
+    """
+    if "results" not in report_data:
+        raise ReportSummaryError("No results section in report")
+
+    report_profile_type, report_profile_version = _get_report_profile(
+        _get_tool_metadata(report_data)
+    )
+    mandatory_checks = get_mandatory_checks(
+        profile_type or report_profile_type, profile_version or report_profile_version
+    )
+
+    outcomes = {}
+    for result in report_data["results"] or []:
+        outcomes[result["check"]] = result
+
+    passed = 0
+    failed = 0
+    messages = []
+    for check in mandatory_checks:
+        result = outcomes.get(check)
+        if result is None:
+            failed += 1
+            messages.append(f"Missing mandatory check : {check}")
+        elif result.get("outcome") in PASSED_OUTCOMES:
+            passed += 1
+        else:
+            failed += 1
+            messages.append(str(result.get("reason", "")))
+
+    return {"passed": str(passed), "failed": str(failed), "message": messages}
+
+
+def summarize_report(report_data, profile_type="", profile_version=""):
+    """Compute all report info types, as returned by "chart-verifier report all".
+
+    Raises:
+        ReportSummaryError: if the report doesn't have the expected structure.
+    """
+    if not isinstance(report_data, dict) or not isinstance(
+        report_data.get("metadata"), dict
+    ):
+        raise ReportSummaryError("No metadata section in report")
+
+    return {
+        "annotations": get_annotations(report_data),
+        "digests": get_digests(report_data),
+        "metadata": get_metadata(report_data),
+        "results": get_results(report_data, profile_type, profile_version),
+    }
+
+
+def get_report_summary(report_path, profile_type="", profile_version=""):
+    return summarize_report(load_report(report_path), profile_type, profile_version)
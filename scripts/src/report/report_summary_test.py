@@ -0,0 +1,126 @@
+import copy
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from report import report_summary
+
+TEST_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tests", "data"
+)
+
+reports = [
+    "common/partner",
+    "common/redhat",
+    "common/community",
+    "HC-10/signed_chart/report/partner",
+    "HC-10/signed_chart/report/redhat",
+    "HC-11/partner",
+    "HC-11/partner_not_contain_crds",
+    "HC-11/community",
+]
+
+
+def test_report_summary():
+    report_path = os.path.join(TEST_DATA_DIR, "common", "partner", "report.yaml")
+    summary = report_summary.get_report_summary(report_path)
+
+    assert summary["digests"] == {
+        "chart": "sha256:d075d16bb33bb33f66cc6fb8af5cce935b647972de4b4af49be385fcce7bed05",
+        "package": "641f6c03aac5117eb679b341426adaa612829acc546c18e59c58ea1b45b2e513",
+    }
+    assert [annotation["name"] for annotation in summary["annotations"]] == [
+        "charts.openshift.io/digest",
+        "charts.openshift.io/lastCertifiedTimestamp",
+        "charts.openshift.io/testedOpenShiftVersion",
+        "charts.openshift.io/supportedOpenShiftVersions",
+    ]
+    assert summary["metadata"]["chart"]["name"] == "vault"
+
+
+@pytest.mark.parametrize("vendor_type", ["partner", "redhat", "community"])
+def test_chart_metadata_matches_verifier_json(vendor_type):
+    """report.yaml's chart metadata is converted to the verifier's JSON naming."""
+    report_path = os.path.join(TEST_DATA_DIR, "common", vendor_type, "report.yaml")
+    with open(os.path.join(TEST_DATA_DIR, "HC-09", vendor_type, "report.json")) as fd:
+        verifier_report = json.load(fd)
+
+    report_data = report_summary.load_report(report_path)
+    assert (
+        report_summary.get_chart_metadata(report_data)
+        == verifier_report["metadata"]["chart"]
+    )
+
+
+def test_missing_check_is_reported():
+    report_path = os.path.join(TEST_DATA_DIR, "HC-11", "community", "report.yaml")
+    results = report_summary.get_report_summary(report_path)["results"]
+
+    assert results["failed"] == "1"
+    assert results["message"] == ["Missing mandatory check : v1.0/helm-lint"]
+
+
+def test_results_for_profile():
+    report_path = os.path.join(TEST_DATA_DIR, "common", "partner", "report.yaml")
+    report_data = report_summary.load_report(report_path)
+
+    # has-notes is optional, and ignored, in the v1.3 profiles.
+    results = report_summary.get_results(report_data, "partner", "v1.3")
+    assert (results["passed"], results["failed"]) == ("13", "0")
+
+    # Only helm-lint is mandatory for community charts.
+    results = report_summary.get_results(report_data, "community", "v1.2")
+    assert (results["passed"], results["failed"]) == ("1", "0")
+
+
+def test_only_passed_checks_count():
+    report_path = os.path.join(TEST_DATA_DIR, "common", "partner", "report.yaml")
+    report_data = copy.deepcopy(report_summary.load_report(report_path))
+    report_data["results"][0]["outcome"] = "UNKNOWN"
+    report_data["results"][0]["reason"] = "first line\nsecond line"
+
+    results = report_summary.get_results(report_data)
+    assert (results["passed"], results["failed"]) == ("12", "1")
+    assert results["message"] == ["first line\nsecond line"]
+
+
+def test_invalid_report():
+    with pytest.raises(report_summary.ReportSummaryError):
+        report_summary.summarize_report({"apiversion": "v1"})
+
+
+def load_expected_summary(report_dir):
+    with open(os.path.join(TEST_DATA_DIR, report_dir, "report-all.json")) as fd:
+        return json.load(fd)
+
+
+@pytest.mark.parametrize("report_dir", reports)
+def test_report_summary_matches_recorded_output(report_dir):
+    """Compare against the `chart-verifier report all` output under tests/data."""
+    report_path = os.path.join(TEST_DATA_DIR, report_dir, "report.yaml")
+
+    assert report_summary.get_report_summary(report_path) == load_expected_summary(
+        report_dir
+    )
+
+
+@pytest.mark.skipif(
+    shutil.which("chart-verifier") is None, reason="chart-verifier is not installed"
+)
+@pytest.mark.parametrize("report_dir", reports)
+def test_report_summary_matches_verifier(report_dir):
+    """Compare against a live chart-verifier run, when the binary is available.
+
+    This also checks that the recorded report-all.json files are still up to date.
+    """
+    report_path = os.path.join(TEST_DATA_DIR, report_dir, "report.yaml")
+    out = subprocess.run(
+        ["chart-verifier", "report", "all", report_path], capture_output=True
+    )
+    verifier_summary = json.loads(out.stdout)
+
+    assert load_expected_summary(report_dir) == verifier_summary
+    assert report_summary.get_report_summary(report_path) == verifier_summary
@@ -0,0 +1,205 @@
+"""Validate all the reports present in the charts/ tree.
+
+Used to check the reports submitted in the past against a new range of OCP versions or a
+new validation rule, without having to open a pull request for each chart. The reports
+are validated in parallel with verifier_report.validate, and the outcome is summarized
+in JSON and/or JUnit XML format, with the time spent on each report.
+
+Example:
+    validate-reports --ocp-version-range ">=4.12" --junit reports.xml charts/
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.append("../")
+from report import report_info, verifier_report
+
+REPORT_FILE_NAME = "report.yaml"
+
+
+def find_reports(charts_dir):
+    """Find all report.yaml files under the given directory.
+
+    Args:
+        charts_dir (str): Directory to search, typically the charts/ directory.
+
+    Returns:
+        list[str]: Sorted paths to the report files.
+    """
+    report_paths = []
+    for root, _, files in os.walk(charts_dir):
+        if REPORT_FILE_NAME in files:
+            report_paths.append(os.path.join(root, REPORT_FILE_NAME))
+    return sorted(report_paths)
+
+
+def validate_report(report_path, ocp_version_range):
+    """Validate a single report, capturing its output.
+
+    Args:
+        report_path (str): Path to the report.yaml file.
+        ocp_version_range (str): Range of supported OCP versions.
+
+    Returns:
+        dict: The outcome of the validation, with the time it took in seconds and the
+              output printed during the validation.
+    """
+    output = io.StringIO()
+    start = time.perf_counter()
+    report_info.last_error_log = ()
+    with contextlib.redirect_stdout(output):
+        try:
+            valid, message = verifier_report.validate(report_path, ocp_version_range)
+        except SystemExit as err:
+            # report_info writes an error log before exiting, which tells why.
+            error_log = "\n".join(report_info.last_error_log) or f"exit code {err.code}"
+            valid, message = False, f"Failed to get report info: {error_log}"
+        except Exception as err:
+            valid, message = False, f"Exception validating report: {err!r}"
+    return {
+        "report": report_path,
+        "valid": valid,
+        "message": message,
+        "duration": round(time.perf_counter() - start, 6),
+        "output": output.getvalue(),
+    }
+
+
+def _validate_report_chunk(report_paths, ocp_version_range):
+    return [
+        validate_report(report_path, ocp_version_range) for report_path in report_paths
+    ]
+
+
+def validate_reports(report_paths, ocp_version_range, workers=None, chunk_size=32):
+    """Validate reports in a pool of processes.
+
+    Args:
+        report_paths (list[str]): Paths to the report files.
+        ocp_version_range (str): Range of supported OCP versions.
+        workers (int): Number of processes. Defaults to the number of CPUs.
+        chunk_size (int): Number of reports sent to a process at once.
+
+    Returns:
+        list[dict]: The outcome of each validation (see validate_report), in the order
+                    of report_paths.
+    """
+    chunks = [
+        report_paths[i : i + chunk_size]
+        for i in range(0, len(report_paths), chunk_size)
+    ]
+    if workers == 1 or len(chunks) <= 1:
+        return _validate_report_chunk(report_paths, ocp_version_range)
+
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_results in executor.map(
+            _validate_report_chunk, chunks, [ocp_version_range] * len(chunks)
+        ):
+            results.extend(chunk_results)
+    return results
+
+
+def get_summary(results, duration):
+    failures = [result for result in results if not result["valid"]]
+    return {
+        "total": len(results),
+        "failed": len(failures),
+        "duration": round(duration, 6),
+        "reports": results,
+    }
+
+
+def write_json_summary(summary, path):
+    with open(path, "w") as fd:
+        json.dump(summary, fd, indent=2)
+
+
+def write_junit_summary(summary, path):
+    """Write the summary as a JUnit XML file, with one test case per report."""
+    testsuite = ET.Element(
+        "testsuite",
+        name="validate-reports",
+        tests=str(summary["total"]),
+        failures=str(summary["failed"]),
+        time=str(summary["duration"]),
+    )
+    for result in summary["reports"]:
+        testcase = ET.SubElement(
+            testsuite,
+            "testcase",
+            classname=os.path.dirname(result["report"]),
+            name=result["report"],
+            time=str(result["duration"]),
+        )
+        if not result["valid"]:
+            failure = ET.SubElement(testcase, "failure", message=result["message"])
+            failure.text = result["message"]
+        if result["output"]:
+            ET.SubElement(testcase, "system-out").text = result["output"]
+
+    tree = ET.ElementTree(testsuite)
+    ET.indent(tree)
+    tree.write(path, encoding="utf-8", xml_declaration=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "charts_dir",
+        nargs="?",
+        default="charts",
+        help="directory containing the reports (default: charts)",
+    )
+    parser.add_argument(
+        "--ocp-version-range",
+        default=os.environ.get("OCP_VERSION_RANGE"),
+        help="range of supported OCP versions (default: $OCP_VERSION_RANGE)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of processes (default: number of CPUs)",
+    )
+    parser.add_argument("--json", dest="json_path", help="write a JSON summary")
+    parser.add_argument("--junit", dest="junit_path", help="write a JUnit XML summary")
+    args = parser.parse_args()
+
+    if not args.ocp_version_range:
+        print("[ERROR] --ocp-version-range or OCP_VERSION_RANGE must be set")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    report_paths = find_reports(args.charts_dir)
+    print(f"[INFO] Validating {len(report_paths)} reports in {args.charts_dir}")
+    results = validate_reports(report_paths, args.ocp_version_range, args.workers)
+    summary = get_summary(results, time.perf_counter() - start)
+
+    for result in results:
+        if not result["valid"]:
+            print(f"[ERROR] {result['report']}: {result['message']}")
+    print(
+        f"[INFO] {summary['total'] - summary['failed']}/{summary['total']} reports are valid ({summary['duration']:.2f}s)"
+    )
+
+    if args.json_path:
+        write_json_summary(summary, args.json_path)
+    if args.junit_path:
+        write_junit_summary(summary, args.junit_path)
+
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
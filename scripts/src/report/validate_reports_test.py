@@ -0,0 +1,78 @@
+import json
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from report import report_info, validate_reports
+
+TEST_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tests", "data"
+)
+
+
+@pytest.fixture(autouse=True)
+def native_report_info(monkeypatch, tmp_path):
+    monkeypatch.setenv("REPORT_INFO_BACKEND", "native")
+    monkeypatch.setenv("REPORT_INFO_CACHE_DIR", str(tmp_path / "cache"))
+
+
+def test_find_reports():
+    report_paths = validate_reports.find_reports(os.path.join(TEST_DATA_DIR, "common"))
+    assert [os.path.relpath(p, TEST_DATA_DIR) for p in report_paths] == [
+        "common/community/report.yaml",
+        "common/partner/report.yaml",
+        "common/redhat/report.yaml",
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_reports(workers, tmp_path):
+    report_paths = validate_reports.find_reports(os.path.join(TEST_DATA_DIR, "common"))
+    report_paths.append(str(tmp_path / "missing" / "report.yaml"))
+
+    results = validate_reports.validate_reports(
+        report_paths, ">=4.2", workers=workers, chunk_size=1
+    )
+
+    assert [result["report"] for result in results] == report_paths
+    assert [result["valid"] for result in results] == [True, True, True, False]
+    assert results[3]["message"].startswith("Report is not valid yaml")
+    assert all(result["duration"] >= 0 for result in results)
+
+
+def test_validate_report_info_error(monkeypatch):
+    """The error log of report_info tells why a report failed."""
+    monkeypatch.delenv("REPORT_INFO_BACKEND", raising=False)
+    monkeypatch.delenv("VERIFIER_IMAGE", raising=False)
+    monkeypatch.setattr(report_info.shutil, "which", lambda name: None)
+    report_path = os.path.join(TEST_DATA_DIR, "common", "partner", "report.yaml")
+
+    result = validate_reports.validate_report(report_path, ">=4.2")
+
+    assert not result["valid"]
+    assert result["message"].startswith(
+        "Failed to get report info: [ERROR] chart-verifier is not available"
+    )
+
+
+def test_write_summaries(tmp_path):
+    results = [
+        {"report": "a/report.yaml", "valid": True, "message": "", "duration": 0.1},
+        {"report": "b/report.yaml", "valid": False, "message": "bad", "duration": 0.2},
+    ]
+    for result in results:
+        result["output"] = "[INFO] some output\n"
+    summary = validate_reports.get_summary(results, 0.3)
+
+    validate_reports.write_json_summary(summary, tmp_path / "summary.json")
+    with open(tmp_path / "summary.json") as fd:
+        assert json.load(fd)["failed"] == 1
+
+    validate_reports.write_junit_summary(summary, tmp_path / "summary.xml")
+    testsuite = ET.parse(tmp_path / "summary.xml").getroot()
+    assert testsuite.get("tests") == "2"
+    assert testsuite.get("failures") == "1"
+    testcases = testsuite.findall("testcase")
+    assert testcases[0].find("failure") is None
+    assert testcases[1].find("failure").get("message") == "bad"
@@ -23,18 +23,15 @@ A tampered report is only determined if the chart-testing check has passed:
 These are not comprehensive lists - other certification checks will preform further checks
 """
 
+import functools
+import os
 import sys
 
 import semantic_version
-import yaml
-
-try:
-    from yaml import CSafeLoader as SafeLoader
-except ImportError:
-    from yaml import SafeLoader
 
 sys.path.append("../")
 from report import report_info
+from tools import yamlio
 
 MIN_SUPPORTED_OPENSHIFT_VERSION = semantic_version.SimpleSpec(">=4.1.0")
 TESTED_VERSION_ANNOTATION = "charts.openshift.io/testedOpenShiftVersion"
@@ -43,10 +40,102 @@ SUPPORTED_VERSIONS_ANNOTATION = "charts.openshift.io/supportedOpenShiftVersions"
 KUBE_VERSION_ATTRIBUTE = "kubeVersion"
 
 
+# Parsed reports, keyed by absolute path. Each entry also records the size and
+# modification time of the file, so that a modified report is parsed again.
+_parsed_reports = {}
+
+
 class ConfigKeyMissing(Exception):
     pass
 
 
+class ParsedReport(dict):
+    """The content of a report.yaml file, indexed for fast lookups.
+
+    A ParsedReport is the dict loaded from report.yaml, so it can be passed wherever the
+    report data is expected. The result of each check is indexed by the check name
+    without its version (e.g. "/chart-testing"), and the values of the tool metadata
+    are extracted once, on first access.
+
+    Instances are shared between callers through get_report_data and must not be
+    modified.
+    """
+
+    def __init__(self, report_content):
+        super().__init__(report_content)
+
+        self.checks = {}
+        results = self.get("results")
+        if isinstance(results, list):
+            for result in results:
+                try:
+                    check_suffix = "/" + result["check"].split("/")[-1]
+                except (KeyError, TypeError, AttributeError):
+                    continue
+                self.checks.setdefault(
+                    check_suffix,
+                    (result.get("outcome") == "PASS", result.get("reason")),
+                )
+
+    @functools.cached_property
+    def profile_version(self):
+        return _get_profile_version(self)
+
+    @functools.cached_property
+    def package_digest(self):
+        return _get_digest(self, "package")
+
+    @functools.cached_property
+    def public_key_digest(self):
+        return _get_digest(self, "publicKey")
+
+    @functools.cached_property
+    def _web_catalog_only(self):
+        return _get_web_catalog_only(self)
+
+    def get_result(self, check_name):
+        """See get_result."""
+        if check_name in self.checks:
+            return self.checks[check_name]
+        return _find_result(self, check_name)
+
+    def get_web_catalog_only(self, raise_if_missing=False):
+        """See get_web_catalog_only."""
+        web_catalog_only, key_found = self._web_catalog_only
+        if not key_found and raise_if_missing:
+            raise ConfigKeyMissing(
+                "Neither webCatalogOnly nor providerControlledDelivery keys were set"
+            )
+        return web_catalog_only
+
+
+def get_parsed_report(report_path):
+    """Load report.yaml, reusing the result of a previous load if the file is unchanged.
+
+    Args:
+        report_path (str): Path to the report.yaml file.
+
+    Returns:
+        ParsedReport: The report content. Reports that do not contain a YAML mapping
+                      are returned as loaded.
+
+    Raises:
+        OSError: if the report cannot be read.
+        yaml.YAMLError: if the report is not valid YAML.
+    """
+    abs_path = os.path.abspath(report_path)
+    stat = os.stat(abs_path)
+    cache_entry = _parsed_reports.get(abs_path)
+    if cache_entry and cache_entry[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cache_entry[2]
+
+    report_content = yamlio.load_file(abs_path)
+    if isinstance(report_content, dict):
+        report_content = ParsedReport(report_content)
+        _parsed_reports[abs_path] = (stat.st_size, stat.st_mtime_ns, report_content)
+    return report_content
+
+
 def get_report_data(report_path):
     """Load and returns the report data contained in report.yaml
 
@@ -55,12 +144,10 @@ def get_report_data(report_path):
 
     Returns:
         (bool, dict): A boolean indicating if the loading was successfull and the
-                      content of the report.yaml file.
+                      content of the report.yaml file, as a ParsedReport.
     """
     try:
-        with open(report_path) as report_data:
-            report_content = yaml.load(report_data, Loader=SafeLoader)
-        return True, report_content
+        return True, get_parsed_report(report_path)
     except Exception as err:
         print(f"Exception 2 loading file: {err}")
         return False, ""
@@ -77,6 +164,12 @@ def get_result(report_data, check_name):
         (bool, str): a boolean to True if the test passed, false otherwise
                      and the corresponding "reason" field.
     """
+    if isinstance(report_data, ParsedReport):
+        return report_data.get_result(check_name)
+    return _find_result(report_data, check_name)
+
+
+def _find_result(report_data, check_name):
     outcome = False
     reason = "Not Found"
     for result in report_data["results"]:
@@ -101,6 +194,12 @@ def get_signature_is_valid_result(report_data):
 
 
 def get_profile_version(report_data):
+    if isinstance(report_data, ParsedReport):
+        return report_data.profile_version
+    return _get_profile_version(report_data)
+
+
+def _get_profile_version(report_data):
     profile_version = "1.1"
     try:
         profile_version = report_data["metadata"]["tool"]["profile"]["version"][1:]
@@ -122,6 +221,19 @@ def get_web_catalog_only(report_data, raise_if_missing=False):
         ConfigKeyMissing: if the key is not found in OWNERS and raise_if_missing is set to True
 
     """
+    if isinstance(report_data, ParsedReport):
+        return report_data.get_web_catalog_only(raise_if_missing)
+
+    web_catalog_only, keyFound = _get_web_catalog_only(report_data)
+    if not keyFound and raise_if_missing:
+        raise ConfigKeyMissing(
+            "Neither webCatalogOnly nor providerControlledDelivery keys were set"
+        )
+
+    return web_catalog_only
+
+
+def _get_web_catalog_only(report_data):
     keyFound = False
     web_catalog_only = False
     try:
@@ -139,24 +251,13 @@ def get_web_catalog_only(report_data, raise_if_missing=False):
         )
         pass
 
-    if not keyFound and raise_if_missing:
-        raise ConfigKeyMissing(
-            "Neither webCatalogOnly nor providerControlledDelivery keys were set"
-        )
-
-    return web_catalog_only
+    return web_catalog_only, keyFound
 
 
 def get_package_digest(report_data):
-    package_digest = None
-    try:
-        digests = report_data["metadata"]["tool"]["digests"]
-        if "package" in digests:
-            package_digest = digests["package"]
-    except Exception as err:
-        print(f"Exception getting package digest {err=}, {type(err)=}")
-        pass
-    return package_digest
+    if isinstance(report_data, ParsedReport):
+        return report_data.package_digest
+    return _get_digest(report_data, "package")
 
 
 def get_public_key_digest(report_data):
@@ -168,15 +269,21 @@ def get_public_key_digest(report_data):
     Returns:
         str: The public key digest from report.yaml. Set to None if not found.
     """
-    public_key_digest = None
+    if isinstance(report_data, ParsedReport):
+        return report_data.public_key_digest
+    return _get_digest(report_data, "publicKey")
+
+
+def _get_digest(report_data, digest_name):
+    digest = None
     try:
         digests = report_data["metadata"]["tool"]["digests"]
-        if "publicKey" in digests:
-            public_key_digest = digests["publicKey"]
+        if digest_name in digests:
+            digest = digests[digest_name]
     except Exception as err:
-        print(f"Exception getting publicKey digest {err=}, {type(err)=}")
+        print(f"Exception getting {digest_name} digest {err=}, {type(err)=}")
         pass
-    return public_key_digest
+    return digest
 
 
 def report_is_valid(report_data):
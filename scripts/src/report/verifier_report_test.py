@@ -0,0 +1,68 @@
+import os
+import shutil
+
+import pytest
+
+from report import verifier_report
+
+TEST_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tests", "data"
+)
+
+
+@pytest.fixture
+def report_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(verifier_report, "_parsed_reports", {})
+    path = tmp_path / "report.yaml"
+    shutil.copy(
+        os.path.join(TEST_DATA_DIR, "HC-10/signed_chart/report/partner/report.yaml"),
+        path,
+    )
+    return str(path)
+
+
+def test_parsed_report_accessors(report_path):
+    found, report_data = verifier_report.get_report_data(report_path)
+    assert found
+    assert isinstance(report_data, verifier_report.ParsedReport)
+
+    assert verifier_report.get_chart_testing_result(report_data)[0]
+    _, reason = verifier_report.get_signature_is_valid_result(report_data)
+    assert "Chart is signed" in reason
+    assert verifier_report.get_result(report_data, "/no-such-check") == (
+        False,
+        "Not Found",
+    )
+    assert verifier_report.get_profile_version(report_data) == "1.2"
+    assert verifier_report.get_web_catalog_only(report_data) is False
+    assert verifier_report.get_package_digest(report_data).startswith("6fb1fea4")
+    assert verifier_report.get_public_key_digest(report_data).startswith("678b498c")
+
+    # Same results as with the plain report content
+    plain_data = dict(report_data)
+    for check in report_data.checks:
+        assert (
+            verifier_report.get_result(plain_data, check) == report_data.checks[check]
+        )
+
+
+def test_report_is_parsed_once(report_path):
+    _, first = verifier_report.get_report_data(report_path)
+    _, second = verifier_report.get_report_data(report_path)
+    assert first is second
+
+
+def test_modified_report_is_parsed_again(report_path):
+    _, first = verifier_report.get_report_data(report_path)
+    with open(report_path, "a") as fd:
+        fd.write("\n# modified\n")
+    _, second = verifier_report.get_report_data(report_path)
+
+    assert first is not second
+    assert first == second
+
+
+def test_invalid_report(tmp_path):
+    path = tmp_path / "report.yaml"
+    path.write_text("results: [\n")
+    assert verifier_report.get_report_data(str(path)) == (False, "")
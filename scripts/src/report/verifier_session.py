@@ -0,0 +1,126 @@
+"""Long-lived chart-verifier containers, used when VERIFIER_IMAGE is set.
+
+Starting a container is by far the most expensive part of a chart-verifier query. A
+VerifierSession starts a single container for a report directory and runs every
+subsequent chart-verifier command in it using exec, instead of running a new container
+for each command. Sessions are stopped and removed at interpreter exit.
+"""
+
+import atexit
+
+import docker
+
+# Location of the chart-verifier binary in the verifier image, which is otherwise the
+# image's entrypoint.
+VERIFIER_BINARY = "/app/chart-verifier"
+CHARTS_MOUNT_POINT = "/charts/"
+
+# Active sessions, keyed by (image, report directory).
+_sessions = {}
+
+
+class VerifierSessionError(Exception):
+    pass
+
+
+class VerifierSession:
+    """A chart-verifier container with a report directory mounted on /charts/.
+
+    Args:
+        client (docker.DockerClient): Client used to manage the container.
+        image (str): The chart-verifier image.
+        report_directory (str): Absolute path to the directory to mount.
+    """
+
+    def __init__(self, client, image, report_directory):
+        self.client = client
+        self.image = image
+        self.report_directory = report_directory
+        self.container = None
+
+    def start(self):
+        """Start the container, kept alive until close() is called."""
+        if self.container is not None:
+            return
+        print(
+            f"[INFO] Start verifier container using image: {self.image}, report directory: {self.report_directory}"
+        )
+        try:
+            self.container = self.client.containers.run(
+                self.image,
+                ["infinity"],
+                entrypoint="sleep",
+                detach=True,
+                volumes={
+                    self.report_directory: {"bind": CHARTS_MOUNT_POINT, "mode": "rw"}
+                },
+            )
+        except docker.errors.DockerException as err:
+            raise VerifierSessionError(
+                f"Failed to start verifier container: {err}"
+            ) from err
+
+    def run(self, args):
+        """Run chart-verifier in the container.
+
+        Args:
+            args (list): Arguments to pass to chart-verifier.
+
+        Returns:
+            str: The combined stdout and stderr of the command.
+
+        Raises:
+            VerifierSessionError: if the command couldn't be executed.
+        """
+        self.start()
+        print(f"[INFO] Call chart-verifier in container, command: {' '.join(args)}")
+        try:
+            # Only stdout holds the output, the logs of chart-verifier go to stderr.
+            exit_code, (stdout, stderr) = self.container.exec_run(
+                [VERIFIER_BINARY, *args], demux=True
+            )
+        except docker.errors.DockerException as err:
+            raise VerifierSessionError(f"Failed to run chart-verifier: {err}") from err
+        if exit_code != 0:
+            print(f"[WARNING] chart-verifier exited with code {exit_code}")
+            if stderr:
+                print(stderr.decode("utf-8", errors="replace"))
+        return (stdout or b"").decode("utf-8")
+
+    def close(self):
+        """Stop and remove the container, if started."""
+        if self.container is None:
+            return
+        container, self.container = self.container, None
+        try:
+            container.remove(force=True)
+        except docker.errors.DockerException as err:
+            print(f"[WARNING] Failed to remove verifier container: {err}")
+
+
+def get_session(image, report_directory, client=None):
+    """Get the session for a report directory, creating it on first use.
+
+    Args:
+        image (str): The chart-verifier image.
+        report_directory (str): Absolute path to the directory containing the report.
+        client (docker.DockerClient): Client to use when creating the session. Defaults
+            to docker.from_env().
+
+    Returns:
+        VerifierSession: the session, shared with other callers.
+    """
+    key = (image, report_directory)
+    if key not in _sessions:
+        _sessions[key] = VerifierSession(
+            client or docker.from_env(), image, report_directory
+        )
+    return _sessions[key]
+
+
+@atexit.register
+def close_sessions():
+    """Stop all verifier containers."""
+    while _sessions:
+        _, session = _sessions.popitem()
+        session.close()
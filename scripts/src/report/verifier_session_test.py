@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from report import report_info, verifier_session
+
+
+class FakeContainer:
+    def __init__(self, output):
+        self.output = output
+        self.commands = []
+        self.removed = False
+
+    def exec_run(self, cmd, demux=False):
+        assert demux
+        self.commands.append(cmd)
+        return 0, (self.output, b"level=info msg=verifier log line\n")
+
+    def remove(self, force=False):
+        self.removed = True
+
+
+class FakeContainers:
+    def __init__(self, output):
+        self.output = output
+        self.started = []
+
+    def run(self, image, command, **kwargs):
+        container = FakeContainer(self.output)
+        self.started.append((image, kwargs["volumes"], container))
+        return container
+
+
+class FakeDockerClient:
+    def __init__(self, output=b""):
+        self.containers = FakeContainers(output)
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    client = FakeDockerClient(
+        json.dumps({"results": {"passed": "1", "failed": "0", "message": []}}).encode()
+    )
+    monkeypatch.setattr(verifier_session, "_sessions", {})
+    monkeypatch.setattr(verifier_session.docker, "from_env", lambda: client)
+    return client
+
+
+def test_session_starts_one_container(fake_client):
+    session = verifier_session.get_session("verifier:main", "/tmp/reports")
+    for _ in range(10):
+        session.run(["report", "all", "/charts/report.yaml"])
+
+    assert len(fake_client.containers.started) == 1
+    image, volumes, container = fake_client.containers.started[0]
+    assert image == "verifier:main"
+    assert volumes == {"/tmp/reports": {"bind": "/charts/", "mode": "rw"}}
+    assert len(container.commands) == 10
+    assert container.commands[0][0] == verifier_session.VERIFIER_BINARY
+
+
+def test_sessions_per_report_directory(fake_client):
+    first = verifier_session.get_session("verifier:main", "/tmp/reports-1")
+    assert verifier_session.get_session("verifier:main", "/tmp/reports-1") is first
+    second = verifier_session.get_session("verifier:main", "/tmp/reports-2")
+    first.run(["version"])
+    second.run(["version"])
+
+    assert len(fake_client.containers.started) == 2
+
+    verifier_session.close_sessions()
+    assert all(c.removed for _, _, c in fake_client.containers.started)
+    assert verifier_session._sessions == {}
+
+
+def test_report_info_uses_session(fake_client, monkeypatch, tmp_path):
+    report_path = tmp_path / "report.yaml"
+    report_path.write_text("apiversion: v1\nkind: verify-report\n")
+    monkeypatch.setenv("VERIFIER_IMAGE", "verifier:main")
+    monkeypatch.setenv("REPORT_INFO_BACKEND", "verifier")
+    monkeypatch.setenv("REPORT_INFO_CACHE_DIR", "")
+    monkeypatch.setattr(report_info, "_report_info_cache", {})
+
+    report_info.get_report_results(str(report_path), "partner", "v1.1")
+    report_info.get_report_results(str(report_path), "community", "v1.1")
+
+    assert len(fake_client.containers.started) == 1
+    _, _, container = fake_client.containers.started[0]
+    assert container.commands[1][1:] == [
+        "report",
+        "all",
+        "/charts/report.yaml",
+        "--set",
+        "profile.vendortype=community,profile.version=v1.1",
+    ]
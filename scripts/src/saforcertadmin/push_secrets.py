@@ -23,21 +23,13 @@ Example Usage:
 import argparse
 import json
 import logging
-import os
 import sys
 from base64 import b64encode
 
-import requests
 from nacl import encoding, public
 
 sys.path.append("../")
-from pullrequest import prartifact
-
-token = os.environ.get("BOT_TOKEN")
-headers = {
-    "Accept": "application/vnd.github.v3+json",
-    "Authorization": f"token {token}",
-}
+from tools import githubclient
 
 logging.basicConfig(level=logging.INFO)
 
@@ -52,9 +44,8 @@ def encrypt(public_key: str, secret_value: str) -> str:
 
 def get_repo_public_key(repo):
     """Get the public key id and key of a github repository"""
-    response = requests.get(
-        f"https://api.github.com/repos/{repo}/actions/secrets/public-key",
-        headers=headers,
+    response = githubclient.get_client().get(
+        f"https://api.github.com/repos/{repo}/actions/secrets/public-key"
     )
     if response.status_code != 200:
         logging.error(
@@ -63,15 +54,6 @@ def get_repo_public_key(repo):
         sys.exit(1)
     response_json = response.json()
 
-    if prartifact.xRateLimit in response.headers:
-        print(
-            f"[DEBUG] {prartifact.xRateLimit} : {response.headers[prartifact.xRateLimit]}"
-        )
-    if prartifact.xRateRemain in response.headers:
-        print(
-            f"[DEBUG] {prartifact.xRateRemain}  : {response.headers[prartifact.xRateRemain]}"
-        )
-
     if "message" in response_json:
         print(f'[ERROR] getting public key: {response_json["message"]}')
         sys.exit(1)
@@ -82,8 +64,8 @@ def get_repo_public_key(repo):
 def get_repo_secrets(repo):
     """Get the list of secret names of a github repository"""
     secret_names = []
-    response = requests.get(
-        f"https://api.github.com/repos/{repo}/actions/secrets", headers=headers
+    response = githubclient.get_client().get(
+        f"https://api.github.com/repos/{repo}/actions/secrets"
     )
     if response.status_code != 200:
         logging.error(
@@ -101,10 +83,9 @@ def get_repo_secrets(repo):
 
 def create_or_update_repo_secrets(repo, secret_name, key_id, encrypted_value):
     """Create or update a github repository secret"""
-    response = requests.put(
+    response = githubclient.get_client().put(
         f"https://api.github.com/repos/{repo}/actions/secrets/{secret_name}",
         json={"key_id": key_id, "encrypted_value": encrypted_value},
-        headers=headers,
     )
     if response.status_code != 201 and response.status_code != 204:
         logging.error(
@@ -41,6 +41,10 @@ def get_verifier_flags(tar_file, owners_file, temp_dir):
 
 def is_chart_signed(api_url, report_path):
     if api_url:
+        s = prartifact.get_submission(api_url)
+        if s is not None:
+            return bool(s.tarball.found and s.tarball.provenance)
+
         files = prartifact.get_modified_files(api_url)
         tgz_pattern = re.compile(
             matchers.submission_path_matcher(strict_categories=False) + r".*.tgz"
@@ -1,24 +1,17 @@
 import os
 import re
-import requests
 import semver
 import yaml
 
-try:
-    from yaml import CLoader as Loader
-except ImportError:
-    from yaml import Loader
-
 from dataclasses import dataclass, field
 
+from indexfile import helmindex, indexcache, shards, sidecar
 from owners import owners_file
-from tools import gitutils
+from pullrequest import prsnapshot
+from tools import githubclient, yamlio
 from reporegex import matchers
 from report import verifier_report
 
-xRateLimit = "X-RateLimit-Limit"
-xRateRemain = "X-RateLimit-Remaining"
-
 
 class SubmissionError(Exception):
     """Root Exception for handling any error with the submission"""
@@ -133,11 +126,11 @@ class Chart:
     def get_release_tag(self) -> str:
         return f"{self.organization}-{self.name}-{self.version}"
 
-    def check_index(self, index: dict):
+    def check_index(self, index: dict | helmindex.HelmIndex):
         """Check if the chart is present in the Helm index
 
         Args:
-            index (dict): Content of the Helm repo index
+            index (dict | HelmIndex): Content of the Helm repo index
 
         Raise:
             HelmIndexError if:
@@ -145,15 +138,15 @@ class Chart:
             * The Chart is already present in the index
 
         """
-        try:
-            chart_entry = index["entries"].get(self.name, [])
-        except KeyError as e:
-            raise HelmIndexError(f"Malformed index {index}") from e
+        if not isinstance(index, helmindex.HelmIndex):
+            try:
+                index = helmindex.HelmIndex(index)
+            except helmindex.MalformedIndexError as e:
+                raise HelmIndexError(str(e)) from e
 
-        for chart in chart_entry:
-            if chart["version"] == self.version:
-                msg = f"[ERROR] Helm chart release already exists in the index.yaml: {self.version}"
-                raise HelmIndexError(msg)
+        if index.has_version(self.name, self.version):
+            msg = f"[ERROR] Helm chart release already exists in the index.yaml: {self.version}"
+            raise HelmIndexError(msg)
 
     def check_release_tag(self, repository: str):
         """Check for the existence of the chart's release tag on the provided repository.
@@ -167,12 +160,8 @@ class Chart:
         """
         tag_name = self.get_release_tag()
         tag_api = f"https://api.github.com/repos/{repository}/git/ref/tags/{tag_name}"
-        headers = {
-            "Accept": "application/vnd.github.v3+json",
-            "Authorization": f'Bearer {os.environ.get("BOT_TOKEN")}',
-        }
         print(f"[INFO] checking tag: {tag_api}")
-        r = requests.head(tag_api, headers=headers)
+        r = githubclient.get_client().head(tag_api)
         if r.status_code == 200:
             msg = f"[ERROR] Helm chart release already exists in the GitHub Release/Tag: {tag_name}"
             raise ReleaseTagError(msg)
@@ -254,39 +243,11 @@ class Submission:
     def _get_modified_files(self):
         """Query the GitHub API in order to retrieve the list of files that are added / modified by
         this PR"""
-        page_number = 1
-        max_page_size, page_size = 100, 100
-        files_api_url = re.sub(r"^https://api\.github\.com/", "", self.api_url)
-
-        while page_size == max_page_size:
-            files_api_query = (
-                f"{files_api_url}/files?per_page={page_size}&page={page_number}"
-            )
-            print(f"[INFO] Query files : {files_api_query}")
-
-            try:
-                r = gitutils.github_api(
-                    "get", files_api_query, os.environ.get("BOT_TOKEN")
-                )
-            except SystemExit as e:
-                raise SubmissionError(e)
-
-            files = r.json()
-            page_size = len(files)
-            page_number += 1
-
-            if xRateLimit in r.headers:
-                print(f"[DEBUG] {xRateLimit} : {r.headers[xRateLimit]}")
-            if xRateRemain in r.headers:
-                print(f"[DEBUG] {xRateRemain}  : {r.headers[xRateRemain]}")
-
-            if "message" in files:
-                msg = f'[ERROR] getting pr files: {files["message"]}'
-                raise SubmissionError(msg)
-            else:
-                for file in files:
-                    if "filename" in file:
-                        self.modified_files.append(file["filename"])
+        try:
+            snapshot = prsnapshot.get_pr_snapshot(self.api_url)
+        except prsnapshot.PRSnapshotError as e:
+            raise SubmissionError(f"[ERROR] getting pr files: {e}") from e
+        self.modified_files.extend(snapshot.files)
 
     def parse_modified_files(self):
         """Classify the list of modified files.
@@ -594,11 +555,18 @@ def get_file_type(file_path: str) -> tuple[str, re.Match[str]]:
     return "unknown", None
 
 
+def _get_index_url(repository: str, branch: str) -> str:
+    return githubclient.get_raw_url(repository, branch, "index.yaml")
+
+
 def download_index_data(
     repository: str, branch: str = "gh-pages", ignore_missing: bool = False
 ) -> dict:
     """Download the helm repository index
 
+    The index is loaded from its JSON sidecar if it matches index.yaml, see sidecar.
+    Downloads go through the local index cache, see indexcache.
+
     Args:
         repository (str): Name of the GitHub repository to download the index file from.
                             (e.g. "openshift-helm-charts/charts")
@@ -615,17 +583,51 @@ def download_index_data(
         HelmIndexError if the index file is not valid YAML.
 
     """
-    index_url = f"https://raw.githubusercontent.com/{repository}/{branch}/index.yaml"
-    r = requests.get(index_url)
+    index_url = _get_index_url(repository, branch)
+    index_file, sidecar_text = indexcache.get_index_files(index_url)
 
     data = {"apiVersion": "v1", "entries": {}}
-    if r.status_code != 200:
+    if not index_file.ok:
         if not ignore_missing:
             raise HelmIndexError(f"Error retrieving index file at {index_url}")
     else:
         try:
-            data = yaml.load(r.text, Loader=Loader)
+            data = sidecar.load_index(
+                index_file.text, sidecar_text, loader=yamlio.Loader
+            )
         except yaml.YAMLError as e:
             raise HelmIndexError(f"Error parsing index file at {index_url}") from e
 
     return data
+
+
+def download_index_entry(
+    repository: str,
+    entry: str,
+    branch: str = "gh-pages",
+    ignore_missing: bool = False,
+) -> dict:
+    """Download the part of the helm repository index holding a single entry
+
+    Only the shard of the entry is downloaded if the index is sharded (see shards).
+    Otherwise, falls back to downloading the whole index, see download_index_data.
+
+    Args:
+        repository (str): Name of the GitHub repository to download the index file from.
+                            (e.g. "openshift-helm-charts/charts")
+        entry (str): Name of the index entry (i.e. the chart name).
+        branch (str): GitHub branch to download the index file from. Defaults to "gh-pages".
+        ignore_missing (bool): See download_index_data.
+
+    Returns:
+        dict: A helm repository index, holding at least the given entry if it exists.
+
+    Raise:
+        HelmIndexError: See download_index_data.
+
+    """
+    try:
+        return shards.fetch_entry_index(_get_index_url(repository, branch), entry)
+    except shards.ShardError as e:
+        print(f"[INFO] Index shards not available, using the whole index: {e}")
+    return download_index_data(repository, branch, ignore_missing)
@@ -15,6 +15,7 @@ import tempfile
 
 from dataclasses import dataclass, field
 
+from pullrequest import prsnapshot
 from submission import submission
 
 # Define assets that are being reused accross tests
@@ -246,12 +247,19 @@ scenarios_submission_init = [
 ]
 
 
+@pytest.fixture(autouse=True)
+def clear_pr_snapshots(monkeypatch):
+    monkeypatch.setattr(prsnapshot, "_snapshots", {})
+    monkeypatch.delenv("BOT_TOKEN", raising=False)
+
+
 @pytest.mark.parametrize("test_scenario", scenarios_submission_init)
 @responses.activate
 def test_submission_init(test_scenario):
     """Test the instantiation of a Submission in different scenarios"""
 
     # Mock GitHub API
+    responses.get(test_scenario.api_url, json={"number": 1})
     responses.get(
         f"{test_scenario.api_url}/files",
         json=[{"filename": file} for file in test_scenario.modified_files],
@@ -272,7 +280,7 @@ def test_submission_not_exist():
     )
 
     responses.get(
-        f"{api_url_doesnt_exist}/files",
+        api_url_doesnt_exist,
         json={
             "message": "Not Found",
             "documentation_url": "https://docs.github.com/rest/pulls/pulls#list-pull-requests-files",
@@ -63,8 +63,8 @@ def craft_pr_content_error_msg(
             return msg
 
     try:
-        index = submission.download_index_data(
-            repository, ignore_missing=ignore_missing_helm_index
+        index = submission.download_index_entry(
+            repository, s.chart.name, ignore_missing=ignore_missing_helm_index
         )
     except submission.HelmIndexError as e:
         return str(e)
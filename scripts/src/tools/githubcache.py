@@ -0,0 +1,158 @@
+"""Persistent cache of the responses of GitHub REST API reads.
+
+The body of successful GET responses is persisted on disk along with their validators
+(ETag and Last-Modified) and the headers needed to use them (e.g. Link, for
+pagination). Later requests for the same URL are conditional: if GitHub answers 304 Not
+Modified, which doesn't count against the rate limit, the cached response is used.
+
+Entries are keyed by URL and by token, so that responses are never shared between
+tokens with different permissions. The least recently used entries are evicted when
+the total size of the cache goes above a limit.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_SIZE = 50 * 1024 * 1024
+CACHED_HEADERS = ("Content-Type", "Link", "ETag", "Last-Modified")
+
+
+class ResponseCache:
+    """On-disk cache of API responses, with least recently used eviction.
+
+    Each entry is a JSON file holding the body, status, validators and headers of a
+    response. The modification time of the file records its last use.
+
+    Args:
+        cache_dir (str): Directory in which the entries are stored.
+        max_size (int): Total size in bytes above which the least recently used entries
+            are removed.
+    """
+
+    def __init__(self, cache_dir, max_size=DEFAULT_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def _entry_path(self, url, authorization):
+        key = f"{url}\n{authorization or ''}"
+        return os.path.join(
+            self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json"
+        )
+
+    def get(self, url, authorization=None):
+        """Get the cache entry for url, or None if there is none."""
+        entry_path = self._entry_path(url, authorization)
+        try:
+            with open(entry_path) as fd:
+                entry = json.load(fd)
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url:
+            return None
+        return entry
+
+    def put(self, url, response, authorization=None):
+        """Store a response for url, evicting old entries if needed."""
+        entry = {
+            "url": url,
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                name: response.headers[name]
+                for name in CACHED_HEADERS
+                if name in response.headers
+            },
+            "body": response.text,
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as tmp_file:
+                json.dump(entry, tmp_file)
+            os.replace(tmp_path, self._entry_path(url, authorization))
+        except OSError as err:
+            print(f"[WARNING] Failed to cache {url} in {self.cache_dir}: {err}")
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in max_size."""
+        try:
+            entries = [
+                (entry, entry.stat())
+                for entry in os.scandir(self.cache_dir)
+                if entry.name.endswith(".json")
+            ]
+            total_size = sum(stat.st_size for _, stat in entries)
+            entries.sort(key=lambda entry: entry[1].st_mtime_ns)
+            for entry, stat in entries:
+                if total_size <= self.max_size:
+                    break
+                os.remove(entry.path)
+                total_size -= stat.st_size
+        except OSError as err:
+            print(f"[WARNING] Failed to evict responses from {self.cache_dir}: {err}")
+
+
+def get_response_cache():
+    """Get the cache configured by the environment.
+
+    GITHUB_API_CACHE_DIR sets the location of the cache, set it to an empty string to
+    disable the cache. GITHUB_API_CACHE_SIZE sets its maximum size in bytes.
+
+    Returns:
+        ResponseCache: The cache, or None if disabled.
+    """
+    cache_dir = os.environ.get(
+        "GITHUB_API_CACHE_DIR", os.path.join(tempfile.gettempdir(), "github-api-cache")
+    )
+    if not cache_dir:
+        return None
+    max_size = int(os.environ.get("GITHUB_API_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+    return ResponseCache(cache_dir, max_size)
+
+
+def get_conditional_headers(entry):
+    """Get the headers making a request conditional on the validators of entry."""
+    headers = {}
+    if entry["headers"].get("ETag"):
+        headers["If-None-Match"] = entry["headers"]["ETag"]
+    if entry["headers"].get("Last-Modified"):
+        headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+    return headers
+
+
+def is_cacheable(response):
+    """Whether response can be cached, i.e. it is successful and has a validator."""
+    return response.status_code == 200 and (
+        "ETag" in response.headers or "Last-Modified" in response.headers
+    )
+
+
+def make_cached_response(entry, not_modified):
+    """Build the response to return for a 304 Not Modified response.
+
+    Args:
+        entry (dict): The cache entry confirmed by the 304 response.
+        not_modified (requests.Response): The 304 response, whose headers (e.g. rate
+            limit) take precedence over the cached ones.
+
+    Returns:
+        requests.Response: The cached response.
+    """
+    response = requests.Response()
+    response.status_code = entry["status_code"]
+    response.reason = entry["reason"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response.headers.update(not_modified.headers)
+    response._content = entry["body"].encode("utf-8")
+    response.encoding = "utf-8"
+    response.url = not_modified.url
+    response.request = not_modified.request
+    return response
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+import responses
+from responses import matchers
+
+from tools import githubcache, githubclient
+
+api_url = "https://api.github.com/repos/org/repo/pulls/42"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("BOT_TOKEN", "secret")
+    cache = githubcache.ResponseCache(str(tmp_path))
+    return githubclient.GitHubClient(max_retries=0, cache=cache)
+
+
+@responses.activate
+def test_not_modified_response_is_served_from_cache(client):
+    responses.get(api_url, json={"merged": False}, headers={"ETag": '"v1"'})
+    responses.get(
+        api_url,
+        status=304,
+        headers={"ETag": '"v1"', "X-RateLimit-Remaining": "4999"},
+        match=[matchers.header_matcher({"If-None-Match": '"v1"'})],
+    )
+
+    assert client.get(api_url).json() == {"merged": False}
+    response = client.get(api_url)
+
+    assert response.status_code == 200
+    assert response.json() == {"merged": False}
+    assert response.headers["X-RateLimit-Remaining"] == "4999"
+    stats = client.stats["GET /repos/{owner}/{repo}/pulls/{n}"]
+    assert (stats.cache_hits, stats.cache_misses) == (1, 1)
+
+
+@responses.activate
+def test_modified_response_replaces_cache_entry(client):
+    responses.get(api_url, json={"merged": False}, headers={"ETag": '"v1"'})
+    responses.get(api_url, json={"merged": True}, headers={"ETag": '"v2"'})
+
+    client.get(api_url)
+    assert client.get(api_url).json() == {"merged": True}
+
+    entry = client.cache.get(api_url, "Bearer secret")
+    assert entry["headers"]["ETag"] == '"v2"'
+    assert client.cache.get(api_url, "Bearer other") is None
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = githubcache.ResponseCache(str(tmp_path))
+    response = githubcache.make_cached_response(
+        {"status_code": 200, "reason": "OK", "headers": {}, "body": "x" * 100},
+        githubcache.requests.Response(),
+    )
+    urls = [f"{api_url}/files?page={page}" for page in range(3)]
+    for age, url in enumerate(urls):
+        cache.put(url, response)
+        os.utime(cache._entry_path(url, None), (100 + age, 100 + age))
+
+    cache.max_size = 2 * os.path.getsize(cache._entry_path(urls[0], None))
+    cache.evict()
+
+    assert len(os.listdir(tmp_path)) == 2
+    assert cache.get(urls[0]) is None
+    assert cache.get(urls[2])["body"] == "x" * 100
@@ -0,0 +1,432 @@
+"""Client for the GitHub REST API, shared by all scripts.
+
+All requests of a process go through a single requests.Session, so connections to
+the API are kept alive and reused. Requests have a timeout, and are retried with an
+exponential backoff:
+
+* On connection errors and 5XX responses, for idempotent methods only, as the request
+  may have been processed. These retries stop once GITHUB_API_MAX_RETRY_TIME seconds
+  have been spent on the request.
+* When rate limited (429, or 403 with Retry-After or no remaining requests), for any
+  method. The delay honors Retry-After, then X-RateLimit-Reset. If the rate limit
+  resets later than GITHUB_API_MAX_WAIT seconds, the response is returned as is.
+
+Before a request is sent, it waits if the rate limit budget is low, see
+githubratelimit. Requests are interactive by default, scripts that crawl the API set
+the priority of the client to githubratelimit.BATCH.
+
+The number of calls and the time spent are recorded per endpoint, and logged at
+interpreter exit.
+
+GET responses are cached on disk and revalidated with conditional requests, see
+githubcache. Cache hits and misses are logged with the other statistics.
+
+get_pages fetches all the pages of a list endpoint: the last page is read from the Link
+header of the first response, and the remaining pages are fetched concurrently.
+
+The API can be replaced by a local stand-in, see githubstandin: full URLs of the
+GitHub API (e.g. the URL of a PR given to a script) are sent to GITHUB_API_URL
+instead, and get_raw_url builds URLs of raw files from GITHUB_RAW_URL.
+
+The token is only sent to the host of the API (GITHUB_API_URL), never to other hosts
+requested with a full URL.
+
+Configuration, from the environment:
+    GITHUB_API_URL: base URL of the API (default: https://api.github.com).
+    GITHUB_RAW_URL: base URL of raw files (default: https://raw.githubusercontent.com).
+    BOT_TOKEN: token used to authenticate to the API, unless the caller sets the
+        Authorization header.
+    GITHUB_API_TIMEOUT: timeout in seconds for connecting and for reading (default: 60).
+    GITHUB_API_MAX_RETRIES: number of retries of a request (default: 5).
+    GITHUB_API_MAX_WAIT: maximum delay in seconds before a retry (default: 120).
+    GITHUB_API_MAX_RETRY_TIME: time in seconds after which connection errors and 5XX
+        responses are no longer retried (default: 60).
+    GITHUB_API_PAGE_WORKERS: number of pages fetched concurrently (default: 8).
+    GITHUB_API_CACHE_DIR, GITHUB_API_CACHE_SIZE: see githubcache.get_response_cache.
+    GITHUB_API_BATCH_RESERVE: see githubratelimit.
+"""
+
+import atexit
+import concurrent.futures
+import os
+import random
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.append("../")
+from tools import githubcache, githubratelimit
+
+GITHUB_BASE_URL = "https://api.github.com"
+GITHUB_RAW_URL = "https://raw.githubusercontent.com"
+POOL_SIZE = 32
+PAGE_SIZE = 100
+RETRY_DELAY = 1
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {500, 502, 503, 504}
+
+# The shared client, see get_client.
+_client = None
+
+
+@dataclass
+class EndpointStats:
+    """Calls made to an endpoint of the API.
+
+    Attributes:
+        calls (int): Number of requests sent, including retries.
+        retries (int): Number of retries.
+        errors (int): Number of requests that failed or got a 4XX or 5XX response.
+        seconds (float): Total time spent in requests.
+        cache_hits (int): Number of GET requests answered from the cache.
+        cache_misses (int): Number of GET requests not answered from the cache.
+    """
+
+    calls: int = 0
+    retries: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+
+def get_endpoint(method, url):
+    """Get the name under which calls to url are recorded, e.g. "GET
+    /repos/{owner}/{repo}/pulls/{n}/files" for any PR of any repository."""
+    path = urlsplit(url).path
+    path = re.sub(r"^/repos/[^/]+/[^/]+", "/repos/{owner}/{repo}", path)
+    path = re.sub(r"/\d+(?=/|$)", "/{n}", path)
+    return f"{method} {path}"
+
+
+def get_last_page(response):
+    """Get the number of the last page of a paginated response, from its Link header.
+
+    Returns:
+        int: The last page, or None if the response has no link to it.
+    """
+    last = response.links.get("last")
+    if not last:
+        return None
+    page = parse_qs(urlsplit(last["url"]).query).get("page")
+    return int(page[0]) if page else None
+
+
+def get_api_url():
+    """Get the base URL of the API, GITHUB_API_URL if set."""
+    return (os.environ.get("GITHUB_API_URL") or GITHUB_BASE_URL).rstrip("/")
+
+
+def get_raw_url(repository, branch, path):
+    """Get the URL of a raw file of a repository, under GITHUB_RAW_URL if set.
+
+    Args:
+        repository (str): Name of the repository, e.g. "openshift-helm-charts/charts".
+        branch (str): Branch, tag or commit.
+        path (str): Path of the file in the repository.
+    """
+    base_url = (os.environ.get("GITHUB_RAW_URL") or GITHUB_RAW_URL).rstrip("/")
+    return f"{base_url}/{repository}/{branch}/{path}"
+
+
+def _get_env_number(name, default):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+class GitHubClient:
+    """Client for the GitHub REST API, see the module documentation.
+
+    Args:
+        base_url (str): URL prepended to the endpoints that are not a full URL, and
+            replacing https://api.github.com in those that are. Defaults to
+            GITHUB_API_URL.
+        timeout (float): Timeout in seconds. Defaults to GITHUB_API_TIMEOUT.
+        max_retries (int): Number of retries. Defaults to GITHUB_API_MAX_RETRIES.
+        max_wait (float): Maximum delay before a retry. Defaults to
+            GITHUB_API_MAX_WAIT.
+        max_retry_time (float): Time after which connection errors and 5XX responses
+            are no longer retried. Defaults to GITHUB_API_MAX_RETRY_TIME.
+        page_workers (int): Number of pages fetched concurrently. Defaults to
+            GITHUB_API_PAGE_WORKERS.
+        cache (githubcache.ResponseCache): Cache of GET responses. Defaults to no
+            cache.
+        priority (str): githubratelimit.INTERACTIVE or githubratelimit.BATCH.
+        session (requests.Session): Session used to send the requests.
+    """
+
+    def __init__(
+        self,
+        base_url=None,
+        timeout=None,
+        max_retries=None,
+        max_wait=None,
+        max_retry_time=None,
+        page_workers=None,
+        cache=None,
+        priority=githubratelimit.INTERACTIVE,
+        session=None,
+    ):
+        self.base_url = (base_url or get_api_url()).rstrip("/")
+        self.timeout = timeout or _get_env_number("GITHUB_API_TIMEOUT", 60)
+        self.max_retries = int(
+            max_retries
+            if max_retries is not None
+            else _get_env_number("GITHUB_API_MAX_RETRIES", 5)
+        )
+        self.max_wait = max_wait or _get_env_number("GITHUB_API_MAX_WAIT", 120)
+        self.max_retry_time = max_retry_time or _get_env_number(
+            "GITHUB_API_MAX_RETRY_TIME", 60
+        )
+        self.page_workers = int(
+            page_workers or _get_env_number("GITHUB_API_PAGE_WORKERS", 8)
+        )
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+        self.cache = cache
+        self.priority = priority
+        self.budget = githubratelimit.RateLimitBudget(max_wait=self.max_wait)
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+
+    def _get_url(self, endpoint):
+        if endpoint.startswith(f"{GITHUB_BASE_URL}/"):
+            return self.base_url + endpoint[len(GITHUB_BASE_URL) :]
+        if re.match(r"^https?://", endpoint):
+            return endpoint
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    def _get_headers(self, url, headers):
+        default_headers = {"Accept": "application/vnd.github.v3+json"}
+        token = os.environ.get("BOT_TOKEN")
+        api_url = urlsplit(self.base_url)
+        url = urlsplit(url)
+        if token and (url.scheme, url.netloc) == (api_url.scheme, api_url.netloc):
+            default_headers["Authorization"] = f"Bearer {token}"
+        return default_headers | (headers or {})
+
+    def _get_rate_limit_delay(self, response):
+        """Get the delay before retrying a rate limited request, or None if the
+        response is not rate limited."""
+        headers = response.headers
+        rate_limited = response.status_code == 429 or (
+            response.status_code == 403
+            and (
+                "Retry-After" in headers or headers.get("X-RateLimit-Remaining") == "0"
+            )
+        )
+        if not rate_limited:
+            return None
+        if headers.get("Retry-After", "").isdigit():
+            return int(headers["Retry-After"])
+        if (
+            headers.get("X-RateLimit-Remaining") == "0"
+            and headers.get("X-RateLimit-Reset", "").isdigit()
+        ):
+            return max(0, int(headers["X-RateLimit-Reset"]) - time.time()) + 1
+        return 0
+
+    def _record(self, endpoint, **increments):
+        with self._stats_lock:
+            stats = self.stats.setdefault(endpoint, EndpointStats())
+            for name, increment in increments.items():
+                setattr(stats, name, getattr(stats, name) + increment)
+
+    def _get_backoff_delay(self, attempt):
+        return RETRY_DELAY * 2**attempt * random.uniform(1, 1.5)
+
+    def request(self, method, endpoint, headers=None, max_retries=None, **kwargs):
+        """Send a request to the API, retrying as described in the module documentation.
+
+        Args:
+            method (str): HTTP method.
+            endpoint (str): Path of the endpoint (e.g. "repos/org/repo/pulls"), or full
+                URL.
+            headers (dict): Headers to add to, or override, the default ones.
+            max_retries (int): Number of retries of this request, e.g. 0 for callers
+                that retry on their own. Defaults to the max_retries of the client.
+            **kwargs: Passed to requests.Session.request (e.g. json, params).
+
+        Returns:
+            requests.Response: The last response received.
+
+        Raises:
+            requests.exceptions.RequestException: if the request could not be sent
+                after all retries.
+        """
+        method = method.upper()
+        url = self._get_url(endpoint)
+        headers = self._get_headers(url, headers)
+        kwargs.setdefault("timeout", self.timeout)
+        endpoint = get_endpoint(method, url)
+        if max_retries is None:
+            max_retries = self.max_retries
+        if method != "GET" or self.cache is None:
+            return self._send(method, url, endpoint, headers, max_retries, kwargs)
+
+        authorization = headers.get("Authorization")
+        cache_url = (
+            requests.Request(method, url, params=kwargs.get("params")).prepare().url
+        )
+        entry = self.cache.get(cache_url, authorization)
+        if entry:
+            headers = githubcache.get_conditional_headers(entry) | headers
+
+        response = self._send(method, url, endpoint, headers, max_retries, kwargs)
+        if entry and response.status_code == 304:
+            self._record(endpoint, cache_hits=1)
+            return githubcache.make_cached_response(entry, response)
+        self._record(endpoint, cache_misses=1)
+        if githubcache.is_cacheable(response):
+            self.cache.put(cache_url, response, authorization)
+        return response
+
+    def _send(self, method, url, endpoint, headers, max_retries, kwargs):
+        resource = githubratelimit.get_resource(url)
+        first_start = time.monotonic()
+        for attempt in range(max_retries + 1):
+            self.budget.wait(resource, self.priority)
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, headers=headers, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                self._record(
+                    endpoint,
+                    calls=1,
+                    retries=int(attempt > 0),
+                    errors=1,
+                    seconds=time.perf_counter() - start,
+                )
+                delay = self._get_backoff_delay(attempt)
+                if (
+                    method not in IDEMPOTENT_METHODS
+                    or attempt == max_retries
+                    or time.monotonic() - first_start + delay > self.max_retry_time
+                ):
+                    raise
+                print(
+                    f"[WARNING] {method} {url} failed, retrying in {delay:.1f}s: {err}"
+                )
+                time.sleep(delay)
+                continue
+
+            self._record(
+                endpoint,
+                calls=1,
+                retries=int(attempt > 0),
+                errors=int(response.status_code >= 400),
+                seconds=time.perf_counter() - start,
+            )
+            self.budget.update(response)
+            if attempt == max_retries:
+                return response
+
+            delay = self._get_rate_limit_delay(response)
+            if delay is not None:
+                delay = max(delay, self._get_backoff_delay(attempt))
+                reason = "rate limited"
+            elif (
+                response.status_code in RETRY_STATUSES and method in IDEMPOTENT_METHODS
+            ):
+                delay = self._get_backoff_delay(attempt)
+                reason = f"got {response.status_code}"
+                if time.monotonic() - first_start + delay > self.max_retry_time:
+                    return response
+            else:
+                return response
+
+            if delay > self.max_wait:
+                print(
+                    f"[WARNING] {method} {url} {reason}, not retrying as it would take {delay:.0f}s"
+                )
+                return response
+            print(f"[WARNING] {method} {url} {reason}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    def get(self, endpoint, **kwargs):
+        return self.request("GET", endpoint, **kwargs)
+
+    def head(self, endpoint, **kwargs):
+        return self.request("HEAD", endpoint, **kwargs)
+
+    def post(self, endpoint, **kwargs):
+        return self.request("POST", endpoint, **kwargs)
+
+    def put(self, endpoint, **kwargs):
+        return self.request("PUT", endpoint, **kwargs)
+
+    def get_pages(self, endpoint, params=None, per_page=PAGE_SIZE):
+        """Get all the pages of a list endpoint.
+
+        The first page is fetched, then the pages up to the last one listed in its Link
+        header are fetched concurrently. If the Link header only gives the next page,
+        pages are fetched one after the other.
+
+        Args:
+            endpoint (str): Path of the endpoint, or full URL, without page parameters.
+            params (dict): Query parameters.
+            per_page (int): Number of items per page.
+
+        Returns:
+            list[requests.Response]: The responses, in page order. Fetching stops at the
+                                     first page that fails, which is the last one.
+        """
+        params = dict(params or {}, per_page=per_page)
+        first = self.get(endpoint, params=dict(params, page=1))
+        if not first.ok:
+            return [first]
+
+        last_page = get_last_page(first)
+        if last_page is None:
+            responses = [first]
+            while responses[-1].ok and "next" in responses[-1].links:
+                responses.append(self.get(responses[-1].links["next"]["url"]))
+            return responses
+
+        with concurrent.futures.ThreadPoolExecutor(self.page_workers) as executor:
+            futures = [
+                executor.submit(self.get, endpoint, params=dict(params, page=page))
+                for page in range(2, last_page + 1)
+            ]
+            responses = [first] + [future.result() for future in futures]
+        for i, response in enumerate(responses):
+            if not response.ok:
+                return responses[: i + 1]
+        return responses
+
+    def print_stats(self):
+        """Print the calls made to each endpoint, and the rate limit budget consumed."""
+        for endpoint, stats in sorted(self.stats.items()):
+            average = stats.seconds / stats.calls if stats.calls else 0
+            message = (
+                f"[INFO] GitHub API {endpoint}: {stats.calls} calls, {stats.retries} retries,"
+                f" {stats.errors} errors, {stats.seconds:.2f}s (average {average:.3f}s)"
+            )
+            cache_reads = stats.cache_hits + stats.cache_misses
+            if cache_reads:
+                message += (
+                    f", {stats.cache_hits}/{cache_reads} cache hits"
+                    f" ({stats.cache_hits / cache_reads:.0%})"
+                )
+            print(message)
+        self.budget.print_summary()
+
+
+def get_client():
+    """Get the client shared by the process, created on first use. Its statistics are
+    printed at interpreter exit."""
+    global _client
+    if _client is None:
+        _client = GitHubClient(cache=githubcache.get_response_cache())
+        atexit.register(_client.print_stats)
+    return _client
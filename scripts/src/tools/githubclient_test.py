@@ -0,0 +1,185 @@
+import time
+
+import pytest
+import requests
+import responses
+from responses import matchers
+
+from tools import githubclient, githubratelimit
+
+api_url = "https://api.github.com/repos/org/repo/pulls/42"
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    delays = []
+    monkeypatch.setattr(githubclient.time, "sleep", delays.append)
+    monkeypatch.setenv("BOT_TOKEN", "secret")
+    return delays
+
+
+@pytest.fixture
+def client():
+    return githubclient.GitHubClient(max_retries=3, max_wait=100)
+
+
+def test_get_endpoint():
+    assert (
+        githubclient.get_endpoint("GET", f"{api_url}/files?page=2")
+        == "GET /repos/{owner}/{repo}/pulls/{n}/files"
+    )
+
+
+@responses.activate
+def test_retry_server_errors(client, no_sleep):
+    responses.get(api_url, status=502)
+    responses.get(api_url, json={"merged": True})
+
+    response = client.get("repos/org/repo/pulls/42")
+
+    assert response.json() == {"merged": True}
+    assert responses.calls[0].request.headers["Authorization"] == "Bearer secret"
+    assert len(no_sleep) == 1
+    stats = client.stats["GET /repos/{owner}/{repo}/pulls/{n}"]
+    assert (stats.calls, stats.retries, stats.errors) == (2, 1, 1)
+
+
+@responses.activate
+def test_retry_time_is_capped(client, no_sleep, monkeypatch):
+    # The clock only moves when the client sleeps.
+    monkeypatch.setattr(githubclient.time, "monotonic", lambda: sum(no_sleep))
+    client.max_retry_time = 5
+    responses.get(api_url, status=502)
+
+    assert client.get(api_url).status_code == 502
+    # Delays of 1-1.5s then 2-3s, the next one (4-6s) would overrun the 5s.
+    assert len(no_sleep) == 2
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_retries_of_a_request(client, no_sleep):
+    responses.get(api_url, status=502)
+
+    assert client.get(api_url, max_retries=0).status_code == 502
+    assert no_sleep == []
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_token_only_sent_to_the_api(client):
+    responses.get(api_url, json={})
+    responses.get("https://example.com/index.yaml", body="entries: {}")
+
+    client.get(api_url)
+    client.get("https://example.com/index.yaml")
+
+    assert responses.calls[0].request.headers["Authorization"] == "Bearer secret"
+    assert "Authorization" not in responses.calls[1].request.headers
+
+
+@responses.activate
+def test_no_retry_of_non_idempotent_requests(client):
+    responses.post(api_url, status=502)
+    responses.post(api_url, body=requests.ConnectionError("reset"))
+
+    assert client.post(api_url, json={}).status_code == 502
+    with pytest.raises(requests.ConnectionError):
+        client.post(api_url, json={})
+
+
+@responses.activate
+def test_retry_rate_limited(client, no_sleep):
+    responses.post(api_url, status=403, headers={"Retry-After": "30"})
+    responses.post(
+        api_url,
+        status=403,
+        headers={
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(int(time.time()) + 60),
+        },
+    )
+    responses.post(api_url, status=201)
+
+    assert client.post(api_url, json={}).status_code == 201
+    assert no_sleep[0] == 30
+    assert 55 < no_sleep[1] <= 62
+
+
+@responses.activate
+def test_rate_limit_reset_too_late(client, no_sleep):
+    responses.get(
+        api_url,
+        status=403,
+        headers={
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+        },
+    )
+
+    assert client.get(api_url).status_code == 403
+    assert no_sleep == []
+
+
+@responses.activate
+def test_get_pages(client):
+    files_url = f"{api_url}/files"
+    for page in (1, 2, 3):
+        responses.get(
+            files_url,
+            json=[page],
+            headers={"Link": f'<{files_url}?per_page=100&page=3>; rel="last"'},
+            match=[
+                matchers.query_param_matcher({"per_page": "100", "page": str(page)})
+            ],
+        )
+
+    pages = client.get_pages(files_url)
+
+    assert [response.json() for response in pages] == [[1], [2], [3]]
+
+
+@responses.activate
+def test_get_pages_follows_next_links(client):
+    releases_url = "https://api.github.com/repos/org/repo/releases"
+    responses.get(
+        releases_url,
+        json=[1],
+        headers={"Link": f'<{releases_url}?cursor=2>; rel="next"'},
+        match=[matchers.query_param_matcher({"per_page": "100", "page": "1"})],
+    )
+    responses.get(
+        releases_url,
+        status=404,
+        match=[matchers.query_param_matcher({"cursor": "2"})],
+    )
+
+    pages = client.get_pages(releases_url)
+
+    assert [response.status_code for response in pages] == [200, 404]
+
+
+@responses.activate
+def test_batch_requests_leave_a_reserve(client, no_sleep):
+    reset = int(time.time()) + 600
+    for remaining in (30, 19):
+        responses.get(
+            api_url,
+            headers={
+                "X-RateLimit-Limit": "100",
+                "X-RateLimit-Remaining": str(remaining),
+                "X-RateLimit-Reset": str(reset),
+                "X-RateLimit-Resource": "core",
+            },
+        )
+    client.priority = githubratelimit.BATCH
+
+    client.get(api_url)
+    assert no_sleep == []
+    client.get(api_url)
+    assert 20 < no_sleep[0] <= 60
+    client.get(api_url)
+    assert 595 < no_sleep[1] <= 602
+
+    budget = client.budget.resources["core"]
+    assert (budget.calls, budget.get_consumed(), budget.pauses) == (3, 12, 2)
@@ -0,0 +1,190 @@
+"""Budget of GitHub API requests, tracked from the rate limit headers of the responses.
+
+Every API response carries the state of the rate limit of its resource (core, graphql,
+search...): X-RateLimit-Limit, X-RateLimit-Remaining and X-RateLimit-Reset. The budget
+records them, so that no extra call to /rate_limit is needed, and makes requests wait
+before the limit is exhausted rather than after:
+
+* Interactive requests (e.g. the checks of a PR, the default) only wait when the budget
+  is exhausted, until the limit resets, up to GITHUB_API_MAX_WAIT seconds.
+* Batch requests (e.g. crawls for metrics) leave GITHUB_API_BATCH_RESERVE (default: 0.2)
+  of the limit to interactive requests, which share the same token. They are slowed
+  down when the remaining budget gets close to the reserve, and paused until the limit
+  resets once it is reached.
+
+The calls made and the budget consumed are logged at interpreter exit, with the other
+statistics of the client.
+"""
+
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+DEFAULT_BATCH_RESERVE = 0.2
+
+
+@dataclass
+class ResourceBudget:
+    """State of the rate limit of a resource.
+
+    Attributes:
+        limit (int): Number of requests allowed per window.
+        remaining (int): Number of requests left in the current window.
+        reset (int): Time at which the current window ends, in seconds since the epoch.
+        start_remaining (int): Number of requests left in the current window when it
+            was first seen.
+        consumed (int): Number of requests consumed in the previous windows.
+        calls (int): Number of responses received that counted against the limit.
+        pauses (int): Number of times requests waited for the budget.
+        paused_seconds (float): Total time spent waiting for the budget.
+    """
+
+    limit: int = 0
+    remaining: int = 0
+    reset: int = 0
+    start_remaining: int = 0
+    consumed: int = 0
+    calls: int = 0
+    pauses: int = 0
+    paused_seconds: float = 0.0
+
+    def get_consumed(self):
+        """Get the number of requests consumed since the resource was first seen."""
+        return self.consumed + self.start_remaining - self.remaining
+
+
+def get_resource(url):
+    """Guess the rate limit resource of a request to url, before its response tells."""
+    path = urlsplit(url).path
+    if path.startswith("/graphql"):
+        return "graphql"
+    if path.startswith("/search/"):
+        return "search"
+    return "core"
+
+
+class RateLimitBudget:
+    """Budget of requests per resource, see the module documentation.
+
+    Args:
+        max_wait (float): Maximum time an interactive request waits for the limit to
+            reset. Defaults to GITHUB_API_MAX_WAIT.
+        batch_reserve (float): Fraction of the limit kept for interactive requests.
+            Defaults to GITHUB_API_BATCH_RESERVE.
+    """
+
+    def __init__(self, max_wait=None, batch_reserve=None):
+        self.max_wait = max_wait or float(os.environ.get("GITHUB_API_MAX_WAIT") or 120)
+        self.batch_reserve = (
+            batch_reserve
+            if batch_reserve is not None
+            else float(
+                os.environ.get("GITHUB_API_BATCH_RESERVE") or DEFAULT_BATCH_RESERVE
+            )
+        )
+        self.resources = {}
+        self._lock = threading.Lock()
+
+    def observe(self, resource, remaining, limit, reset, counted=True):
+        """Record the state of the rate limit of resource.
+
+        Args:
+            resource (str): Name of the resource, e.g. "core".
+            remaining (int): Number of requests left.
+            limit (int): Number of requests allowed per window.
+            reset (int): End of the window, in seconds since the epoch.
+            counted (bool): Whether the request that returned this state counted
+                against the limit.
+        """
+        with self._lock:
+            budget = self.resources.get(resource)
+            if budget is None:
+                budget = self.resources[resource] = ResourceBudget(
+                    start_remaining=remaining + int(counted), remaining=remaining
+                )
+            elif reset > budget.reset:
+                budget.consumed += budget.start_remaining - budget.remaining
+                budget.start_remaining = remaining + int(counted)
+                budget.remaining = remaining
+            else:
+                # Concurrent responses may arrive out of order.
+                budget.remaining = min(budget.remaining, remaining)
+            budget.limit = limit
+            budget.reset = max(budget.reset, reset)
+            budget.calls += int(counted)
+
+    def update(self, response):
+        """Record the rate limit headers of a response, if it has them."""
+        headers = response.headers
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            limit = int(headers["X-RateLimit-Limit"])
+            reset = int(headers["X-RateLimit-Reset"])
+        except (KeyError, ValueError):
+            return
+        resource = headers.get("X-RateLimit-Resource") or get_resource(response.url)
+        self.observe(
+            resource, remaining, limit, reset, counted=response.status_code != 304
+        )
+
+    def get_delay(self, resource, priority=INTERACTIVE):
+        """Get the time a request to resource should wait before being sent.
+
+        Returns:
+            float: The delay in seconds, 0 if the request can be sent now.
+        """
+        with self._lock:
+            budget = self.resources.get(resource)
+            if budget is None:
+                return 0
+            until_reset = budget.reset - time.time()
+            if until_reset <= 0:
+                return 0
+            if priority == BATCH:
+                reserve = math.ceil(budget.limit * self.batch_reserve)
+            else:
+                reserve = 0
+            if budget.remaining <= reserve:
+                return until_reset + 1
+            if priority == BATCH and budget.remaining <= 2 * reserve:
+                # Spread the rest of the batch budget over the window.
+                return until_reset / (budget.remaining - reserve)
+            return 0
+
+    def wait(self, resource, priority=INTERACTIVE):
+        """Wait until a request to resource can be sent, see get_delay.
+
+        Interactive requests don't wait more than max_wait, they are sent anyway and
+        their response tells when the limit resets.
+        """
+        delay = self.get_delay(resource, priority)
+        if delay <= 0 or (priority != BATCH and delay > self.max_wait):
+            return
+        if delay >= 1:
+            print(
+                f"[INFO] GitHub API {resource} budget is low, pausing {priority} requests for {delay:.0f}s"
+            )
+        with self._lock:
+            budget = self.resources[resource]
+            budget.pauses += 1
+            budget.paused_seconds += delay
+        time.sleep(delay)
+
+    def print_summary(self):
+        """Print the calls made and the budget consumed per resource."""
+        for resource, budget in sorted(self.resources.items()):
+            message = (
+                f"[INFO] GitHub API {resource} budget: {budget.calls} calls,"
+                f" {budget.get_consumed()} consumed, {budget.remaining}/{budget.limit}"
+                f" remaining, resets in {max(0, budget.reset - time.time()):.0f}s"
+            )
+            if budget.pauses:
+                message += (
+                    f", paused {budget.pauses} times for {budget.paused_seconds:.0f}s"
+                )
+            print(message)
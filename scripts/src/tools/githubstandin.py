@@ -0,0 +1,327 @@
+"""Local stand-in for the GitHub API and raw.githubusercontent.com.
+
+The stand-in is an HTTP server serving recorded responses (fixtures), so that the
+scripts can run, be profiled and be benchmarked offline and deterministically. Point
+the scripts at it with:
+
+    GITHUB_API_URL=http://localhost:8080
+    GITHUB_RAW_URL=http://localhost:8080/raw
+
+Full URLs of the API given to the scripts (e.g. --api-url) are redirected to
+GITHUB_API_URL by githubclient, so the workflow inputs don't need to change. The
+published index (https://charts.openshift.io/index.yaml) is also read from
+GITHUB_RAW_URL when it is set, see indexfile.index.get_index_url.
+
+Fixtures are JSON files in the fixtures directory, one per request, holding the
+method, path and query of the request, and the status, headers and body of the
+response. POST requests (e.g. GraphQL queries) also match on the digest of their body,
+fixtures without body_digest match any body. In replay mode (the default), requests
+without a fixture get a 404. In record mode (--record), requests are forwarded to
+GitHub and their responses are saved as fixtures; the Authorization header is
+forwarded but never saved.
+
+Responses can be delayed (--latency), and carry rate limit headers (--rate-limit),
+counting down with each request as GitHub does. Responses with an ETag answer
+conditional requests with 304 Not Modified, which are not counted.
+
+Usage:
+    github-standin --fixtures tests/fixtures/github [--record] [--port 8080]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+sys.path.append("../")
+from tools import githubclient, githubratelimit
+
+RAW_PREFIX = "/raw"
+RATE_LIMIT_WINDOW = 3600
+# Headers that describe the transfer of a response rather than the response.
+SKIPPED_HEADERS = {
+    "connection",
+    "content-encoding",
+    "content-length",
+    "keep-alive",
+    "transfer-encoding",
+}
+
+
+def get_fixture_key(method, path, query, body_digest=None):
+    """Get the key under which the response to a request is stored.
+
+    The query parameters are sorted, so that their order doesn't matter.
+    """
+    query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return method, f"{path}?{query}" if query else path, body_digest
+
+
+def get_body_digest(body):
+    """Get the digest of the body of a request, None if it has no body. JSON bodies
+    are normalized, so that the order of their keys doesn't matter."""
+    if not body:
+        return None
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True).encode("utf-8")
+    except ValueError:
+        pass
+    return hashlib.sha256(body).hexdigest()
+
+
+def get_fixture_name(method, path, query, body_digest=None):
+    """Get the file name of a fixture: readable, and unique per key."""
+    key = json.dumps(get_fixture_key(method, path, query, body_digest))
+    slug = re.sub(r"[^A-Za-z0-9.]+", "_", path).strip("_")[:80]
+    return (
+        f"{method}_{slug}_{hashlib.sha256(key.encode('utf-8')).hexdigest()[:12]}.json"
+    )
+
+
+class GitHubStandIn:
+    """Fixtures served by the stand-in, and the state of its rate limit.
+
+    Args:
+        fixtures_dir (str): Directory of the fixtures.
+        record (bool): Forward the requests to GitHub and save their responses.
+        latency (float): Delay in seconds added to each response.
+        rate_limit (int): Number of requests allowed per hour, in the rate limit
+            headers of the responses. No rate limit headers if None.
+    """
+
+    def __init__(self, fixtures_dir, record=False, latency=0, rate_limit=None):
+        self.fixtures_dir = fixtures_dir
+        self.record = record
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.fixtures = {}
+        self.used = {}
+        self.reset = int(time.time()) + RATE_LIMIT_WINDOW
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+        self.load_fixtures()
+
+    def load_fixtures(self):
+        """Load the fixtures of fixtures_dir."""
+        if not os.path.isdir(self.fixtures_dir):
+            return
+        for name in sorted(os.listdir(self.fixtures_dir)):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(self.fixtures_dir, name)) as fd:
+                fixture = json.load(fd)
+            self.fixtures[self._get_key(fixture)] = fixture
+
+    def _get_key(self, fixture):
+        return get_fixture_key(
+            fixture["method"],
+            fixture["path"],
+            fixture.get("query", ""),
+            fixture.get("body_digest"),
+        )
+
+    def find_fixture(self, method, path, query, body_digest=None):
+        """Get the fixture of a request, or None if there is none."""
+        fixture = self.fixtures.get(get_fixture_key(method, path, query, body_digest))
+        if fixture is None and body_digest:
+            fixture = self.fixtures.get(get_fixture_key(method, path, query))
+        return fixture
+
+    def record_fixture(self, method, path, query, headers, body):
+        """Forward a request to GitHub, and save its response as a fixture."""
+        if path == RAW_PREFIX or path.startswith(f"{RAW_PREFIX}/"):
+            url = githubclient.GITHUB_RAW_URL + path[len(RAW_PREFIX) :]
+        else:
+            url = githubclient.GITHUB_BASE_URL + path
+        if query:
+            url = f"{url}?{query}"
+        forwarded = {
+            name: value
+            for name, value in headers.items()
+            if name.lower() in ("accept", "authorization", "content-type")
+        }
+        response = self.session.request(
+            method, url, headers=forwarded, data=body or None
+        )
+
+        fixture = {
+            "method": method,
+            "path": path,
+            "query": query,
+            "status": response.status_code,
+            "headers": {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() not in SKIPPED_HEADERS
+                and not name.lower().startswith("x-ratelimit-")
+            },
+        }
+        body_digest = get_body_digest(body)
+        if body_digest:
+            fixture["body_digest"] = body_digest
+        try:
+            fixture["body"] = response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            fixture["body_base64"] = base64.b64encode(response.content).decode("ascii")
+
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+        fixture_path = os.path.join(
+            self.fixtures_dir, get_fixture_name(method, path, query, body_digest)
+        )
+        with open(fixture_path, "w") as fd:
+            json.dump(fixture, fd, indent=2, sort_keys=True)
+        with self._lock:
+            self.fixtures[self._get_key(fixture)] = fixture
+        print(f"[INFO] Recorded {method} {url}: {response.status_code}")
+        return fixture
+
+    def get_rate_limit_headers(self, path, counted):
+        """Get the rate limit headers of a response, counting the request if needed."""
+        if self.rate_limit is None or path.startswith(RAW_PREFIX):
+            return {}
+        resource = githubratelimit.get_resource(path)
+        with self._lock:
+            if time.time() >= self.reset:
+                self.reset = int(time.time()) + RATE_LIMIT_WINDOW
+                self.used = {}
+            used = self.used.get(resource, 0) + int(counted)
+            self.used[resource] = used
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(0, self.rate_limit - used)),
+            "X-RateLimit-Reset": str(self.reset),
+            "X-RateLimit-Used": str(used),
+            "X-RateLimit-Resource": resource,
+        }
+
+    def handle(self, method, target, headers, body):
+        """Get the response to a request.
+
+        Returns:
+            (int, dict, bytes): The status, headers and body of the response.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        url = urlsplit(target)
+        body_digest = get_body_digest(body)
+        fixture = self.find_fixture(method, url.path, url.query, body_digest)
+        if fixture is None and self.record:
+            fixture = self.record_fixture(method, url.path, url.query, headers, body)
+        if fixture is None:
+            message = f"No fixture for {method} {target}"
+            print(f"[WARNING] {message}")
+            return (
+                404,
+                {"Content-Type": "application/json"},
+                json.dumps({"message": message}).encode("utf-8"),
+            )
+
+        response_headers = dict(fixture.get("headers", {}))
+        etag = response_headers.get("ETag") or response_headers.get("etag")
+        not_modified = etag is not None and headers.get("If-None-Match") == etag
+        response_headers.update(self.get_rate_limit_headers(url.path, not not_modified))
+        if not_modified:
+            return 304, response_headers, b""
+        if "body_base64" in fixture:
+            content = base64.b64decode(fixture["body_base64"])
+        else:
+            content = fixture.get("body", "").encode("utf-8")
+        return fixture["status"], response_headers, content
+
+
+def make_server(standin, host="localhost", port=8080):
+    """Create the HTTP server of a stand-in. Use port 0 to pick a free port."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            status, headers, content = standin.handle(
+                self.command, self.path, self.headers, body
+            )
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(content)
+
+        do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve recorded GitHub API responses for offline runs."
+    )
+    parser.add_argument(
+        "-f",
+        "--fixtures",
+        dest="fixtures",
+        type=str,
+        required=True,
+        help="Directory of the fixtures",
+    )
+    parser.add_argument(
+        "--record",
+        dest="record",
+        action="store_true",
+        help="Forward requests without a fixture to GitHub and save their responses",
+    )
+    parser.add_argument(
+        "--host", dest="host", type=str, default="localhost", help="Address to bind"
+    )
+    parser.add_argument(
+        "-p", "--port", dest="port", type=int, default=8080, help="Port to listen on"
+    )
+    parser.add_argument(
+        "--latency",
+        dest="latency",
+        type=float,
+        default=0,
+        help="Delay in seconds added to each response",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        dest="rate_limit",
+        type=int,
+        default=None,
+        help="Number of requests allowed per hour, sent in rate limit headers",
+    )
+    args = parser.parse_args()
+
+    standin = GitHubStandIn(args.fixtures, args.record, args.latency, args.rate_limit)
+    server = make_server(standin, args.host, args.port)
+    host, port = server.server_address[:2]
+    mode = "recording" if args.record else "replaying"
+    print(
+        f"[INFO] GitHub stand-in {mode} {len(standin.fixtures)} fixtures on http://{host}:{port}"
+    )
+    print(f"[INFO] Set GITHUB_API_URL=http://{host}:{port}")
+    print(f"[INFO] Set GITHUB_RAW_URL=http://{host}:{port}{RAW_PREFIX}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
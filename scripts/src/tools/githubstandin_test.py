@@ -0,0 +1,199 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+import responses
+
+from tools import githubclient, githubstandin
+
+api_url = "https://api.github.com/repos/org/repo/pulls/42"
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FIXTURES_DIR = os.path.join(SRC_DIR, "..", "..", "tests", "fixtures", "github")
+REPOSITORY = "openshift-helm-charts/charts"
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    servers = []
+    monkeypatch.delenv("BOT_TOKEN", raising=False)
+
+    def serve(standin):
+        server = githubstandin.make_server(standin, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        host, port = server.server_address[:2]
+        monkeypatch.setenv("GITHUB_API_URL", f"http://{host}:{port}")
+        monkeypatch.setenv("GITHUB_RAW_URL", f"http://{host}:{port}/raw")
+        return githubclient.GitHubClient(max_retries=0)
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def write_fixture(fixtures_dir, **fixture):
+    name = githubstandin.get_fixture_name(
+        fixture["method"], fixture["path"], fixture.get("query", "")
+    )
+    (fixtures_dir / name).write_text(json.dumps(fixture))
+
+
+def test_replay(tmp_path, serve):
+    write_fixture(
+        tmp_path,
+        method="GET",
+        path="/repos/org/repo/pulls/42/files",
+        query="per_page=100&page=1",
+        status=200,
+        headers={"Content-Type": "application/json", "ETag": '"v1"'},
+        body='[{"filename": "charts/partners/acme/awesome/OWNERS"}]',
+    )
+    write_fixture(
+        tmp_path,
+        method="GET",
+        path="/raw/org/repo/gh-pages/index.yaml",
+        status=200,
+        body="apiVersion: v1\n",
+    )
+    client = serve(githubstandin.GitHubStandIn(str(tmp_path), rate_limit=5000))
+
+    (response,) = client.get_pages(f"{api_url}/files")
+    assert response.json() == [{"filename": "charts/partners/acme/awesome/OWNERS"}]
+    assert response.headers["X-RateLimit-Remaining"] == "4999"
+
+    response = client.get(f"{api_url}/files?page=1&per_page=100")
+    assert response.status_code == 200
+    assert response.headers["X-RateLimit-Remaining"] == "4998"
+
+    response = client.get(
+        f"{api_url}/files",
+        params={"per_page": 100, "page": 1},
+        headers={"If-None-Match": '"v1"'},
+    )
+    assert response.status_code == 304
+    assert response.headers["X-RateLimit-Remaining"] == "4998"
+
+    raw_url = githubclient.get_raw_url("org/repo", "gh-pages", "index.yaml")
+    assert client.get(raw_url).text == "apiVersion: v1\n"
+    assert client.get(api_url).status_code == 404
+
+
+@responses.activate
+def test_record(tmp_path, serve):
+    responses.add_passthru("http://127.0.0.1")
+    responses.add_passthru("http://localhost")
+    responses.post(
+        "https://api.github.com/graphql",
+        json={"data": {"repository": None}},
+        headers={"X-RateLimit-Remaining": "4321"},
+    )
+    client = serve(githubstandin.GitHubStandIn(str(tmp_path), record=True))
+
+    query = {"query": "{ viewer { login } }", "variables": {"a": 1, "b": 2}}
+    assert client.post("graphql", json=query).json() == {"data": {"repository": None}}
+
+    (fixture_path,) = tmp_path.iterdir()
+    fixture = json.loads(fixture_path.read_text())
+    assert fixture["path"] == "/graphql"
+    assert "X-RateLimit-Remaining" not in fixture["headers"]
+
+    standin = githubstandin.GitHubStandIn(str(tmp_path))
+    body = json.dumps({"variables": {"b": 2, "a": 1}, "query": "{ viewer { login } }"})
+    status, _, content = standin.handle("POST", "/graphql", {}, body.encode("utf-8"))
+    assert (status, json.loads(content)) == (200, {"data": {"repository": None}})
+
+
+def test_recorded_fixtures():
+    """Every fixture under tests/fixtures/github is served, without credentials."""
+    standin = githubstandin.GitHubStandIn(FIXTURES_DIR)
+    assert standin.fixtures
+    for fixture in standin.fixtures.values():
+        assert "authorization" not in {name.lower() for name in fixture["headers"]}
+        target = fixture["path"]
+        if fixture["query"]:
+            target = f"{target}?{fixture['query']}"
+        status, _, _ = standin.handle(fixture["method"], target, {}, b"")
+        assert status == fixture["status"]
+
+
+def run_script(module, args, cwd, env):
+    """Run the main function of a pipeline script as its console script does, in its
+    own process."""
+    env = dict(
+        env,
+        PYTHONPATH=SRC_DIR,
+        GITHUB_OUTPUT=str(cwd / "github_output"),
+        GITHUB_API_CACHE_DIR="",
+        INDEX_CACHE_DIR="",
+    )
+    env.pop("BOT_TOKEN", None)
+    return subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys; from {module} import main; sys.exit(main())",
+        ]
+        + args,
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+
+@pytest.fixture
+def standin_env(serve):
+    serve(githubstandin.GitHubStandIn(FIXTURES_DIR))
+    return {
+        name: value
+        for name, value in os.environ.items()
+        if name not in ("GITHUB_API_CACHE_DIR", "INDEX_CACHE_DIR")
+    }
+
+
+def test_validate_submission(tmp_path, standin_env):
+    """validate-submission runs offline against the recorded PR, index and tags."""
+    chart_dir = tmp_path / "pr-branch" / "charts" / "partners" / "hashicorp" / "vault"
+    (chart_dir / "0.17.0").mkdir(parents=True)
+    (chart_dir / "OWNERS").write_text(
+        "chart:\n  name: vault\nproviderDelivery: false\n"
+    )
+    (chart_dir / "0.17.0" / "report.yaml").write_text(
+        "apiversion: v1\nkind: verify-report\n"
+        "metadata:\n  tool:\n    webCatalogOnly: false\n"
+    )
+
+    result = run_script(
+        "submission.validate",
+        [
+            f"--api_url=https://api.github.com/repos/{REPOSITORY}/pulls/1234",
+            f"--repository={REPOSITORY}",
+            f"--output={tmp_path / 'submission.json'}",
+        ],
+        tmp_path,
+        standin_env,
+    )
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    outputs = (tmp_path / "github_output").read_text().splitlines()
+    assert "chart_entry_name=vault" in outputs
+    assert "release_tag=hashicorp-vault-0.17.0" in outputs
+    assert not any(line.startswith("pr-content-error-message") for line in outputs)
+
+
+def test_check_auto_merge(tmp_path, standin_env):
+    """check-auto-merge runs offline against the recorded merged PR."""
+    result = run_script(
+        "checkautomerge.checkautomerge",
+        [f"--api-url=https://api.github.com/repos/{REPOSITORY}/pulls/1200"],
+        tmp_path,
+        standin_env,
+    )
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "[INFO] Pull request merged" in result.stdout
@@ -15,10 +15,11 @@ import json
 import os
 import sys
 
-import requests
 from git import Repo
 
-GITHUB_BASE_URL = "https://api.github.com"
+sys.path.append("../")
+from tools import githubclient
+
 CHARTS_REPO = "/charts"
 DEVELOPMENT_REPO = "/development"
 STAGE_REPO = "/stage"
@@ -43,7 +44,7 @@ def set_git_username_email(repo, username, email):
 
 
 def github_api_post(endpoint, headers, json):
-    r = requests.post(f"{GITHUB_BASE_URL}/{endpoint}", headers=headers, json=json)
+    r = githubclient.get_client().post(endpoint, headers=headers, json=json)
 
     try:
         response_json = r.json()
@@ -58,7 +59,7 @@ def github_api_post(endpoint, headers, json):
 
 
 def github_api_get(endpoint, headers):
-    r = requests.get(f"{GITHUB_BASE_URL}/{endpoint}", headers=headers)
+    r = githubclient.get_client().get(endpoint, headers=headers)
     response_json = r.json()
     if "message" in response_json:
         print(f'[ERROR] get request: {response_json["message"]}')
@@ -0,0 +1,236 @@
+"""Compute the SHA256 digest of a remote file, typically a chart tarball.
+
+The file is retrieved with a single streaming GET request, following redirects, and is
+hashed chunk by chunk so that memory usage doesn't depend on the size of the file. The
+outcome is kept in memory, so that checking that a URL is accessible and verifying the
+digest of its content only require a single transfer.
+
+Digests are also persisted on disk along with the validators of the response (ETag,
+Last-Modified and Content-Length). Later requests for the same URL are conditional: if
+the server answers 304 Not Modified, the known digest is returned without transferring
+the content again. The least recently used digests are evicted when the total size of
+the cache goes above a limit.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass
+
+import requests
+
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = 60
+DEFAULT_CACHE_SIZE = 1024 * 1024
+
+# Digests already computed, keyed by URL.
+_remote_digests = {}
+
+
+@dataclass
+class RemoteDigest:
+    """Outcome of the retrieval of a remote file.
+
+    Attributes:
+        url (str): The requested URL.
+        final_url (str): The URL the content was retrieved from, after redirects.
+        status_code (int): HTTP status code of the final response.
+        reason (str): HTTP reason phrase of the final response.
+        size (int): Number of bytes received. Set to 0 if the request failed.
+        sha256 (str): Hex digest of the content. Set to None if the request failed.
+    """
+
+    url: str
+    final_url: str
+    status_code: int
+    reason: str
+    size: int = 0
+    sha256: str = None
+
+    @property
+    def ok(self):
+        return self.status_code == 200
+
+    def raise_for_status(self):
+        """Raise requests.HTTPError for 4XX and 5XX responses, as requests does."""
+        if 400 <= self.status_code < 600:
+            kind = "Client" if self.status_code < 500 else "Server"
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} {kind} Error: {self.reason} for url: {self.final_url}"
+            )
+
+
+class DigestCache:
+    """On-disk cache of digests, keyed by URL, with least recently used eviction.
+
+    Each entry is a JSON file holding the digest of the content of a URL and the
+    validators of the response it was computed from. The modification time of the
+    file records its last use.
+
+    Args:
+        cache_dir (str): Directory in which the entries are stored.
+        max_size (int): Total size in bytes above which the least recently used entries
+            are removed.
+    """
+
+    def __init__(self, cache_dir, max_size=DEFAULT_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def _entry_path(self, url):
+        return os.path.join(
+            self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json"
+        )
+
+    def get(self, url):
+        """Get the cache entry for url, or None if there is none."""
+        entry_path = self._entry_path(url)
+        try:
+            with open(entry_path) as fd:
+                entry = json.load(fd)
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url:
+            return None
+        return entry
+
+    def put(self, url, entry):
+        """Store the cache entry for url, evicting old entries if needed."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as tmp_file:
+                json.dump(dict(entry, url=url), tmp_file)
+            os.replace(tmp_path, self._entry_path(url))
+        except OSError as err:
+            print(f"[WARNING] Failed to persist digest in {self.cache_dir}: {err}")
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in max_size."""
+        try:
+            entries = [
+                (entry, entry.stat())
+                for entry in os.scandir(self.cache_dir)
+                if entry.name.endswith(".json")
+            ]
+            total_size = sum(stat.st_size for _, stat in entries)
+            entries.sort(key=lambda entry: entry[1].st_mtime_ns)
+            for entry, stat in entries:
+                if total_size <= self.max_size:
+                    break
+                os.remove(entry.path)
+                total_size -= stat.st_size
+        except OSError as err:
+            print(f"[WARNING] Failed to evict digests from {self.cache_dir}: {err}")
+
+
+def get_digest_cache():
+    """Get the cache configured by the environment.
+
+    REMOTE_DIGEST_CACHE_DIR sets the location of the cache, set it to an empty string to
+    disable the cache. REMOTE_DIGEST_CACHE_SIZE sets its maximum size in bytes.
+
+    Returns:
+        DigestCache: The cache, or None if disabled.
+    """
+    cache_dir = os.environ.get(
+        "REMOTE_DIGEST_CACHE_DIR",
+        os.path.join(tempfile.gettempdir(), "chart-remote-digests"),
+    )
+    if not cache_dir:
+        return None
+    max_size = int(os.environ.get("REMOTE_DIGEST_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+    return DigestCache(cache_dir, max_size)
+
+
+def _get_validators(response):
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "content_length": response.headers.get("Content-Length"),
+    }
+
+
+def _get_conditional_headers(entry):
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def _is_cached_response(response, entry):
+    """Check whether a 304 response confirms the cache entry."""
+    if response.status_code != 304:
+        return False
+    content_length = response.headers.get("Content-Length")
+    if content_length and entry.get("content_length"):
+        # Some servers send the length of the 304 response itself (0)
+        return content_length in ("0", entry["content_length"])
+    return True
+
+
+def fetch_remote_digest(
+    url, session=None, cache=None, chunk_size=CHUNK_SIZE, timeout=TIMEOUT
+):
+    """Download a file and compute its digest, without keeping its content in memory.
+
+    Args:
+        url (str): URL of the file.
+        session (requests.Session): Session used to send the request. Defaults to the
+            requests module itself.
+        cache (DigestCache): Cache used to send a conditional request and to store the
+            computed digest. Defaults to no cache.
+        chunk_size (int): Size of the chunks read from the response.
+        timeout (int): Timeout in seconds for connecting and for each read.
+
+    Returns:
+        RemoteDigest: The status, size and digest of the file.
+
+    Raises:
+        requests.exceptions.RequestException: if the request cannot be sent, e.g. the
+            URL is invalid.
+    """
+    http = session or requests
+    entry = cache.get(url) if cache else None
+    headers = _get_conditional_headers(entry) if entry else {}
+
+    with http.get(
+        url, headers=headers, allow_redirects=True, stream=True, timeout=timeout
+    ) as response:
+        if entry and _is_cached_response(response, entry):
+            print(f"[INFO] {url} is not modified, use known digest")
+            return RemoteDigest(**entry["digest"])
+
+        remote_digest = RemoteDigest(
+            url=url,
+            final_url=response.url,
+            status_code=response.status_code,
+            reason=response.reason,
+        )
+        if response.status_code == 200:
+            sha256 = hashlib.sha256()
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                sha256.update(chunk)
+                remote_digest.size += len(chunk)
+            remote_digest.sha256 = sha256.hexdigest()
+
+            validators = _get_validators(response)
+            if cache and (validators["etag"] or validators["last_modified"]):
+                cache.put(url, dict(validators, digest=asdict(remote_digest)))
+    return remote_digest
+
+
+def get_remote_digest(url, session=None):
+    """Same as fetch_remote_digest, reusing the outcome of a previous call for url.
+
+    Digests are persisted in the cache returned by get_digest_cache.
+    """
+    if url not in _remote_digests:
+        _remote_digests[url] = fetch_remote_digest(url, session, get_digest_cache())
+    return _remote_digests[url]
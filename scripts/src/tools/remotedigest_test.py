@@ -0,0 +1,86 @@
+import hashlib
+import os
+
+import pytest
+import requests
+import responses
+from responses import matchers
+
+from tools import remotedigest
+
+chart_url = "https://example.com/charts/awesome-1.42.0.tgz"
+release_url = "https://objects.example.com/release/awesome-1.42.0.tgz"
+chart_content = b"\x1f\x8b" + b"chart content" * 10000
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(remotedigest, "_remote_digests", {})
+    monkeypatch.setenv("REMOTE_DIGEST_CACHE_DIR", str(tmp_path / "digests"))
+
+
+@responses.activate
+def test_single_streaming_request_follows_redirects():
+    responses.get(chart_url, status=302, headers={"Location": release_url})
+    responses.get(release_url, body=chart_content)
+
+    remote_digest = remotedigest.get_remote_digest(chart_url)
+    assert remote_digest.ok
+    assert remote_digest.final_url == release_url
+    assert remote_digest.size == len(chart_content)
+    assert remote_digest.sha256 == hashlib.sha256(chart_content).hexdigest()
+
+    # A second lookup reuses the first transfer
+    assert remotedigest.get_remote_digest(chart_url) is remote_digest
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_not_found():
+    responses.get(chart_url, status=404)
+
+    remote_digest = remotedigest.fetch_remote_digest(chart_url)
+    assert not remote_digest.ok
+    assert remote_digest.sha256 is None
+    with pytest.raises(requests.exceptions.HTTPError, match="404 Client Error"):
+        remote_digest.raise_for_status()
+
+
+def test_invalid_url():
+    with pytest.raises(requests.exceptions.MissingSchema):
+        remotedigest.fetch_remote_digest("awesome-1.42.0.tgz")
+
+
+@responses.activate
+def test_not_modified_uses_cached_digest():
+    responses.get(
+        chart_url,
+        headers={"ETag": '"v1"'},
+        match=[matchers.header_matcher({"If-None-Match": '"v1"'}, strict_match=False)],
+        status=304,
+    )
+    responses.get(chart_url, body=chart_content, headers={"ETag": '"v1"'})
+
+    first = remotedigest.get_remote_digest(chart_url)
+    remotedigest._remote_digests.clear()
+    second = remotedigest.get_remote_digest(chart_url)
+
+    assert second == first
+    assert second.sha256 == hashlib.sha256(chart_content).hexdigest()
+    assert [call.response.status_code for call in responses.calls] == [200, 304]
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = remotedigest.DigestCache(str(tmp_path / "digests"))
+    cache.put("https://example.com/1.tgz", {"etag": "1"})
+    cache.put("https://example.com/2.tgz", {"etag": "2"})
+    # Room for two entries, which all have the same size
+    cache.max_size = 2 * os.path.getsize(cache._entry_path("https://example.com/1.tgz"))
+    os.utime(cache._entry_path("https://example.com/1.tgz"), (0, 0))
+    os.utime(cache._entry_path("https://example.com/2.tgz"), (1, 1))
+    assert cache.get("https://example.com/1.tgz")["etag"] == "1"
+    cache.put("https://example.com/3.tgz", {"etag": "3"})
+
+    assert cache.get("https://example.com/2.tgz") is None
+    assert cache.get("https://example.com/1.tgz")["etag"] == "1"
+    assert cache.get("https://example.com/3.tgz")["etag"] == "3"
@@ -0,0 +1,95 @@
+"""Wait for a condition, checking it on an exponential schedule with jitter.
+
+The first checks are close to each other, so that a condition that becomes true
+quickly is detected quickly, and the following ones are further and further apart, so
+that a long wait doesn't cost many checks. The jitter keeps concurrent waiters from
+checking in lockstep. Errors raised by the check can be tolerated until the deadline.
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class WaitResult:
+    """Outcome of wait_for.
+
+    Attributes:
+        done (bool): Whether the condition became true before the deadline.
+        value: Last value returned by the condition.
+        checks (int): Number of times the condition was checked.
+        errors (list[Exception]): Errors raised by the checks.
+        seconds (float): Time spent waiting.
+    """
+
+    done: bool = False
+    value: object = None
+    checks: int = 0
+    errors: list[Exception] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def get_summary(self):
+        """Get a one line summary of the wait, for the logs."""
+        summary = f"{self.checks} checks in {self.seconds:.1f}s"
+        if self.errors:
+            summary += f", {len(self.errors)} errors"
+        return summary
+
+
+def get_delays(initial_delay=1, max_delay=30, factor=2, jitter=0.5):
+    """Generate the delays between checks: initial_delay, multiplied by factor after
+    each check up to max_delay, each shortened by up to jitter (a fraction) at random.
+    """
+    delay = initial_delay
+    while True:
+        yield delay * (1 - random.uniform(0, jitter))
+        delay = min(delay * factor, max_delay)
+
+
+def wait_for(
+    condition,
+    timeout,
+    initial_delay=1,
+    max_delay=30,
+    factor=2,
+    jitter=0.5,
+    retry_on=(Exception,),
+):
+    """Check condition until it returns a true value, or timeout is reached.
+
+    Args:
+        condition (callable): Function without arguments, whose return value is true
+            once the wait is over.
+        timeout (float): Time in seconds after which checks stop. The last check is made
+            at the deadline.
+        initial_delay, max_delay, factor, jitter: Schedule of the checks, see
+            get_delays.
+        retry_on (tuple[type]): Errors raised by condition that don't stop the wait.
+
+    Returns:
+        WaitResult: The outcome of the wait.
+    """
+    result = WaitResult()
+    start = time.monotonic()
+    deadline = start + timeout
+    delays = get_delays(initial_delay, max_delay, factor, jitter)
+    while True:
+        result.checks += 1
+        try:
+            result.value = condition()
+        except retry_on as err:
+            print(f"[WARNING] check failed: {err}")
+            result.errors.append(err)
+        else:
+            if result.value:
+                result.done = True
+                break
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(next(delays), remaining))
+
+    result.seconds = time.monotonic() - start
+    return result
@@ -0,0 +1,42 @@
+import pytest
+
+from tools import waiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    sleeps = []
+
+    def sleep(delay):
+        sleeps.append(delay)
+        now[0] += delay
+
+    monkeypatch.setattr(waiter.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(waiter.time, "sleep", sleep)
+    return sleeps
+
+
+def test_wait_tolerates_errors(clock):
+    outcomes = iter([ValueError("transient"), None, "done"])
+
+    def condition():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    result = waiter.wait_for(condition, timeout=60, jitter=0)
+
+    assert (result.done, result.value, result.checks) == (True, "done", 3)
+    assert [str(err) for err in result.errors] == ["transient"]
+    assert clock == [1, 2]
+
+
+def test_wait_stops_at_deadline(clock):
+    result = waiter.wait_for(lambda: False, timeout=100, jitter=0)
+
+    assert not result.done
+    assert clock == [1, 2, 4, 8, 16, 30, 30, 9]
+    assert result.seconds == 100
+    assert result.get_summary() == "9 checks in 100.0s"
@@ -0,0 +1,162 @@
+"""Load and dump YAML with the fastest available backend.
+
+The loaders and dumpers backed by libyaml are used if PyYAML was built with it, and
+the pure-Python ones otherwise. get_backend tells which one is active.
+
+Loads are counted and timed, see get_stats. The statistics are printed when the process
+exits, if it loaded any YAML, like the GitHub API statistics of githubclient.
+
+load_file caches the parsed documents by path, along with the size and modification
+time of the file, so that a file read by several steps of a process (OWNERS,
+report.yaml, Chart.yaml) is only parsed once, and parsed again if it changes.
+"""
+
+import atexit
+import os
+import time
+from dataclasses import asdict, dataclass
+
+import yaml
+
+# Loader is not used here, but exported for the callers loading trusted files.
+__all__ = [
+    "BACKEND",
+    "Dumper",
+    "LoadStats",
+    "Loader",
+    "SafeLoader",
+    "dump",
+    "get_backend",
+    "get_stats",
+    "load",
+    "load_file",
+    "print_stats",
+    "reset_stats",
+]
+
+try:
+    from yaml import CDumper as Dumper
+    from yaml import CLoader as Loader
+    from yaml import CSafeLoader as SafeLoader
+
+    BACKEND = "libyaml"
+except ImportError:
+    from yaml import Dumper, Loader, SafeLoader
+
+    BACKEND = "python"
+
+# Parsed documents, keyed by absolute path and loader. Each entry also records the
+# size and modification time of the file, so that a modified file is parsed again.
+_documents = {}
+
+
+@dataclass
+class LoadStats:
+    """Statistics of the YAML loads of the process.
+
+    Attributes:
+        backend (str): "libyaml" or "python", see get_backend.
+        loads (int): Number of documents parsed.
+        load_seconds (float): Time spent parsing documents.
+        cache_hits (int): Number of calls to load_file that didn't need to parse.
+    """
+
+    backend: str = BACKEND
+    loads: int = 0
+    load_seconds: float = 0.0
+    cache_hits: int = 0
+
+
+_stats = LoadStats()
+_print_stats_registered = False
+
+
+def get_backend():
+    """Get the YAML backend in use, "libyaml" or "python"."""
+    return BACKEND
+
+
+def get_stats():
+    """Get the statistics of the YAML loads of the process, as a dict (see
+    LoadStats)."""
+    return asdict(_stats)
+
+
+def reset_stats():
+    global _stats
+    _stats = LoadStats()
+
+
+def print_stats():
+    """Print the backend in use and the statistics of the YAML loads of the process."""
+    if not _stats.loads and not _stats.cache_hits:
+        return
+    average = _stats.load_seconds / _stats.loads if _stats.loads else 0
+    print(
+        f"[INFO] YAML ({_stats.backend}): {_stats.loads} loads,"
+        f" {_stats.load_seconds:.2f}s (average {average:.3f}s),"
+        f" {_stats.cache_hits} cache hits"
+    )
+
+
+def _register_print_stats():
+    global _print_stats_registered
+    if not _print_stats_registered:
+        _print_stats_registered = True
+        atexit.register(print_stats)
+
+
+def load(stream, loader=SafeLoader):
+    """Parse a YAML document.
+
+    Args:
+        stream (str | bytes | file): The document.
+        loader (type): The loader class. Defaults to the safe loader.
+
+    Raises:
+        yaml.YAMLError: if the document is not valid YAML.
+    """
+    _register_print_stats()
+    start = time.perf_counter()
+    try:
+        return yaml.load(stream, Loader=loader)
+    finally:
+        _stats.loads += 1
+        _stats.load_seconds += time.perf_counter() - start
+
+
+def load_file(path, loader=SafeLoader):
+    """Parse a YAML file, reusing the result of a previous load if the file is
+    unchanged.
+
+    The returned document is shared between callers, and must not be modified.
+
+    Args:
+        path (str): Path to the file.
+        loader (type): The loader class. Defaults to the safe loader.
+
+    Raises:
+        OSError: if the file cannot be read.
+        yaml.YAMLError: if the file is not valid YAML.
+    """
+    abs_path = os.path.abspath(path)
+    stat = os.stat(abs_path)
+    cache_entry = _documents.get((abs_path, loader))
+    if cache_entry and cache_entry[:2] == (stat.st_size, stat.st_mtime_ns):
+        _register_print_stats()
+        _stats.cache_hits += 1
+        return cache_entry[2]
+
+    with open(abs_path) as fd:
+        document = load(fd, loader)
+    _documents[(abs_path, loader)] = (stat.st_size, stat.st_mtime_ns, document)
+    return document
+
+
+def dump(data, stream=None, **kwargs):
+    """Serialize data to YAML, see yaml.dump.
+
+    Returns:
+        str: The YAML document, if stream is None.
+    """
+    return yaml.dump(data, stream, Dumper=Dumper, **kwargs)
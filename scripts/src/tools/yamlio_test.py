@@ -0,0 +1,57 @@
+import os
+
+import pytest
+import yaml
+
+from tools import yamlio
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(monkeypatch):
+    monkeypatch.setattr(yamlio, "_documents", {})
+    yamlio.reset_stats()
+
+
+def test_load_file_is_cached_until_modified(tmp_path):
+    path = tmp_path / "OWNERS"
+    path.write_text("chart:\n  name: awesome\n")
+
+    first = yamlio.load_file(str(path))
+    assert first == {"chart": {"name": "awesome"}}
+    assert yamlio.load_file(str(path)) is first
+
+    path.write_text("chart:\n  name: awesomer\n")
+    os.utime(path, ns=(0, 0))
+    assert yamlio.load_file(str(path)) == {"chart": {"name": "awesomer"}}
+
+    stats = yamlio.get_stats()
+    assert stats["backend"] == yamlio.get_backend()
+    assert stats["loads"] == 2
+    assert stats["cache_hits"] == 1
+
+
+def test_print_stats(capsys):
+    yamlio.print_stats()
+    assert capsys.readouterr().out == ""
+
+    yamlio.load("a: 1")
+    yamlio.print_stats()
+    out = capsys.readouterr().out
+    assert out.startswith(f"[INFO] YAML ({yamlio.get_backend()}): 1 loads,")
+    assert out.endswith(", 0 cache hits\n")
+
+
+def test_load_file_errors(tmp_path):
+    with pytest.raises(OSError):
+        yamlio.load_file(str(tmp_path / "missing.yaml"))
+
+    path = tmp_path / "invalid.yaml"
+    path.write_text("key: [unclosed\n")
+    with pytest.raises(yaml.YAMLError):
+        yamlio.load_file(str(path))
+    assert yamlio.get_stats()["loads"] == 1
+
+
+def test_dump_round_trip():
+    data = {"b": [1, 2], "a": {"c": "d"}}
+    assert yamlio.load(yamlio.dump(data)) == data
@@ -0,0 +1,281 @@
+"""Three-way merge of Helm repository indexes, to publish concurrent index updates.
+
+A release job computes its index update (see updateindex.update_index) from the
+index it downloaded (the base). By the time it pushes, other jobs may have published
+their own updates (theirs). Instead of overwriting them, merge_indexes applies our
+changes on top of theirs, at the granularity of chart versions:
+
+* A version changed (added, replaced or removed) on one side only takes the value of
+  that side.
+* A version changed identically on both sides takes that value.
+* A version changed differently on both sides is a conflict, resolved
+  deterministically: a removal loses against a change, otherwise the chart with the
+  most recent submission timestamp wins (compared as datetimes, as they may have
+  different UTC offsets), then the one with the greatest JSON serialization, so that
+  any job resolves a conflict the same way.
+
+Top-level keys other than entries are merged the same way, except "generated" which
+takes our value.
+
+publish_index retries the merge and push while the push is rejected because the branch
+moved, so that jobs updating the index concurrently don't lose each other's updates.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import git
+
+sys.path.append("../")
+from indexfile import sidecar
+
+SUBMISSION_TIMESTAMP = "charts.openshift.io/submissionTimestamp"
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 2
+# Messages of git push when the branch moved since it was fetched.
+NON_FAST_FORWARD_MESSAGES = ("[rejected]", "fetch first", "non-fast-forward")
+# Order of submission timestamps that are missing or can't be parsed.
+NO_TIMESTAMP = datetime.min.replace(tzinfo=timezone.utc)
+
+
+class IndexPublishError(Exception):
+    pass
+
+
+@dataclass
+class MergeConflict:
+    """A chart version changed differently by both sides of a merge.
+
+    Attributes:
+        entry (str): Name of the index entry.
+        version (str): Version of the chart.
+        kept (str): Side whose change was kept, "ours" or "theirs".
+    """
+
+    entry: str
+    version: str
+    kept: str
+
+
+def _charts_by_version(charts):
+    by_version = {}
+    for chart in charts or []:
+        by_version.setdefault(chart["version"], chart)
+    return by_version
+
+
+def _parse_timestamp(value):
+    """Parse a submission timestamp, naive timestamps being in UTC."""
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value))
+        except ValueError:
+            return NO_TIMESTAMP
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _conflict_order(chart):
+    if chart is None:
+        return (False, NO_TIMESTAMP, "")
+    submitted = (chart.get("annotations") or {}).get(SUBMISSION_TIMESTAMP)
+    return (
+        True,
+        _parse_timestamp(submitted) if submitted else NO_TIMESTAMP,
+        json.dumps(chart, sort_keys=True, default=str),
+    )
+
+
+def _merge_value(base, ours, theirs):
+    """Three-way merge of a single value.
+
+    Returns:
+        (object, str): The merged value, and the side kept in case of conflict
+                       (None if there was no conflict).
+    """
+    if ours == base or ours == theirs:
+        return theirs, None
+    if theirs == base:
+        return ours, None
+    if _conflict_order(ours) > _conflict_order(theirs):
+        return ours, "ours"
+    return theirs, "theirs"
+
+
+def _merge_entry(entry, base, ours, theirs, conflicts):
+    base = _charts_by_version(base)
+    ours = _charts_by_version(ours)
+    theirs = _charts_by_version(theirs)
+
+    # Keep their order, with our new versions last in our order
+    merged = []
+    for version in list(theirs) + [v for v in ours if v not in theirs]:
+        chart, kept = _merge_value(
+            base.get(version), ours.get(version), theirs.get(version)
+        )
+        if kept:
+            conflicts.append(MergeConflict(entry, version, kept))
+        if chart is not None:
+            merged.append(chart)
+    return merged
+
+
+def merge_indexes(base, ours, theirs):
+    """Apply the changes made from base to ours on top of theirs.
+
+    Args:
+        base (dict): Content of the index ours was computed from.
+        ours (dict): Content of the index with our changes.
+        theirs (dict): Current content of the index, with the changes published by
+            others since base. May be None if the index doesn't exist.
+
+    Returns:
+        (dict, list): The merged index, and the list of MergeConflict resolved. The
+                      charts of the merged index are shared with the inputs.
+    """
+    base = base or {}
+    theirs = theirs or {}
+    conflicts = []
+
+    merged = {}
+    for key in list(theirs) + [k for k in ours if k not in theirs]:
+        if key in ("entries", "generated"):
+            continue
+        value, _ = _merge_value(base.get(key), ours.get(key), theirs.get(key))
+        if value is not None:
+            merged[key] = value
+
+    base_entries = base.get("entries") or {}
+    our_entries = ours.get("entries") or {}
+    their_entries = theirs.get("entries") or {}
+    merged["entries"] = {}
+    for entry in list(their_entries) + [
+        e for e in our_entries if e not in their_entries
+    ]:
+        base_charts = base_entries.get(entry)
+        our_charts = our_entries.get(entry)
+        their_charts = their_entries.get(entry)
+        if our_charts == base_charts:
+            charts = their_charts
+        elif their_charts == base_charts:
+            charts = our_charts
+        else:
+            charts = _merge_entry(
+                entry, base_charts, our_charts, their_charts, conflicts
+            )
+        if charts:
+            merged["entries"][entry] = charts
+
+    if "generated" in ours:
+        merged["generated"] = ours["generated"]
+    return merged, conflicts
+
+
+def _read_text(path):
+    try:
+        with open(path) as fd:
+            return fd.read()
+    except FileNotFoundError:
+        return None
+
+
+def _is_non_fast_forward(err):
+    """Whether git push failed because the branch moved since it was fetched."""
+    stderr = str(err.stderr or "")
+    return any(message in stderr for message in NON_FAST_FORWARD_MESSAGES)
+
+
+def publish_index(
+    repo_path,
+    index_file,
+    remote_url,
+    branch,
+    base,
+    ours,
+    write_index,
+    message,
+    max_attempts=MAX_ATTEMPTS,
+    retry_delay=RETRY_DELAY,
+):
+    """Merge our changes with the current index of a branch and push them.
+
+    The branch is fetched and checked out in repo_path (discarding local changes),
+    the merged index is written and committed, and pushed to the branch. If the push
+    is rejected because the branch moved (non-fast-forward), everything is retried,
+    with an exponential backoff. Other push failures are not retried.
+
+    Args:
+        repo_path (str): Path of the git worktree holding the index.
+        index_file (str): Path of the index file, relative to repo_path.
+        remote_url (str): URL of the git repository to fetch from and push to.
+        branch (str): Branch hosting the index.
+        base (dict): Content of the index ours was computed from.
+        ours (dict): Content of the index with our changes.
+        write_index (callable): Called with the merged index and the current content
+            of the index file (None if it doesn't exist), writes the index file (and
+            its companion files) to the current directory. Returns the list of paths
+            to commit.
+        message (str): Commit message.
+        max_attempts (int): Number of attempts before giving up.
+        retry_delay (float): Delay in seconds before the first retry.
+
+    Returns:
+        list: The MergeConflict resolved by the successful attempt.
+
+    Raises:
+        IndexPublishError: if the push is still rejected after max_attempts.
+        git.GitCommandError: if a git command fails otherwise (e.g. authentication,
+            missing branch, network error).
+    """
+    repo = git.Repo(repo_path)
+    for attempt in range(1, max_attempts + 1):
+        print(f"[INFO] Publishing {index_file} to {branch}, attempt {attempt}")
+        repo.git.fetch(remote_url, branch)
+        repo.git.checkout("--detach", "--force", "FETCH_HEAD")
+
+        index_path = os.path.join(repo_path, index_file)
+        theirs_text = _read_text(index_path)
+        theirs = None
+        if theirs_text is not None:
+            sidecar_text = _read_text(sidecar.get_sidecar_path(index_path))
+            theirs = sidecar.load_index(theirs_text, sidecar_text)
+
+        merged, conflicts = merge_indexes(base, ours, theirs)
+        for conflict in conflicts:
+            print(
+                f"[WARNING] Conflicting changes to {conflict.entry} {conflict.version},"
+                f" keeping {conflict.kept}"
+            )
+
+        cwd = os.getcwd()
+        os.chdir(repo_path)
+        try:
+            paths = write_index(merged, theirs_text)
+        finally:
+            os.chdir(cwd)
+        repo.git.add("--all", "--", *paths)
+        if not repo.is_dirty(index=True, working_tree=False):
+            print("[INFO] The index is already up to date")
+            return conflicts
+        repo.git.commit("-m", message)
+
+        try:
+            repo.git.push(remote_url, f"HEAD:refs/heads/{branch}")
+        except git.GitCommandError as err:
+            if not _is_non_fast_forward(err):
+                raise
+            if attempt == max_attempts:
+                raise IndexPublishError(
+                    f"Failed to push {index_file} after {attempt} attempts"
+                ) from err
+            delay = retry_delay * 2 ** (attempt - 1) * random.uniform(1, 1.5)
+            print(f"[WARNING] Push rejected, retrying in {delay:.1f}s: {err.stderr}")
+            time.sleep(delay)
+        else:
+            return conflicts
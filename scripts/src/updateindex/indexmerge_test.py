@@ -0,0 +1,186 @@
+import subprocess
+
+import git
+import pytest
+import yaml
+
+from updateindex import indexmerge
+
+
+def chart(version, submitted="2024-01-01", **fields):
+    return {
+        "name": "awesome",
+        "version": version,
+        "annotations": {indexmerge.SUBMISSION_TIMESTAMP: submitted},
+        **fields,
+    }
+
+
+def index(**entries):
+    return {"apiVersion": "v1", "entries": entries, "generated": "base"}
+
+
+def test_merge_keeps_changes_from_both_sides():
+    base = index(acme=[chart("1.0.0"), chart("1.1.0")], other=[chart("0.1.0")])
+    ours = index(acme=[chart("1.0.0"), chart("1.1.0"), chart("1.2.0")])
+    ours["entries"]["other"] = base["entries"]["other"]
+    ours["generated"] = "ours"
+    theirs = index(
+        acme=[chart("1.0.0", digest="new"), chart("1.1.0"), chart("1.3.0")],
+        new=[chart("0.0.1")],
+    )
+
+    merged, conflicts = indexmerge.merge_indexes(base, ours, theirs)
+
+    assert conflicts == []
+    assert merged == {
+        "apiVersion": "v1",
+        "entries": {
+            "acme": [
+                chart("1.0.0", digest="new"),
+                chart("1.1.0"),
+                chart("1.3.0"),
+                chart("1.2.0"),
+            ],
+            "new": [chart("0.0.1")],
+        },
+        "generated": "ours",
+    }
+
+
+@pytest.mark.parametrize(
+    "ours, theirs, expected, kept",
+    [
+        # The most recent submission wins, whatever the side
+        (
+            chart("1.0.0", "2024-03-01"),
+            chart("1.0.0", "2024-02-01"),
+            "2024-03-01",
+            "ours",
+        ),
+        (
+            chart("1.0.0", "2024-02-01"),
+            chart("1.0.0", "2024-03-01"),
+            "2024-03-01",
+            "theirs",
+        ),
+        # Timestamps are compared as datetimes, whatever their UTC offset
+        (
+            chart("1.0.0", "2024-03-01T10:00:00+02:00"),
+            chart("1.0.0", "2024-03-01T09:30:00+00:00"),
+            "2024-03-01T09:30:00+00:00",
+            "theirs",
+        ),
+        # A change wins against a removal
+        (None, chart("1.0.0", "2024-02-01"), "2024-02-01", "theirs"),
+        (chart("1.0.0", "2024-02-01"), None, "2024-02-01", "ours"),
+    ],
+)
+def test_merge_conflicts(ours, theirs, expected, kept):
+    base = index(acme=[chart("1.0.0"), chart("2.0.0")])
+
+    merged, conflicts = indexmerge.merge_indexes(
+        base,
+        index(acme=[c for c in [ours, chart("2.0.0")] if c]),
+        index(acme=[c for c in [theirs, chart("2.0.0")] if c]),
+    )
+
+    submitted = [
+        c["annotations"][indexmerge.SUBMISSION_TIMESTAMP]
+        for c in merged["entries"]["acme"]
+        if c["version"] == "1.0.0"
+    ]
+    assert submitted == [expected]
+    assert conflicts == [indexmerge.MergeConflict("acme", "1.0.0", kept)]
+
+
+def test_merge_without_remote_index():
+    ours = index(acme=[chart("1.0.0")])
+    merged, _ = indexmerge.merge_indexes(None, ours, None)
+    assert merged == ours
+
+
+@pytest.fixture
+def remote(tmp_path, monkeypatch):
+    for name in ["AUTHOR", "COMMITTER"]:
+        monkeypatch.setenv(f"GIT_{name}_NAME", "test")
+        monkeypatch.setenv(f"GIT_{name}_EMAIL", "test@example.com")
+
+    remote_path = tmp_path / "remote.git"
+    subprocess.run(["git", "init", "-q", "--bare", "-b", "gh-pages", remote_path])
+    seed = git.Repo.clone_from(remote_path, tmp_path / "seed")
+    (tmp_path / "seed" / "index.yaml").write_text(
+        yaml.dump(index(acme=[chart("1.0.0")]))
+    )
+    seed.git.add("index.yaml")
+    seed.git.commit("-m", "init")
+    seed.git.push("origin", "HEAD:refs/heads/gh-pages")
+    return str(remote_path)
+
+
+def test_publish_retries_rejected_push(remote, tmp_path):
+    base = index(acme=[chart("1.0.0")])
+    ours = index(acme=[chart("1.0.0"), chart("1.1.0")])
+    worktree = git.Repo.clone_from(remote, tmp_path / "worktree")
+    other = git.Repo.clone_from(remote, tmp_path / "other")
+    attempts = []
+
+    def write_index(merged, previous_text):
+        if not attempts:
+            # Another job publishes its update in the meantime
+            other_index = index(acme=[chart("1.0.0"), chart("2.0.0")])
+            (tmp_path / "other" / "index.yaml").write_text(yaml.dump(other_index))
+            other.git.commit("-am", "other update")
+            other.git.push("origin", "HEAD:refs/heads/gh-pages")
+        attempts.append(yaml.safe_load(previous_text))
+        with open("index.yaml", "w") as fd:
+            yaml.dump(merged, fd)
+        return ["index.yaml"]
+
+    indexmerge.publish_index(
+        worktree.working_dir,
+        "index.yaml",
+        remote,
+        "gh-pages",
+        base,
+        ours,
+        write_index,
+        "update",
+        retry_delay=0,
+    )
+
+    assert len(attempts) == 2
+    published = yaml.safe_load(git.Repo(remote).git.show("gh-pages:index.yaml"))
+    assert [c["version"] for c in published["entries"]["acme"]] == [
+        "1.0.0",
+        "2.0.0",
+        "1.1.0",
+    ]
+
+
+def test_publish_does_not_retry_other_push_errors(remote, tmp_path):
+    hook = tmp_path / "remote.git" / "hooks" / "pre-receive"
+    hook.write_text("#!/bin/sh\necho 'protected branch' >&2\nexit 1\n")
+    hook.chmod(0o755)
+    worktree = git.Repo.clone_from(remote, tmp_path / "worktree")
+    attempts = []
+
+    def write_index(merged, previous_text):
+        attempts.append(previous_text)
+        with open("index.yaml", "w") as fd:
+            yaml.dump(merged, fd)
+        return ["index.yaml"]
+
+    with pytest.raises(git.GitCommandError, match="protected branch"):
+        indexmerge.publish_index(
+            worktree.working_dir,
+            "index.yaml",
+            remote,
+            "gh-pages",
+            index(acme=[chart("1.0.0")]),
+            index(acme=[chart("1.0.0"), chart("1.1.0")]),
+            write_index,
+            "update",
+            retry_delay=0,
+        )
+    assert len(attempts) == 1
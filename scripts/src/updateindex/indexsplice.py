@@ -0,0 +1,207 @@
+"""Update a single chart version of index.yaml without parsing the whole document.
+
+The index is written by updateindex with yaml.dump, so its layout is predictable:
+
+    apiVersion: v1
+    entries:
+      <entry name>:
+      - <chart version>
+        ...
+      <entry name>:
+      - ...
+    generated: '<timestamp>'
+
+splice_index locates the byte range of the entry being updated in the existing
+document, parses only that range, and replaces it with the updated list of versions.
+The "generated" timestamp is updated as well. Everything else is kept byte for byte,
+so the cost of an update doesn't depend on the size of the index.
+
+If the document doesn't have the expected structure, IndexSpliceError is raised and
+the caller is expected to fall back to a full rewrite of the index.
+"""
+
+import re
+import sys
+
+import yaml
+
+sys.path.append("../")
+from tools import yamlio
+
+ENTRIES_KEY = "entries:\n"
+# Start of a line that isn't nested in an entry, i.e. the next entry or top-level key.
+_ENTRY_END = re.compile(r"^(?:  )?[^ \-\n]", re.MULTILINE)
+_ENTRY_KEY = re.compile(r"^  ([^ \-\n].*):\n", re.MULTILINE)
+_GENERATED = re.compile(r"^generated:.*\n", re.MULTILINE)
+
+
+class IndexSpliceError(Exception):
+    pass
+
+
+def _dump(data):
+    return yamlio.dump(data)
+
+
+def _indent(text):
+    return "".join(
+        f"  {line}" if line != "\n" else line for line in text.splitlines(True)
+    )
+
+
+def _get_entries_section(index_text):
+    """Get the start and end offsets of the content of the top-level entries key."""
+    if index_text.startswith(ENTRIES_KEY):
+        start = len(ENTRIES_KEY)
+    else:
+        start = index_text.find("\n" + ENTRIES_KEY)
+        if start < 0:
+            raise IndexSpliceError("No top-level entries key in index")
+        start += len(ENTRIES_KEY) + 1
+
+    # The section ends at the first of the top-level keys that follow it, which are
+    # all at the end of the document. Walk back the lines from the end of the document
+    # until reaching the last chart of the entries.
+    end = len(index_text)
+    line_end = len(index_text)
+    while line_end > start:
+        line_start = index_text.rfind("\n", start, line_end - 1) + 1
+        if line_start == 0:
+            line_start = start
+        if index_text.startswith(("  -", "    "), line_start):
+            break
+        if not index_text.startswith(" ", line_start):
+            end = line_start
+        line_end = line_start
+    return start, end
+
+
+def _find_insertion_point(index_text, entry_key, start, end):
+    """Binary search for the first entry sorted after entry_key, as yaml.dump does."""
+    # Entries starting before low are sorted before entry_key, the ones starting at
+    # high or after are sorted after.
+    low, high = start, end
+    while low < high:
+        middle = (low + high) // 2
+        match = _ENTRY_KEY.search(index_text, middle, end)
+        if match is None or match.start() >= high:
+            high = middle
+        elif match.group(1) < entry_key:
+            low = match.end()
+        else:
+            high = match.start()
+    match = _ENTRY_KEY.search(index_text, low, end)
+    return match.start() if match else end
+
+
+def _find_entry(index_text, entry_key, start, end):
+    """Find the byte range of an entry in the entries section.
+
+    Returns:
+        (int, int, bool): Start and end offsets of the entry, and whether it exists.
+            If it doesn't exist, both offsets are set to where it should be inserted
+            to keep the entries sorted.
+    """
+    key_line = f"  {entry_key}:\n"
+    entry_start = index_text.find(f"\n  {entry_key}:", start - 1, end) + 1
+    if entry_start == 0:
+        insertion_point = _find_insertion_point(index_text, entry_key, start, end)
+        return insertion_point, insertion_point, False
+    if not index_text.startswith(key_line, entry_start):
+        raise IndexSpliceError(f"Unexpected layout for entry {entry_key}")
+
+    next_entry = _ENTRY_END.search(index_text, entry_start + len(key_line), end)
+    entry_end = next_entry.start() if next_entry else end
+    return entry_start, entry_end, True
+
+
+def plan_splice(index_text, entry_name, chart_entry, generated=None):
+    """Compute the changes needed to add or replace one chart version in index.yaml.
+
+    Only the entry being updated is parsed, so the cost doesn't depend on the size of
+    the index. See splice_index.
+
+    Returns:
+        (list, str): The changes to make, as (start, end, text) tuples sorted by
+                     offset, and the updated entry (as YAML).
+
+    Raises:
+        IndexSpliceError: if the index doesn't have the expected structure.
+    """
+    # Serialize the key the same way yaml.dump does (e.g. quoted if needed)
+    entry_key = _dump({entry_name: None}).rsplit(":", 1)[0]
+    if "\n" in entry_key:
+        raise IndexSpliceError(f"Unsupported entry name: {entry_name}")
+
+    start, end = _get_entries_section(index_text)
+    entry_start, entry_end, found = _find_entry(index_text, entry_key, start, end)
+
+    charts = []
+    if found:
+        entry_text = index_text[entry_start:entry_end]
+        try:
+            entry_data = yamlio.load(entry_text)
+        except yaml.YAMLError as err:
+            raise IndexSpliceError(
+                f"Failed to parse entry {entry_name}: {err}"
+            ) from err
+        if not isinstance(entry_data, dict) or list(entry_data) != [entry_name]:
+            raise IndexSpliceError(f"Unexpected content for entry {entry_name}")
+        charts = entry_data[entry_name]
+        if not isinstance(charts, list) or not all(
+            isinstance(chart, dict) and "version" in chart for chart in charts
+        ):
+            raise IndexSpliceError(f"Unexpected chart list for entry {entry_name}")
+
+    charts = [chart for chart in charts if chart["version"] != chart_entry["version"]]
+    charts.append(chart_entry)
+    new_entry_text = _indent(_dump({entry_name: charts}))
+    if not new_entry_text.startswith(f"  {entry_key}:\n"):
+        raise IndexSpliceError(f"Unexpected serialization for entry {entry_name}")
+    changes = [(entry_start, entry_end, new_entry_text)]
+
+    if generated is not None:
+        # yaml.dump sorts keys, so "generated" comes after the entries
+        match = _GENERATED.search(index_text, end)
+        if match is None:
+            raise IndexSpliceError("No top-level generated key after the entries")
+        changes.append((match.start(), match.end(), _dump({"generated": generated})))
+
+    return changes, new_entry_text
+
+
+def _iter_spliced(index_text, changes):
+    offset = 0
+    for start, end, text in changes:
+        yield index_text[offset:start]
+        yield text
+        offset = end
+    yield index_text[offset:]
+
+
+def write_spliced(index_text, changes, fd):
+    """Write the index with the changes computed by plan_splice to a file object."""
+    for part in _iter_spliced(index_text, changes):
+        fd.write(part)
+
+
+def splice_index(index_text, entry_name, chart_entry, generated=None):
+    """Add or replace one chart version in the text of index.yaml.
+
+    Args:
+        index_text (str): Content of index.yaml, as written by yaml.dump.
+        entry_name (str): Name of the index entry to update.
+        chart_entry (dict): Chart version to add. An existing chart with the same
+            version is replaced.
+        generated (str): New value of the "generated" key. Left unchanged if None.
+
+    Returns:
+        (str, str): The updated index and the updated entry (as YAML).
+
+    Raises:
+        IndexSpliceError: if the index doesn't have the expected structure.
+    """
+    changes, new_entry_text = plan_splice(
+        index_text, entry_name, chart_entry, generated
+    )
+    return "".join(_iter_spliced(index_text, changes)), new_entry_text
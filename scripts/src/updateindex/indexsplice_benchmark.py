@@ -0,0 +1,117 @@
+"""Benchmark the update of a single chart version in synthetic indexes of growing size.
+
+Compares indexsplice.plan_splice with the full YAML round trip done by
+updateindex.update_index (load, update, dump). The time needed to write the spliced
+index, which is a copy of the original one, is measured separately.
+
+Example:
+    python -m updateindex.indexsplice_benchmark --sizes 1,10,50 --full
+"""
+
+import argparse
+import io
+import json
+import math
+import statistics
+import sys
+import time
+
+sys.path.append("../")
+from indexfile import helmindex, synthetic
+from tools import yamlio
+from updateindex import indexsplice
+
+VERSIONS_PER_ENTRY = 10
+
+
+def generate_index_text(size_mb):
+    """Generate the text of a synthetic index of approximately size_mb megabytes."""
+    sample = yamlio.dump(synthetic.generate_index(10, VERSIONS_PER_ENTRY))
+    entries = max(1, math.ceil(size_mb * 1e6 * 10 / len(sample)))
+    index_data = synthetic.generate_index(entries, VERSIONS_PER_ENTRY)
+    return yamlio.dump(index_data), list(index_data["entries"])
+
+
+def _time(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def benchmark_size(size_mb, repeat=3, full=False):
+    index_text, entry_names = generate_index_text(size_mb)
+    entry_name = entry_names[len(entry_names) // 2]
+    chart_name = entry_name.split("-", 1)[1]
+    new_version = synthetic.generate_chart(entry_name, chart_name, "2.0.0")
+    replaced_version = synthetic.generate_chart(entry_name, chart_name, "1.0.0")
+    new_entry = synthetic.generate_chart("zzz-new-chart", "new-chart", "0.1.0")
+
+    result = {
+        "size_mb": round(len(index_text) / 1e6, 2),
+        "entries": len(entry_names),
+        "splice_add_version_s": _time(
+            lambda: indexsplice.plan_splice(index_text, entry_name, new_version, "now"),
+            repeat,
+        ),
+        "splice_replace_version_s": _time(
+            lambda: indexsplice.plan_splice(
+                index_text, entry_name, replaced_version, "now"
+            ),
+            repeat,
+        ),
+        "splice_add_entry_s": _time(
+            lambda: indexsplice.plan_splice(
+                index_text, "zzz-new-chart", new_entry, "now"
+            ),
+            repeat,
+        ),
+    }
+
+    changes, _ = indexsplice.plan_splice(index_text, entry_name, new_version, "now")
+    result["write_spliced_s"] = _time(
+        lambda: indexsplice.write_spliced(index_text, changes, io.StringIO()), repeat
+    )
+
+    if full:
+
+        def full_update():
+            index_data = yamlio.load(index_text, yamlio.Loader)
+            index_data["generated"] = "now"
+            helmindex.HelmIndex(index_data).add(entry_name, new_version)
+            yamlio.dump(index_data)
+
+        result["full_rewrite_s"] = _time(full_update, 1)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="1,10,50",
+        help="comma separated sizes of the synthetic indexes in MB (default: 1,10,50)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measure")
+    parser.add_argument(
+        "--full", action="store_true", help="also time the full YAML round trip"
+    )
+    parser.add_argument("--json", dest="json_path", help="write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes.split(","):
+        result = benchmark_size(float(size), args.repeat, args.full)
+        print(json.dumps(result))
+        results.append(result)
+
+    if args.json_path:
+        with open(args.json_path, "w") as fd:
+            json.dump(results, fd, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import copy
+import hashlib
+import io
+
+import pytest
+import yaml
+
+from updateindex import indexsplice
+
+
+def make_chart(entry_name, chart_name, version):
+    digest = hashlib.sha256(f"{entry_name}-{version}".encode("utf-8")).hexdigest()
+    return {
+        "name": chart_name,
+        "version": version,
+        "description": f"Chart {chart_name}",
+        "digest": digest,
+        "created": "2024-01-01T00:00:00.000000000Z",
+        "urls": [f"https://example.com/{entry_name}-{version}.tgz"],
+        "annotations": {"charts.openshift.io/digest": f"sha256:{digest}"},
+    }
+
+
+def full_update(index_data, entry_name, chart_entry, generated):
+    """Reference implementation: full YAML round trip."""
+    index_data = copy.deepcopy(index_data)
+    charts = index_data["entries"].get(entry_name, [])
+    index_data["entries"][entry_name] = [
+        chart for chart in charts if chart["version"] != chart_entry["version"]
+    ] + [chart_entry]
+    index_data["generated"] = generated
+    return yaml.dump(index_data)
+
+
+@pytest.fixture
+def index_data():
+    entries = {}
+    for i in range(20):
+        entry_name = f"provider{i:03d}-chart{i:06d}"
+        entries[entry_name] = [
+            make_chart(entry_name, f"chart{i:06d}", f"1.{v}.0") for v in range(2)
+        ]
+    index_data = {
+        "apiVersion": "v1",
+        "entries": entries,
+        "generated": "2024-01-01T00:00:00+00:00",
+    }
+    index_data["serverInfo"] = {"contextPath": "/"}
+    return index_data
+
+
+@pytest.mark.parametrize(
+    "entry_name",
+    [
+        "provider000-chart000000",  # first entry
+        "provider010-chart000010",
+        "provider019-chart000019",  # last entry
+        "aaa-new",  # new entries
+        "provider010-chart000010a",
+        "zzz-new",
+    ],
+)
+@pytest.mark.parametrize("version", ["1.1.0", "2.0.0"])
+def test_splice_matches_full_rewrite(index_data, entry_name, version):
+    index_text = yaml.dump(index_data)
+    chart_entry = make_chart(entry_name, "chart", version)
+
+    spliced, entry_text = indexsplice.splice_index(
+        index_text, entry_name, chart_entry, "2024-06-01"
+    )
+
+    assert spliced == full_update(index_data, entry_name, chart_entry, "2024-06-01")
+    assert entry_text.startswith(f"  {entry_name}:\n")
+
+    changes, _ = indexsplice.plan_splice(
+        index_text, entry_name, chart_entry, "2024-06-01"
+    )
+    out = io.StringIO()
+    indexsplice.write_spliced(index_text, changes, out)
+    assert out.getvalue() == spliced
+
+
+@pytest.mark.parametrize(
+    "index_text",
+    [
+        "apiVersion: v1\nentries: {}\ngenerated: now\n",
+        "apiVersion: v1\nentries:\n  acme: []\ngenerated: now\n",
+        "apiVersion: v1\nentries:\n  acme:\n  - name: acme\ngenerated: now\n",
+        "apiVersion: v1\nentries:\n  acme:\n  - version: 1.0.0\n",
+    ],
+)
+def test_unexpected_layout(index_text):
+    with pytest.raises(indexsplice.IndexSpliceError):
+        indexsplice.splice_index(index_text, "acme", {"version": "1.0.0"}, "now")
@@ -3,13 +3,7 @@ import os
 import re
 import sys
 
-import yaml
-
-try:
-    from yaml import CLoader as Loader
-except ImportError:
-    from yaml import Loader
-from tools import gitutils
+from tools import gitutils, yamlio
 
 sys.path.append("../")
 from pullrequest import prartifact
@@ -72,8 +66,7 @@ def verify_user(username):
     if not os.path.exists(owners_path):
         print(f"[ERROR] {owners_path} file does not exist.")
     else:
-        data = open(owners_path).read()
-        out = yaml.load(data, Loader=Loader)
+        out = yamlio.load_file(owners_path, yamlio.Loader)
         if username in out["approvers"]:
             print(f"[INFO] {username} authorized")
             return True
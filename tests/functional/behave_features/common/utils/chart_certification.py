@@ -26,6 +26,7 @@ from common.utils.set_directory import SetDirectory
 from common.utils.setttings import *
 from common.utils.chart import *
 from common.utils.env import *
+from indexfile import shards, sidecar
 
 
 @dataclass
@@ -211,8 +212,24 @@ vendor:
         self.repo.git.checkout(f"{base_branch}-gh-pages")
 
         with open(index_file, "r") as fd:
+            index_text = fd.read()
+
+        # Only the chart's entry is needed, load it from its shard if available
+        index = None
+        try:
+            index = shards.load_entry_index(index_file, chart_name, index_text)
+        except shards.ShardError as err:
+            logging.info(f"Loading the whole index: {err}")
+
+        if index is None:
+            sidecar_text = None
+            sidecar_file = sidecar.get_sidecar_path(index_file)
+            if os.path.exists(sidecar_file):
+                with open(sidecar_file, "r") as fd:
+                    sidecar_text = fd.read()
+
             try:
-                index = yaml.safe_load(fd)
+                index = sidecar.load_index(index_text, sidecar_text)
             except yaml.YAMLError as err:
                 if failure_type == "error":
                     raise AssertionError(f"error parsing index.yaml: {err}")